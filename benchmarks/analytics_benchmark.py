@@ -0,0 +1,74 @@
+"""
+Times the analytics engine over the daily totals of a large synthetic ledger:
+building the prefix-sum table once, then computing every metric from it.
+
+Run from the project root:
+    python benchmarks/analytics_benchmark.py [rows]
+"""
+import os
+import sys
+import time
+from array import array
+from datetime import date
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features.analytics.analytics import TotalsMatrix, analyze
+from features.transactions.daily_totals import DailyTotals, day_number
+from features.transactions.transactions import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+
+DEFAULT_ROWS = 10_000_000
+REQUIRED_SECONDS = 1.0
+TODAY = date(2025, 6, 15)
+FIRST_DAY = date(2005, 7, 1)
+
+
+def generate_daily_totals(rows, seed=42):
+    """
+    Builds the DailyTotals of a 20-year ledger ending at TODAY with 10% income rows.
+    """
+    rng = np.random.default_rng(seed)
+    cells = [("expense", name) for name in EXPENSE_CATEGORIES] + [("income", name) for name in INCOME_CATEGORIES]
+    is_income = rng.random(rows) < 0.1
+    codes = np.where(
+        is_income,
+        len(EXPENSE_CATEGORIES) + rng.integers(0, len(INCOME_CATEGORIES), rows),
+        rng.integers(0, len(EXPENSE_CATEGORIES), rows),
+    )
+    days = day_number(TODAY) - day_number(FIRST_DAY) + 1
+    offsets = rng.integers(0, days, rows)
+    # Income rows are rarer but larger, so the synthetic months roughly break even.
+    amounts = np.where(is_income, 12, 1) * rng.integers(100, 10_000_000, rows)
+    per_day = np.bincount(offsets * len(cells) + codes, weights=amounts, minlength=days * len(cells))
+    prefix = np.zeros((days + 1, len(cells)), dtype=np.int64)
+    np.cumsum(np.rint(per_day).astype(np.int64).reshape(days, len(cells)), axis=0, out=prefix[1:])
+    return DailyTotals(day_number(FIRST_DAY), days, cells, array("q", prefix.tobytes()))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    daily_totals = generate_daily_totals(rows)
+    budgets = {name: 50_000_000 for name in EXPENSE_CATEGORIES}
+
+    started = time.perf_counter()
+    report = analyze(TotalsMatrix(daily_totals), budgets, TODAY)
+    seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for offset in range(1000):
+        daily_totals.range_totals(daily_totals.first_day + offset, daily_totals.first_day + offset + 365)
+    range_seconds = (time.perf_counter() - started) / 1000
+
+    print(f"{rows:,} rows over {daily_totals.days:,} days")
+    print(f"full analytics report: {seconds * 1000:.2f} ms")
+    print(f"one 365-day range total: {range_seconds * 1e6:.1f} us")
+    print(f"health score {report['health'][0]}/100, burn rate {report['burn_rate'] / 100:.2f}/day")
+    if seconds > REQUIRED_SECONDS:
+        print(f"FAIL: analytics took longer than {REQUIRED_SECONDS:.0f}s")
+        sys.exit(1)
+    print(f"OK: under {REQUIRED_SECONDS:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Times the date-ordered ledger on a large synthetic ledger: a one-month range
+lookup and a first page of newest rows against the sorted run plus delta, and
+the periodic merge that folds the delta back into the run.
+
+Run from the project root:
+    python benchmarks/date_order_benchmark.py [rows] [delta_rows]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from itertools import islice
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features.transactions.date_order import MERGE_RATIO, merge_ledger, scan_date_order
+from features.transactions.transactions import EXPENSE_CATEGORIES
+
+DEFAULT_ROWS = 1_000_000
+FIRST_DAY = date(2005, 7, 1)
+DAYS = 20 * 365
+
+
+def _line(rng, day):
+    return f"{FIRST_DAY + timedelta(days=day)},expense,{rng.choice(EXPENSE_CATEGORIES)},Synthetic row,{rng.randint(100, 10_000_000)}\n"
+
+
+def write_ledger(path, rows, delta_rows, seed=42):
+    """
+    Writes `rows` rows in date order followed by `delta_rows` rows with random dates.
+    """
+    rng = random.Random(seed)
+    days = sorted(rng.randrange(DAYS) for _ in range(rows))
+    with open(path, "w") as f:
+        f.writelines(_line(rng, day) for day in days)
+        f.writelines(_line(rng, rng.randrange(DAYS)) for _ in range(delta_rows))
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    delta_rows = int(sys.argv[2]) if len(sys.argv) > 2 else int(rows * MERGE_RATIO)
+    with tempfile.TemporaryDirectory() as directory:
+        ledger_path = os.path.join(directory, "transactions.txt")
+        order_path = os.path.join(directory, "date_order.json")
+        write_ledger(ledger_path, rows, delta_rows)
+        size = os.path.getsize(ledger_path)
+
+        started = time.perf_counter()
+        order = scan_date_order(ledger_path, order_path)
+        scan_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        order.delta(ledger_path)
+        delta_seconds = time.perf_counter() - started
+
+        month = FIRST_DAY + timedelta(days=DAYS // 2)
+        started = time.perf_counter()
+        matched = sum(1 for _ in order.range_lines(ledger_path, str(month), str(month + timedelta(days=30))))
+        range_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        list(islice(order.newest_lines(ledger_path), 20))
+        newest_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        merged = merge_ledger(order, ledger_path, order_path)
+        merge_seconds = time.perf_counter() - started
+
+    print(f"{rows:,} sorted rows + {delta_rows:,} delta rows, {size / 1e6:.1f} MB")
+    print(f"scan for the sorted run (after outside edits only): {scan_seconds:.2f} s")
+    print(f"load and sort the delta (once per process): {delta_seconds * 1000:.1f} ms")
+    print(f"one-month range, {matched:,} rows: {range_seconds * 1000:.2f} ms")
+    print(f"first page of newest rows: {newest_seconds * 1000:.2f} ms")
+    print(f"merge: {merge_seconds:.2f} s ({size / merge_seconds / 1e6:.0f} MB/s), "
+          f"{merge_seconds / max(delta_rows, 1) * 1e6:.1f} us per delta row amortized")
+    print(f"after merge: {merged.run_rows:,} rows in date order, {merged.delta_rows} in the delta")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Compares the memory held by the old list-of-dicts ledger with the compact
+Transaction records and the array-backed TransactionColumns container.
+
+Run from the project root:
+    python benchmarks/memory_benchmark.py [rows]
+"""
+import os
+import random
+import sys
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features.transactions.records import Transaction, TransactionColumns
+from features.transactions.transactions import EXPENSE_CATEGORIES, INCOME_CATEGORIES
+
+DEFAULT_ROWS = 100_000
+REQUIRED_RATIO = 3.0
+DESCRIPTIONS = ["Lunch at restaurant", "Bus fare", "Monthly Salary", "Groceries", "Electricity bill", "New shirt"]
+
+
+def generate_lines(rows, seed=42):
+    """
+    Builds synthetic ledger lines shaped like database/transactions.txt.
+    """
+    rng = random.Random(seed)
+    start = date(2005, 1, 1)
+    lines = []
+    for _ in range(rows):
+        type = "income" if rng.random() < 0.1 else "expense"
+        category = rng.choice(INCOME_CATEGORIES if type == "income" else EXPENSE_CATEGORIES)
+        day = start + timedelta(days=rng.randrange(20 * 365))
+        description = f"{rng.choice(DESCRIPTIONS)} #{rng.randrange(10_000)}"
+        lines.append(f"{day.isoformat()},{type},{category},{description},{rng.randrange(100, 10_000_000)}")
+    return lines
+
+
+def build_dicts(lines):
+    transactions = []
+    for line in lines:
+        date_str, type, category, description, amount = line.split(",")
+        transactions.append({
+            "date": datetime.strptime(date_str, "%Y-%m-%d"),
+            "type": type,
+            "category": category,
+            "description": description,
+            "amount": int(amount)
+        })
+    return transactions
+
+
+def build_records(lines):
+    return [Transaction.from_fields(*line.split(",")) for line in lines]
+
+
+def build_columns(lines):
+    columns = TransactionColumns()
+    for line in lines:
+        columns.append_fields(*line.split(","))
+    return columns
+
+
+def measure(builder, lines):
+    """
+    Returns the bytes still allocated by the structure builder() returns.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = builder(lines)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+    lines = generate_lines(rows)
+
+    baseline = measure(build_dicts, lines)
+    results = [
+        ("list of dicts (old)", baseline),
+        ("list of Transaction", measure(build_records, lines)),
+        ("TransactionColumns", measure(build_columns, lines)),
+    ]
+
+    print(f"{rows:,} rows")
+    print(f"{'representation':<22}{'total MiB':>12}{'bytes/row':>12}{'vs dicts':>10}")
+    for name, used in results:
+        print(f"{name:<22}{used / 2**20:>12.1f}{used / rows:>12.0f}{baseline / used:>9.1f}x")
+
+    columns_ratio = baseline / results[-1][1]
+    if columns_ratio < REQUIRED_RATIO:
+        print(f"FAIL: TransactionColumns saves only {columns_ratio:.1f}x (need {REQUIRED_RATIO:.0f}x)")
+        sys.exit(1)
+    print(f"OK: TransactionColumns uses {columns_ratio:.1f}x less memory than the old dict rows")
+
+
+if __name__ == "__main__":
+    main()
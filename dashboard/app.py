@@ -1,71 +1,75 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import datetime
+from html import escape
+from datetime import datetime, timedelta
 import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from features.storage.storage import get_storage, month_bounds
+from dashboard.data import LIVE_POLL_SECONDS, budget_status, live_ledger, load_dashboard_data
+from features.data_management.exporter import export_budgets, export_transactions
+from features.transactions.search_index import SEARCH_LIMIT
 
 # --- Constants and File Paths ---
-TRANSACTIONS_FILE = "database/transactions.txt"
-BUDGETS_FILE = "database/budgets.txt"
 EXPORTS_DIR = "exports"
+GRID_PAGE_SIZES = [25, 50, 100, 250]
+GRID_SORT_ORDERS = {"Newest first": "newest", "Oldest first": "oldest", "Largest amount": "largest", "Smallest amount": "smallest"}
 
 # --- Helper Functions for Data Handling ---
 
-def load_transactions():
-    if not os.path.exists(TRANSACTIONS_FILE):
-        return pd.DataFrame(columns=["Date", "Type", "Category", "Description", "Amount"])
-    
-    transactions = []
-    with open(TRANSACTIONS_FILE, "r") as f:
-        for line in f:
-            parts = line.strip().split(",")
-            if len(parts) == 5:
-                transactions.append({
-                    "Date": datetime.strptime(parts[0], "%Y-%m-%d").date(),
-                    "Type": parts[1],
-                    "Category": parts[2],
-                    "Description": parts[3],
-                    "Amount": int(parts[4]) # Stored as paisa/cents
-                })
-    return pd.DataFrame(transactions)
-
-def save_transactions(df):
-    os.makedirs(os.path.dirname(TRANSACTIONS_FILE), exist_ok=True)
-    df["Date"] = df["Date"].astype(str) # Convert date objects to string for saving
-    with open(TRANSACTIONS_FILE, "w") as f:
-        for _, row in df.iterrows():
-            f.write(f"{row['Date']},{row['Type']},{row['Category']},{row['Description']},{row['Amount']}\n")
+def add_transaction(date, transaction_type, category, description, amount):
+    """
+    Appends one transaction to the ledger through the storage journal; nothing
+    already stored is rewritten and the loaded DataFrame is left untouched.
+    """
+    get_storage().append_transactions([f"{date},{transaction_type},{category},{description},{amount}"])
 
 def load_budgets():
-    if not os.path.exists(BUDGETS_FILE):
+    budgets = [
+        {"Category": category, "Budget": amount} # Stored as paisa/cents
+        for category, amount in get_storage().load_budgets().items()
+    ]
+    if not budgets:
         return pd.DataFrame(columns=["Category", "Budget"])
-    
-    budgets = []
-    with open(BUDGETS_FILE, "r") as f:
-        for line in f:
-            parts = line.strip().split(",")
-            if len(parts) == 2:
-                budgets.append({
-                    "Category": parts[0],
-                    "Budget": int(parts[1]) # Stored as paisa/cents
-                })
     return pd.DataFrame(budgets)
 
-def save_budgets(df):
-    os.makedirs(os.path.dirname(BUDGETS_FILE), exist_ok=True)
-    with open(BUDGETS_FILE, "w") as f:
-        for _, row in df.iterrows():
-            f.write(f"{row['Category']},{row['Budget']}\n")
+@st.cache_resource
+def recover_storage():
+    """
+    Replays or discards writes a crash interrupted, once per dashboard process.
+    """
+    return get_storage().recover()
 
 def paisa_to_display(amount_paisa):
     return amount_paisa / 100
 
+def transactions_html(df):
+    """
+    Renders transaction rows as an HTML table with signed, coloured amounts.
+    Only call it with the handful of rows actually on screen.
+    """
+    display_df = pd.DataFrame({
+        "Date": pd.to_datetime(df["Date"]).dt.date,
+        "Type": df["Type"],
+        "Category": df["Category"],
+        "Description": df["Description"].map(escape),
+        "Amount": [
+            f"<span class='green-text'>+₹{paisa_to_display(amount):,.2f}</span>" if type == "Income"
+            else f"<span class='red-text'>-₹{paisa_to_display(amount):,.2f}</span>"
+            for type, amount in zip(df["Type"], df["Amount"])
+        ],
+    })
+    return display_df.to_html(escape=False, index=False)
+
 def display_to_paisa(amount_display):
     return int(amount_display * 100)
 
 # --- Streamlit App Setup ---
 
 st.set_page_config(layout="wide", page_title="Personal Finance Tracker")
+recover_storage()
 
 # Custom CSS for styling
 st.markdown("""
@@ -82,18 +86,34 @@ st.markdown("""
 
 st.sidebar.title("Navigation")
 page = st.sidebar.radio("Go to", ["Dashboard Overview", "Transactions Management", "Budget Management", "Financial Analytics", "Smart Assistant", "Data Management"])
+live_updates = st.sidebar.toggle("Live updates", value=True, help="Refresh when transactions are added from the CLI or another session")
+
+
+@st.fragment(run_every=LIVE_POLL_SECONDS)
+def watch_ledger(version):
+    """
+    Polls the ledger and reruns the page once new transactions have been read in.
+    """
+    if live_ledger().refresh().version != version:
+        st.rerun(scope="app")
 
 # --- Main Application Logic ---
 
-transactions_df = load_transactions()
+# Shared by every session and kept in step with appends to the ledger; see dashboard/data.py
+data = load_dashboard_data()
+transactions_df = data.transactions
 budgets_df = load_budgets()
+totals = data.totals()
+expense_totals = totals.get("Expense", {})
+if live_updates:
+    watch_ledger(data.version)
 
 if page == "Dashboard Overview":
     st.markdown("<h1 class='main-header'>Dashboard Overview</h1>", unsafe_allow_html=True)
 
     # Calculate financial summary
-    total_income = transactions_df[transactions_df["Type"] == "Income"]["Amount"].sum()
-    total_expenses = transactions_df[transactions_df["Type"] == "Expense"]["Amount"].sum()
+    total_income = sum(totals.get("Income", {}).values())
+    total_expenses = sum(expense_totals.values())
     current_balance = total_income - total_expenses
 
     st.markdown("<div class='card'>", unsafe_allow_html=True)
@@ -111,7 +131,7 @@ if page == "Dashboard Overview":
 
     # Expense Breakdown by Category
     st.subheader("Expense Breakdown by Category")
-    expense_by_category = transactions_df[transactions_df["Type"] == "Expense"].groupby("Category")["Amount"].sum().reset_index()
+    expense_by_category = pd.DataFrame(list(expense_totals.items()), columns=["Category", "Amount"])
     if not expense_by_category.empty:
         fig_pie = px.pie(expense_by_category, values="Amount", names="Category", title="Expense Distribution")
         st.plotly_chart(fig_pie, use_container_width=True)
@@ -123,34 +143,11 @@ if page == "Dashboard Overview":
     # Budget Status Section
     st.subheader("Budget Status")
     if not budgets_df.empty:
-        budget_status_data = []
-        for _, budget_row in budgets_df.iterrows():
-            category = budget_row["Category"]
-            budget_amount = budget_row["Budget"]
-            spent_amount = transactions_df[(transactions_df["Type"] == "Expense") & (transactions_df["Category"] == category)]["Amount"].sum()
-            
-            percentage_used = (spent_amount / budget_amount * 100) if budget_amount > 0 else 0
-            
-            if percentage_used >= 100:
-                status_color = "red"
-            elif percentage_used >= 70:
-                status_color = "orange"
-            else:
-                status_color = "green"
-            
-            budget_status_data.append({
-                "Category": category,
-                "Budget": paisa_to_display(budget_amount),
-                "Spent": paisa_to_display(spent_amount),
-                "Remaining": paisa_to_display(budget_amount - spent_amount),
-                "Percentage Used": f"{percentage_used:.2f}%",
-                "Status Color": status_color
-            })
-        
-        for item in budget_status_data:
-            st.markdown(f"**{item['Category']}**")
-            st.progress(min(item['Spent'] / item['Budget'], 1.0), text=f"Budget: ₹{item['Budget']:.2f} | Spent: ₹{item['Spent']:.2f} | Remaining: ₹{item['Remaining']:.2f} ({item['Percentage Used']})")
-            # st.markdown(f"<div style='color:{item['Status Color']};'>Budget: ₹{item['Budget']:.2f} | Spent: ₹{item['Spent']:.2f} | Remaining: ₹{item['Remaining']:.2f} ({item['Percentage Used']})</div>", unsafe_allow_html=True)
+        status = budget_status(budgets_df, expense_totals)
+        for item in status.itertuples(index=False):
+            budget, spent, remaining = paisa_to_display(item.Budget), paisa_to_display(item.Spent), paisa_to_display(item.Remaining)
+            st.markdown(f"**{item.Category}**")
+            st.progress(min(spent / budget, 1.0), text=f"Budget: ₹{budget:.2f} | Spent: ₹{spent:.2f} | Remaining: ₹{remaining:.2f} ({item.Used:.2f}%)")
     else:
         st.info("No budgets set yet.")
 
@@ -158,14 +155,8 @@ if page == "Dashboard Overview":
 
     # Recent Transactions Table
     st.subheader("Recent Transactions")
-    if not transactions_df.empty:
-        recent_transactions = transactions_df.sort_values(by="Date", ascending=False).head(10).copy()
-        recent_transactions["Amount"] = recent_transactions.apply(
-            lambda row: f"<span class='green-text'>+₹{paisa_to_display(row['Amount']):,.2f}</span>" if row['Type'] == 'Income'
-            else f"<span class='red-text'>-₹{paisa_to_display(row['Amount']):,.2f}</span>",
-            axis=1
-        )
-        st.markdown(recent_transactions[["Date", "Type", "Category", "Description", "Amount"]].to_html(escape=False, index=False), unsafe_allow_html=True)
+    if not data.empty:
+        st.markdown(transactions_html(data.recent), unsafe_allow_html=True)
     else:
         st.info("No transactions recorded yet.")
 
@@ -193,47 +184,92 @@ elif page == "Transactions Management":
             if amount_display <= 0:
                 st.error("Amount must be a positive number.")
             else:
-                new_transaction = {
-                    "Date": date,
-                    "Type": transaction_type,
-                    "Category": category,
-                    "Description": description,
-                    "Amount": display_to_paisa(amount_display)
-                }
-                transactions_df = pd.concat([transactions_df, pd.DataFrame([new_transaction])], ignore_index=True)
-                save_transactions(transactions_df)
+                add_transaction(date, transaction_type, category, description, display_to_paisa(amount_display))
                 st.success("Transaction added successfully!")
                 st.rerun()
 
-    st.subheader("View All Transactions")
-    if not transactions_df.empty:
-        # Filter transactions by date range
-        min_date = transactions_df["Date"].min()
-        max_date = transactions_df["Date"].max()
-
-        if pd.isna(min_date): # Handle case where min_date might be NaT
-            min_date = datetime.now().date()
-        if pd.isna(max_date): # Handle case where max_date might be NaT
-            max_date = datetime.now().date()
+    st.subheader("Search Transactions")
+    search_query = st.text_input("Search descriptions (end with * to match the start of a word)")
+    if search_query:
+        search_col1, search_col2, search_col3 = st.columns(3)
+        with search_col1:
+            search_range = st.date_input("Date Range", value=(), key="search_range")
+        with search_col2:
+            search_categories = st.multiselect("Categories", list(dict.fromkeys(
+                ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other",
+                 "Salary", "Freelance", "Business", "Investment", "Gift"]
+            )))
+        with search_col3:
+            search_min = st.number_input("Minimum Amount", min_value=0.0, format="%.2f")
+            search_max = st.number_input("Maximum Amount (0 for no limit)", min_value=0.0, format="%.2f")
+        search_start, search_end = search_range if len(search_range) == 2 else (None, None)
+        results = get_storage().search(
+            search_query, search_start, search_end, search_categories or None,
+            display_to_paisa(search_min) if search_min else None,
+            display_to_paisa(search_max) if search_max else None,
+        )
+        if results:
+            results_df = pd.DataFrame(
+                [[t["date"].date(), t["type"], t["category"], t["description"], t["amount"]] for t in results],
+                columns=["Date", "Type", "Category", "Description", "Amount"],
+            )
+            st.markdown(transactions_html(results_df), unsafe_allow_html=True)
+            if len(results) == SEARCH_LIMIT:
+                st.caption(f"Showing the newest {SEARCH_LIMIT} matches; narrow the search to see older ones.")
+        else:
+            st.info("No matching transactions found.")
 
-        date_range = st.date_input("Filter by Date Range", value=(min_date, max_date))
+    st.subheader("View All Transactions")
+    if not data.empty:
+        # Filtering and sorting happen here on the server; only the page on screen is formatted and sent
+        min_date = data.first_date
+        max_date = data.last_date
+
+        grid_col1, grid_col2, grid_col3 = st.columns(3)
+        with grid_col1:
+            date_range = st.date_input("Filter by Date Range", value=(min_date, max_date))
+            grid_types = st.multiselect("Types", list(transactions_df["Type"].cat.categories))
+        with grid_col2:
+            grid_categories = st.multiselect("Filter by Category", list(transactions_df["Category"].cat.categories))
+            grid_text = st.text_input("Description contains")
+        with grid_col3:
+            grid_min = st.number_input("Minimum Amount", min_value=0.0, format="%.2f", key="grid_min")
+            grid_max = st.number_input("Maximum Amount (0 for no limit)", min_value=0.0, format="%.2f", key="grid_max")
 
         if len(date_range) == 2:
             start_date, end_date = date_range
-            filtered_transactions_df = transactions_df[
-                (transactions_df["Date"] >= start_date) & (transactions_df["Date"] <= end_date)
-            ].copy()
+            range_totals = data.totals(start_date, end_date)
         else:
-            filtered_transactions_df = transactions_df.copy()
+            start_date, end_date = None, None
+            range_totals = totals
+
+        range_income = sum(range_totals.get("Income", {}).values())
+        range_expenses = sum(range_totals.get("Expense", {}).values())
+        st.caption(f"Income in range: ₹{paisa_to_display(range_income):,.2f} · Expenses in range: ₹{paisa_to_display(range_expenses):,.2f}")
+
+        sort_col, size_col, page_col = st.columns(3)
+        with sort_col:
+            sort_label = st.selectbox("Sort By", list(GRID_SORT_ORDERS))
+        with size_col:
+            page_size = st.selectbox("Rows per Page", GRID_PAGE_SIZES)
+        positions = data.select(
+            start_date, end_date, grid_types, grid_categories, grid_text.strip(),
+            display_to_paisa(grid_min) if grid_min else None,
+            display_to_paisa(grid_max) if grid_max else None,
+            GRID_SORT_ORDERS[sort_label],
+        )
+        page_count = max(1, -(-len(positions) // page_size))
+        with page_col:
+            page_number = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
 
         # Display transactions
-        display_df = filtered_transactions_df.copy()
-        display_df["Amount"] = display_df.apply(
-            lambda row: f"<span class='green-text'>+₹{paisa_to_display(row['Amount']):,.2f}</span>" if row['Type'] == 'Income'
-            else f"<span class='red-text'>-₹{paisa_to_display(row['Amount']):,.2f}</span>",
-            axis=1
-        )
-        st.markdown(display_df[["Date", "Type", "Category", "Description", "Amount"]].sort_values(by="Date", ascending=False).to_html(escape=False, index=False), unsafe_allow_html=True)
+        display_df = data.window(positions, page_number - 1, page_size)
+        if not display_df.empty:
+            first_row = (page_number - 1) * page_size + 1
+            st.caption(f"Showing {first_row:,}–{first_row + len(display_df) - 1:,} of {len(positions):,} transactions")
+            st.markdown(transactions_html(display_df), unsafe_allow_html=True)
+        else:
+            st.info("No transactions match these filters.")
     else:
         st.info("No transactions recorded yet.")
 
@@ -251,84 +287,58 @@ elif page == "Budget Management":
             if budget_amount_display <= 0:
                 st.error("Budget amount must be a positive number.")
             else:
-                new_budget = {
-                    "Category": category,
-                    "Budget": display_to_paisa(budget_amount_display)
-                }
-                # Update existing budget or add new one
-                if category in budgets_df["Category"].values:
-                    budgets_df.loc[budgets_df["Category"] == category, "Budget"] = new_budget["Budget"]
-                else:
-                    budgets_df = pd.concat([budgets_df, pd.DataFrame([new_budget])], ignore_index=True)
-                save_budgets(budgets_df)
+                # Recorded as a single upsert; the storage backend compacts its budget records itself
+                get_storage().set_budget(category, display_to_paisa(budget_amount_display))
                 st.success(f"Budget for {category} set to ₹{budget_amount_display:,.2f} successfully!")
                 st.rerun()
 
     st.subheader("View Current Budgets")
     if not budgets_df.empty:
-        budget_display_data = []
-        for _, budget_row in budgets_df.iterrows():
-            category = budget_row["Category"]
-            budget_amount = budget_row["Budget"]
-            spent_amount = transactions_df[(transactions_df["Type"] == "Expense") & (transactions_df["Category"] == category)]["Amount"].sum()
-            
-            remaining_amount = budget_amount - spent_amount
-            status = "Under Budget" if remaining_amount >= 0 else "Over Budget"
-            status_color = "green-text" if remaining_amount >= 0 else "red-text"
-
-            budget_display_data.append({
-                "Category": category,
-                "Budget Amount": f"₹{paisa_to_display(budget_amount):,.2f}",
-                "Spent Amount": f"₹{paisa_to_display(spent_amount):,.2f}",
-                "Remaining Amount": f"<span class='{status_color}'>₹{paisa_to_display(remaining_amount):,.2f}</span>",
-                "Status": f"<span class='{status_color}'>{status}</span>"
-            })
-        
-        st.markdown(pd.DataFrame(budget_display_data).to_html(escape=False, index=False), unsafe_allow_html=True)
+        status = budget_status(budgets_df, expense_totals)
+        under = status["Remaining"] >= 0
+        status_color = under.map({True: "green-text", False: "red-text"})
+        budget_display_df = pd.DataFrame({
+            "Category": status["Category"],
+            "Budget Amount": status["Budget"].map(lambda amount: f"₹{paisa_to_display(amount):,.2f}"),
+            "Spent Amount": status["Spent"].map(lambda amount: f"₹{paisa_to_display(amount):,.2f}"),
+            "Remaining Amount": "<span class='" + status_color + "'>" + status["Remaining"].map(lambda amount: f"₹{paisa_to_display(amount):,.2f}") + "</span>",
+            "Status": "<span class='" + status_color + "'>" + under.map({True: "Under Budget", False: "Over Budget"}) + "</span>",
+        })
+        st.markdown(budget_display_df.to_html(escape=False, index=False), unsafe_allow_html=True)
     else:
         st.info("No budgets set yet.")
 
 elif page == "Financial Analytics":
     st.markdown("<h1 class='main-header'>Financial Analytics</h1>", unsafe_allow_html=True)
 
-    if transactions_df.empty:
+    if data.empty:
         st.info("No transactions to analyze yet.")
     else:
-        # Ensure 'Date' column is datetime for filtering
-        transactions_df["Date"] = pd.to_datetime(transactions_df["Date"])
-
-        # Get current month's data
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-        current_month_df = transactions_df[(transactions_df["Date"].dt.month == current_month) & (transactions_df["Date"].dt.year == current_year)]
-
-        # Get last month's data
-        last_month_date = datetime.now().replace(day=1) - pd.DateOffset(days=1)
-        last_month = last_month_date.month
-        last_year = last_month_date.year
-        last_month_df = transactions_df[(transactions_df["Date"].dt.month == last_month) & (transactions_df["Date"].dt.year == last_year)]
+        # Month totals come from the cached daily aggregate table
+        today = datetime.now().date()
+        current_month_start, current_month_end = month_bounds(today.year, today.month)
+        last_month_date = today.replace(day=1) - timedelta(days=1)
+        last_month_start, last_month_end = month_bounds(last_month_date.year, last_month_date.month)
 
         # --- Spending Analysis ---
         st.subheader("Spending Analysis (Current Month)")
-        current_month_expenses = current_month_df[current_month_df["Type"] == "Expense"]
-        if not current_month_expenses.empty:
-            spending_by_category = current_month_expenses.groupby("Category")["Amount"].sum().reset_index()
+        spending_by_category = data.category_totals("Expense", current_month_start, current_month_end)
+        current_month_total_expenses = spending_by_category["Amount"].sum()
+        last_month_total_expenses = data.category_totals("Expense", last_month_start, last_month_end)["Amount"].sum()
+        if not spending_by_category.empty:
             fig_spending = px.bar(spending_by_category, x="Category", y="Amount", title="Spending Distribution by Category")
             st.plotly_chart(fig_spending, use_container_width=True)
 
             st.markdown("---")
             st.write("**Top 3 Spending Categories:**")
-            top_categories = spending_by_category.sort_values(by="Amount", ascending=False).head(3)
-            for _, row in top_categories.iterrows():
-                st.write(f"- {row['Category']}: ₹{paisa_to_display(row['Amount']):,.2f}")
+            for row in spending_by_category.head(3).itertuples(index=False):
+                st.write(f"- {row.Category}: ₹{paisa_to_display(row.Amount):,.2f}")
             
             st.markdown("---")
-            avg_daily_expense = current_month_expenses["Amount"].sum() / (datetime.now().day if datetime.now().day > 0 else 1)
+            avg_daily_expense = current_month_total_expenses / (today.day if today.day > 0 else 1)
             st.write(f"**Average Daily Expense:** ₹{paisa_to_display(avg_daily_expense):,.2f}")
 
             # Comparison with last month
-            last_month_total_expenses = last_month_df[last_month_df["Type"] == "Expense"]["Amount"].sum()
-            current_month_total_expenses = current_month_expenses["Amount"].sum()
             if last_month_total_expenses > 0:
                 expense_change = ((current_month_total_expenses - last_month_total_expenses) / last_month_total_expenses) * 100
                 if expense_change > 0:
@@ -344,18 +354,17 @@ elif page == "Financial Analytics":
 
         # --- Income Analysis ---
         st.subheader("Income Analysis (Current Month)")
-        current_month_income = current_month_df[current_month_df["Type"] == "Income"]
-        if not current_month_income.empty:
-            income_by_source = current_month_income.groupby("Category")["Amount"].sum().reset_index()
+        income_by_source = data.category_totals("Income", current_month_start, current_month_end)
+        current_month_total_income = income_by_source["Amount"].sum()
+        if not income_by_source.empty:
             fig_income = px.bar(income_by_source, x="Category", y="Amount", title="Income Distribution by Source")
             st.plotly_chart(fig_income, use_container_width=True)
 
             st.markdown("---")
-            st.write(f"**Total Income This Month:** ₹{paisa_to_display(current_month_income['Amount'].sum()):,.2f}")
+            st.write(f"**Total Income This Month:** ₹{paisa_to_display(current_month_total_income):,.2f}")
 
             # Comparison with last month
-            last_month_total_income = last_month_df[last_month_df["Type"] == "Income"]["Amount"].sum()
-            current_month_total_income = current_month_income["Amount"].sum()
+            last_month_total_income = data.category_totals("Income", last_month_start, last_month_end)["Amount"].sum()
             if last_month_total_income > 0:
                 income_change = ((current_month_total_income - last_month_total_income) / last_month_total_income) * 100
                 if income_change > 0:
@@ -371,9 +380,6 @@ elif page == "Financial Analytics":
 
         # --- Savings Analysis ---
         st.subheader("Savings Analysis (Current Month)")
-        current_month_total_income = current_month_df[current_month_df["Type"] == "Income"]["Amount"].sum()
-        current_month_total_expenses = current_month_df[current_month_df["Type"] == "Expense"]["Amount"].sum()
-        
         monthly_savings = current_month_total_income - current_month_total_expenses
         st.write(f"**Monthly Savings:** ₹{paisa_to_display(monthly_savings):,.2f}")
 
@@ -385,6 +391,23 @@ elif page == "Financial Analytics":
 
         st.markdown("---")
 
+        # --- Trends ---
+        st.subheader("Income, Spending and Balance Trends")
+        trend_col1, trend_col2 = st.columns(2)
+        with trend_col1:
+            trend_frequency = st.radio("Granularity", ["Daily", "Weekly", "Monthly"], index=2, horizontal=True)
+        with trend_col2:
+            trend_range = st.date_input("Trend Date Range", value=(data.first_date, data.last_date), key="trend_range")
+        trend_start, trend_end = trend_range if len(trend_range) == 2 else (None, None)
+        # Pre-aggregated rollups, downsampled and cached per granularity and range
+        trend_df, trend_periods = data.trend_chart(trend_frequency.lower(), trend_start, trend_end)
+        fig_trend = px.line(trend_df.assign(Amount=paisa_to_display(trend_df["Amount"])), x="Date", y="Amount", color="Series", title=f"{trend_frequency} Trends")
+        st.plotly_chart(fig_trend, use_container_width=True)
+        if len(trend_df) < trend_periods * 3:
+            st.caption(f"{trend_periods:,} {trend_frequency.lower()} periods downsampled to at most {len(trend_df) // 3:,} points per series.")
+
+        st.markdown("---")
+
         # --- Financial Health Score (Placeholder) ---
         st.subheader("Financial Health Score")
         st.info("Financial Health Score calculation is a placeholder. Implement logic based on savings rate, budget adherence, income vs expenses, and debt management.")
@@ -396,22 +419,20 @@ elif page == "Smart Assistant":
 
     st.subheader("Get Personalized Advice")
     if st.button("Generate Advice"):
-        if transactions_df.empty:
+        if data.empty:
             st.info("Please record some transactions to get personalized advice.")
         else:
             # Gather financial summary for LLM prompt
-            recent_transactions_df = transactions_df[transactions_df["Date"] >= (datetime.now().date() - pd.DateOffset(days=30))]
-            
-            total_income_llm = recent_transactions_df[recent_transactions_df["Type"] == "Income"]["Amount"].sum()
-            total_expenses_llm = recent_transactions_df[recent_transactions_df["Type"] == "Expense"]["Amount"].sum()
-            
-            spending_by_category_llm = recent_transactions_df[recent_transactions_df["Type"] == "Expense"].groupby("Category")["Amount"].sum().reset_index()
+            recent_start = datetime.now().date() - timedelta(days=30)
+            total_income_llm = data.category_totals("Income", recent_start)["Amount"].sum()
+            spending_by_category_llm = data.category_totals("Expense", recent_start)
+            total_expenses_llm = spending_by_category_llm["Amount"].sum()
+
             spending_summary = ""
             if not spending_by_category_llm.empty:
-                total_recent_expenses = spending_by_category_llm["Amount"].sum()
-                for _, row in spending_by_category_llm.iterrows():
-                    percentage = (row['Amount'] / total_recent_expenses * 100) if total_recent_expenses > 0 else 0
-                    spending_summary += f"- {row['Category']}: ₹{paisa_to_display(row['Amount']):,.2f} ({percentage:.0f}%)\n"
+                for row in spending_by_category_llm.itertuples(index=False):
+                    percentage = (row.Amount / total_expenses_llm * 100) if total_expenses_llm > 0 else 0
+                    spending_summary += f"- {row.Category}: ₹{paisa_to_display(row.Amount):,.2f} ({percentage:.0f}%)\n"
 
             llm_prompt = f"""
             As a friendly financial assistant, analyze the following financial summary and provide 3-5 actionable, personalized recommendations. The user is trying to improve their financial health.
@@ -440,36 +461,24 @@ elif page == "Data Management":
     st.markdown("<h1 class='main-header'>Data Management</h1>", unsafe_allow_html=True)
 
     st.subheader("Export Data")
-    export_format = st.selectbox("Select Export Format", ["CSV", "JSON"])
+    export_format = st.selectbox("Select Export Format", ["CSV", "JSON Lines"])
+    export_partition = st.selectbox("Split Into Files By", ["None", "Month", "Year"])
+    export_range = st.date_input("Date Range (leave as is to export everything)", value=())
+    export_compress = st.checkbox("Compress with gzip")
     if st.button("Export"):
-        os.makedirs(EXPORTS_DIR, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Export Transactions
-        transactions_export_df = transactions_df.copy()
-        transactions_export_df["Amount"] = transactions_export_df["Amount"].apply(paisa_to_display) # Convert to display format for export
-        
-        if export_format == "CSV":
-            transactions_export_path = os.path.join(EXPORTS_DIR, f"transactions_export_{timestamp}.csv")
-            transactions_export_df.to_csv(transactions_export_path, index=False)
-            st.success(f"Transactions exported to {transactions_export_path}")
-        else: # JSON
-            transactions_export_path = os.path.join(EXPORTS_DIR, f"transactions_export_{timestamp}.json")
-            transactions_export_df.to_json(transactions_export_path, orient="records", indent=4)
-            st.success(f"Transactions exported to {transactions_export_path}")
-
-        # Export Budgets
-        budgets_export_df = budgets_df.copy()
-        budgets_export_df["Budget"] = budgets_export_df["Budget"].apply(paisa_to_display) # Convert to display format for export
-
-        if export_format == "CSV":
-            budgets_export_path = os.path.join(EXPORTS_DIR, f"budgets_export_{timestamp}.csv")
-            budgets_export_df.to_csv(budgets_export_path, index=False)
-            st.success(f"Budgets exported to {budgets_export_path}")
-        else: # JSON
-            budgets_export_path = os.path.join(EXPORTS_DIR, f"budgets_export_{timestamp}.json")
-            budgets_export_df.to_json(budgets_export_path, orient="records", indent=4)
-            st.success(f"Budgets exported to {budgets_export_path}")
+        format = "csv" if export_format == "CSV" else "jsonl"
+        start, end = (datetime.combine(day, datetime.min.time()) for day in export_range) if len(export_range) == 2 else (None, None)
+
+        # Streamed straight from storage, with amounts in display units
+        report = export_transactions(
+            EXPORTS_DIR, f"transactions_export_{timestamp}", format, export_compress, start, end,
+            partition=None if export_partition == "None" else export_partition.lower(), display_amounts=True,
+        )
+        st.success(f"{report.rows} transactions exported to {', '.join(report.paths)}")
+
+        budgets_export_path = export_budgets(EXPORTS_DIR, f"budgets_export_{timestamp}", format, export_compress, display_amounts=True)
+        st.success(f"Budgets exported to {budgets_export_path}")
 
     st.subheader("Import Data (Placeholder)")
     st.info("Import functionality is a placeholder. You can upload CSV/JSON files here for future implementation.")
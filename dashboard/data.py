@@ -0,0 +1,465 @@
+import os
+import threading
+from collections import OrderedDict
+from functools import cached_property
+from io import BytesIO
+import numpy as np
+import pandas as pd
+import streamlit as st
+from pandas.api.types import union_categoricals
+from features.storage.storage import SQLITE_FILE, TRANSACTIONS_FILE, TextStorage, direct_storage, get_storage
+from features.data_management.parquet import (
+    PARQUET_SNAPSHOT_FILE, available as parquet_available, ensure_parquet_snapshot, pa, read_transactions_frame, snapshot_source,
+)
+
+# Constants
+COLUMNS = ["Date", "Type", "Category", "Description", "Amount"]
+RECENT_ROWS = 10
+SELECTION_CACHE_SIZE = 16
+ROLLUP_FREQUENCIES = {"daily": "D", "weekly": "W", "monthly": "MS"}
+TREND_SERIES = ("Income", "Expense", "Balance")
+MAX_CHART_POINTS = 2000  # per series sent to the browser
+CHART_CACHE_SIZE = 32
+LIVE_POLL_SECONDS = 2
+TAIL_CHECK_BYTES = 64
+
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def data_signature():
+    """
+    Size and mtime of every file a storage backend keeps transactions in; the cached data is keyed on it.
+    """
+    return tuple(_file_signature(path) for path in (TRANSACTIONS_FILE, SQLITE_FILE, SQLITE_FILE + "-wal"))
+
+
+def lttb(y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling of an evenly spaced series:
+    returns the indices of at most `threshold` points that keep its visual
+    shape. The first and last points are always kept; from every bucket in
+    between the point forming the largest triangle with the previously kept
+    point and the average of the next bucket is chosen.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    keep = np.empty(threshold, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        low, high = edges[bucket], edges[bucket + 1]
+        next_low, next_high = (edges[bucket + 1], edges[bucket + 2]) if bucket + 2 < len(edges) else (n - 1, n)
+        next_x = (next_low + next_high - 1) / 2
+        next_y = y[next_low:next_high].mean()
+        xs = np.arange(low, high)
+        areas = np.abs((a - next_x) * (y[low:high] - y[a]) - (a - xs) * (next_y - y[a]))
+        a = low + int(areas.argmax())
+        keep[bucket + 1] = a
+    return keep
+
+
+def _normalize(frame):
+    """
+    Gives a freshly read frame the dashboard's dtypes: datetime64 dates, categorical type and category, int64 amounts.
+    """
+    frame["Date"] = pd.to_datetime(frame["Date"], format="%Y-%m-%d")
+    frame["Type"] = frame["Type"].astype("category")
+    frame["Category"] = frame["Category"].astype("category")
+    frame["Amount"] = frame["Amount"].astype("int64")
+    return frame
+
+
+def _empty_frame():
+    return _normalize(pd.DataFrame({column: [] for column in COLUMNS}))
+
+
+def _read_csv(source):
+    """
+    Parses ledger lines from a path or file object with pandas' C CSV parser.
+    """
+    # Ledger lines are unquoted and headerless; descriptions never contain commas.
+    return _normalize(pd.read_csv(
+        source, header=None, names=COLUMNS, quoting=3, keep_default_na=False,
+        dtype={"Date": str, "Type": str, "Category": str, "Description": str, "Amount": "int64"},
+    ))
+
+
+def _contiguous_strings(series):
+    """
+    Returns Arrow-backed strings as a single chunk; taking a few rows from a
+    chunked column would otherwise copy the whole column.
+    """
+    if pa is None:
+        return series
+    array = pa.array(series)
+    if not isinstance(array, pa.ChunkedArray) or array.num_chunks < 2:
+        return series
+    return pd.Series(pd.array(array.combine_chunks(), dtype=series.dtype), index=series.index)
+
+
+def read_transactions():
+    """
+    Parses every transaction into a DataFrame with vectorized readers: the Parquet
+    snapshot of the text ledger when pyarrow is available, pandas' C CSV parser
+    otherwise, and the storage backend's rows for SQLite.
+    """
+    if isinstance(direct_storage(), TextStorage):
+        if not os.path.exists(TRANSACTIONS_FILE) or not os.path.getsize(TRANSACTIONS_FILE):
+            return _empty_frame()
+        if parquet_available():
+            return read_transactions_frame(ensure_parquet_snapshot(TRANSACTIONS_FILE))
+        return _read_csv(TRANSACTIONS_FILE)
+    rows = [
+        (t["date"], t["type"], t["category"], t["description"], t["amount"])
+        for t in get_storage().iter_transactions()
+    ]
+    return _normalize(pd.DataFrame.from_records(rows, columns=COLUMNS))
+
+
+def _group_daily(frame):
+    return frame.groupby(["Date", "Type", "Category"], observed=True)["Amount"].sum().reset_index()
+
+
+class DashboardData:
+    """
+    One parse of the ledger plus the aggregate table every page draws from.
+
+    `daily` holds the amount per (Date, Type, Category), sorted by date, so page
+    totals, category breakdowns and month comparisons slice a table of at most
+    days × categories rows instead of filtering every transaction. The instance
+    is shared by all sessions until the ledger changes; treat its frames as read-only.
+    """
+
+    def __init__(self, transactions, daily=None, version=0):
+        self.transactions = transactions
+        self.daily = daily if daily is not None else _group_daily(transactions)
+        self.version = version
+        self._selections = OrderedDict()
+        self._rollups = {}
+        self._charts = OrderedDict()
+
+    def extend(self, rows, version=0):
+        """
+        Returns a DashboardData that also holds `rows`, freshly appended to the
+        ledger. The aggregate table takes the new rows' groupby folded into the
+        existing one instead of regrouping every transaction; the other derived
+        tables are rebuilt lazily from it.
+        """
+        rows = rows.astype({"Date": self.transactions["Date"].dtype})
+        transactions = pd.concat([self.transactions, rows], ignore_index=True)
+        for column in ("Type", "Category"):
+            transactions[column] = union_categoricals([self.transactions[column], rows[column]])
+        transactions["Description"] = _contiguous_strings(transactions["Description"])
+        daily = pd.concat([self.daily, _group_daily(rows)], ignore_index=True)
+        daily = _group_daily(daily.astype({"Type": "category", "Category": "category"}))
+        return DashboardData(transactions, daily, version)
+
+    @property
+    def empty(self):
+        return self.transactions.empty
+
+    @property
+    def first_date(self):
+        return self.daily["Date"].iloc[0].date() if len(self.daily) else None
+
+    @property
+    def last_date(self):
+        return self.daily["Date"].iloc[-1].date() if len(self.daily) else None
+
+    def daily_range(self, start=None, end=None):
+        """
+        Rows of the aggregate table dated within the inclusive range (open ends allowed), found by binary search.
+        """
+        dates = self.daily["Date"]
+        low = dates.searchsorted(pd.Timestamp(start)) if start else 0
+        high = dates.searchsorted(pd.Timestamp(end), side="right") if end else len(dates)
+        return self.daily.iloc[low:high]
+
+    def category_totals(self, type, start=None, end=None):
+        """
+        Returns a Category/Amount frame for one transaction type, largest first.
+        """
+        rows = self.daily_range(start, end)
+        rows = rows[rows["Type"] == type]
+        totals = rows.groupby("Category", observed=True)["Amount"].sum()
+        return totals[totals != 0].sort_values(ascending=False).reset_index()
+
+    def totals(self, start=None, end=None):
+        """
+        Returns {type: {category: amount}} for the range, like Storage.totals.
+        """
+        totals = {}
+        sums = self.daily_range(start, end).groupby(["Type", "Category"], observed=True)["Amount"].sum()
+        for (type, category), amount in sums.items():
+            if amount:
+                totals.setdefault(type, {})[category] = int(amount)
+        return totals
+
+    @cached_property
+    def date_order(self):
+        """
+        Row positions in date order (ledger order within a day). The ledger is
+        normally kept in date order already, in which case no sort is needed.
+        """
+        dates = self.transactions["Date"].to_numpy()
+        if len(dates) < 2 or (dates[1:] >= dates[:-1]).all():
+            return np.arange(len(dates))
+        return np.argsort(dates, kind="stable")
+
+    @cached_property
+    def sorted_dates(self):
+        return self.transactions["Date"].to_numpy()[self.date_order]
+
+    def select(self, start=None, end=None, types=(), categories=(), text="", min_amount=None, max_amount=None, sort="newest"):
+        """
+        Returns the positions of the rows matching every filter, in the requested
+        order. The date range is a binary search over the date-ordered positions;
+        the other filters only look at the rows in that range. Results are kept for
+        the last SELECTION_CACHE_SIZE filter combinations, so paging through one
+        costs only the rows shown.
+        """
+        key = (start, end, tuple(types), tuple(categories), text, min_amount, max_amount, sort)
+        positions = self._selections.get(key)
+        if positions is not None:
+            self._selections.move_to_end(key)
+            return positions
+
+        dates = self.sorted_dates
+        low = dates.searchsorted(np.datetime64(start, "D")) if start else 0
+        high = dates.searchsorted(np.datetime64(end, "D") + 1) if end else len(dates)
+        positions = self.date_order[low:high]
+        frame = self.transactions
+        for column, names in (("Type", types), ("Category", categories)):
+            if names:
+                wanted = [code for code, name in enumerate(frame[column].cat.categories) if name in names]
+                positions = positions[np.isin(frame[column].cat.codes.to_numpy()[positions], wanted)]
+        amounts = frame["Amount"].to_numpy()
+        if min_amount is not None:
+            positions = positions[amounts[positions] >= min_amount]
+        if max_amount is not None:
+            positions = positions[amounts[positions] <= max_amount]
+        if text:
+            descriptions = frame["Description"].take(positions)
+            positions = positions[descriptions.str.contains(text, case=False, regex=False).to_numpy(dtype=bool)]
+
+        if sort == "newest":
+            positions = positions[::-1]
+        elif sort == "largest":
+            positions = positions[np.argsort(-amounts[positions], kind="stable")]
+        elif sort == "smallest":
+            positions = positions[np.argsort(amounts[positions], kind="stable")]
+        elif sort != "oldest":
+            raise ValueError(f"Unknown sort order {sort!r}")
+
+        self._selections[key] = positions
+        if len(self._selections) > SELECTION_CACHE_SIZE:
+            self._selections.popitem(last=False)
+        return positions
+
+    def window(self, positions, page, page_size):
+        """
+        Returns the rows of one page of a selection as a frame; only these rows are ever formatted.
+        """
+        return self.transactions.take(positions[page * page_size:(page + 1) * page_size])
+
+    @cached_property
+    def daily_flows(self):
+        """
+        Income and expense per calendar day, days without transactions filled with zero.
+        """
+        income = (self.daily["Type"].astype(str).str.lower() == "income").to_numpy()
+        amounts = self.daily["Amount"].to_numpy()
+        flows = pd.DataFrame({
+            "Date": self.daily["Date"],
+            "Income": np.where(income, amounts, 0),
+            "Expense": np.where(income, 0, amounts),
+        }).groupby("Date").sum()
+        return flows.asfreq("D", fill_value=0) if len(flows) else flows
+
+    def rollup(self, frequency):
+        """
+        Income, Expense and running Balance per day, week or month, built once
+        from the daily aggregate table and kept until the ledger changes.
+        """
+        rollup = self._rollups.get(frequency)
+        if rollup is None:
+            flows = self.daily_flows
+            if frequency != "daily" and len(flows):
+                flows = flows.resample(ROLLUP_FREQUENCIES[frequency]).sum()
+            rollup = flows.assign(Balance=(flows["Income"] - flows["Expense"]).cumsum())
+            self._rollups[frequency] = rollup
+        return rollup
+
+    def trend_chart(self, frequency, start=None, end=None, max_points=MAX_CHART_POINTS):
+        """
+        Returns the trend chart payload for one zoom level and date range as a long
+        Date/Series/Amount frame, each series downsampled with LTTB to at most
+        max_points points, plus the number of periods in the range. Payloads are
+        kept for the last CHART_CACHE_SIZE requests.
+        """
+        key = (frequency, start, end, max_points)
+        chart = self._charts.get(key)
+        if chart is not None:
+            self._charts.move_to_end(key)
+            return chart
+
+        rollup = self.rollup(frequency)
+        if len(rollup):
+            rollup = rollup.loc[pd.Timestamp(start) if start else None:pd.Timestamp(end) if end else None]
+        parts = []
+        for series in TREND_SERIES:
+            values = rollup[series].to_numpy()
+            keep = lttb(values, max_points)
+            parts.append(pd.DataFrame({"Date": rollup.index[keep], "Series": series, "Amount": values[keep]}))
+        chart = pd.concat(parts, ignore_index=True), len(rollup)
+
+        self._charts[key] = chart
+        if len(self._charts) > CHART_CACHE_SIZE:
+            self._charts.popitem(last=False)
+        return chart
+
+    @cached_property
+    def recent(self):
+        """
+        The newest transactions; among rows of the same date the later ones in the ledger win.
+        """
+        return self.transactions.nlargest(RECENT_ROWS, "Date", keep="last")
+
+
+class LiveLedger:
+    """
+    Keeps one DashboardData in step with the ledger, shared by every session.
+
+    refresh() stats the text ledger. While its inode is unchanged and it has only
+    grown (the bytes just before the stored offset are still the same), only the
+    complete lines past the offset are read, parsed and folded into the cached
+    frame and aggregate table. A shrink, a new inode (the ledger was rewritten
+    and renamed into place) or changed bytes before the offset trigger a full
+    reload. Other backends are reloaded whenever their files change size or
+    mtime. Each change gets a new DashboardData with a higher version, so a
+    session can tell that what it rendered is out of date.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.data = None
+        self.version = 0
+        self._stat_key = None
+        self._signature = None
+        self._offset = 0
+        self._tail = b""
+
+    def refresh(self):
+        """
+        Brings the shared data up to date and returns it.
+        """
+        with self._lock:
+            if not isinstance(direct_storage(), TextStorage):
+                signature = data_signature()
+                if self.data is None or signature != self._signature:
+                    self.version += 1
+                    self.data = DashboardData(read_transactions(), version=self.version)
+                    self._signature = signature
+                    self._stat_key = None
+                return self.data
+
+            try:
+                stat = os.stat(TRANSACTIONS_FILE)
+            except FileNotFoundError:
+                stat = None
+            stat_key = stat and (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if self.data is not None and stat_key == self._stat_key:
+                return self.data
+
+            if stat is None:
+                self._set_full(_empty_frame(), 0, b"")
+            elif self._stat_key and stat.st_ino == self._stat_key[0] and stat.st_size >= self._offset and self._tail_unchanged():
+                self._read_appended(stat.st_size)
+            else:
+                self._full_reload()
+            self._stat_key = stat_key
+            self._signature = None
+            return self.data
+
+    def _set_full(self, frame, offset, tail):
+        self.version += 1
+        self.data = DashboardData(frame, version=self.version)
+        self._offset = offset
+        self._tail = tail
+
+    def _tail_unchanged(self):
+        with open(TRANSACTIONS_FILE, "rb") as f:
+            f.seek(self._offset - len(self._tail))
+            return f.read(len(self._tail)) == self._tail
+
+    def _read_appended(self, size):
+        """
+        Parses the complete lines written past the offset and folds them into the data.
+        """
+        with open(TRANSACTIONS_FILE, "rb") as f:
+            f.seek(self._offset)
+            block = f.read(size - self._offset)
+        end = block.rfind(b"\n") + 1
+        if not block[:end].strip():
+            return
+        self.version += 1
+        self.data = self.data.extend(_read_csv(BytesIO(block[:end])), self.version)
+        self._offset += end
+        self._tail = (self._tail + block[:end])[-TAIL_CHECK_BYTES:]
+
+    def _full_reload(self):
+        """
+        Reads the whole ledger: from its Parquet snapshot when that was written
+        from exactly the bytes on disk, otherwise by parsing the text up to its last complete line.
+        """
+        before = os.stat(TRANSACTIONS_FILE)
+        if parquet_available() and before.st_size:
+            frame = read_transactions_frame(ensure_parquet_snapshot(TRANSACTIONS_FILE))
+            after = os.stat(TRANSACTIONS_FILE)
+            source = snapshot_source(PARQUET_SNAPSHOT_FILE)
+            if source == [before.st_size, before.st_mtime_ns] and (after.st_ino, after.st_size) == (before.st_ino, before.st_size):
+                with open(TRANSACTIONS_FILE, "rb") as f:
+                    f.seek(max(0, before.st_size - TAIL_CHECK_BYTES))
+                    tail = f.read(before.st_size - f.tell())
+                if not tail or tail.endswith(b"\n"):
+                    self._set_full(frame, before.st_size, tail)
+                    return
+        with open(TRANSACTIONS_FILE, "rb") as f:
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        frame = _read_csv(BytesIO(data[:end])) if data[:end].strip() else _empty_frame()
+        self._set_full(frame, end, data[:end][-TAIL_CHECK_BYTES:])
+
+
+@st.cache_resource
+def live_ledger():
+    return LiveLedger()
+
+
+def load_dashboard_data():
+    """
+    Returns the DashboardData for the ledger as it is now. Appends since the
+    last call are read incrementally; while nothing changed, every rerun and
+    session gets the same instance without reading anything.
+    """
+    return live_ledger().refresh()
+
+
+def budget_status(budgets_df, expense_totals):
+    """
+    Adds Spent, Remaining and Used (percent of the budget) columns to a Category/Budget frame.
+    """
+    status = budgets_df.copy()
+    status["Spent"] = status["Category"].map(expense_totals).fillna(0).astype("int64")
+    status["Remaining"] = status["Budget"] - status["Spent"]
+    status["Used"] = (status["Spent"] / status["Budget"].where(status["Budget"] > 0) * 100).fillna(0)
+    return status
@@ -0,0 +1,366 @@
+import questionary
+import numpy as np
+from datetime import date, datetime
+from rich.console import Console
+from rich.panel import Panel
+from rich.table import Table
+from features.budgets.budgets import load_budgets
+from features.storage.storage import get_storage
+from features.transactions.daily_totals import day_number
+
+# Constants
+STABILITY_MONTHS = 6       # months of income compared for income stability
+TREND_MONTHS = 3
+TARGET_SAVINGS_RATE = 0.20
+BAR_WIDTH = 30
+
+console = Console()
+
+
+class TotalsMatrix:
+    """
+    NumPy view of a DailyTotals table: a (days + 1) x cells int64 matrix of
+    running totals, an income flag per (type, category) cell and the cell's
+    category code. Every metric below is a few row differences over it, so its
+    cost depends on the number of cells and months asked for, not on the ledger size.
+    """
+
+    def __init__(self, daily_totals):
+        width = len(daily_totals.cells)
+        self.first_day = daily_totals.first_day
+        self.days = daily_totals.days
+        self.prefix = np.frombuffer(daily_totals.sums, dtype=np.int64).reshape(daily_totals.days + 1, width)
+        self.is_income = np.array([type.lower() == "income" for type, _category in daily_totals.cells], dtype=bool)
+        self.category_names = sorted({category for _type, category in daily_totals.cells})
+        self.categories = np.array(
+            [self.category_names.index(category) for _type, category in daily_totals.cells], dtype=np.intp
+        )
+
+    def rows(self, days):
+        """
+        Table rows holding the running totals just before each day number.
+        """
+        return np.clip(np.asarray(days) - self.first_day, 0, self.days)
+
+    def range_sums(self, first_day, last_day):
+        """
+        Per-cell totals for the inclusive day range.
+        """
+        low, high = self.rows([first_day, last_day + 1])
+        return self.prefix[high] - self.prefix[low]
+
+
+def load_daily_totals(storage=None):
+    """
+    Returns the DailyTotals of the stored transactions. The text backend keeps its
+    table up to date on every append, the daemon sends its own table and other
+    backends sum their rows up (see Storage.daily_totals).
+    """
+    return (storage or get_storage()).daily_totals()
+
+
+def load_totals_matrix(storage=None):
+    return TotalsMatrix(load_daily_totals(storage))
+
+
+def month_number(day):
+    """
+    Months since January 1970 for a date.
+    """
+    return (day.year - 1970) * 12 + day.month - 1
+
+
+def month_start(month):
+    return date(1970 + month // 12, month % 12 + 1, 1)
+
+
+def month_label(month):
+    return month_start(month).strftime("%Y-%m")
+
+
+def monthly_totals(matrix, first_month, last_month):
+    """
+    Returns (income, expense) int64 arrays with one entry per month from first_month to last_month.
+    """
+    boundaries = np.arange(first_month, last_month + 2).astype("datetime64[M]").astype("datetime64[D]").astype(np.int64)
+    by_month = np.diff(matrix.prefix[matrix.rows(boundaries)], axis=0)
+    return by_month[:, matrix.is_income].sum(axis=1), by_month[:, ~matrix.is_income].sum(axis=1)
+
+
+def category_breakdown(matrix, month, income=False):
+    """
+    Returns [(category, amount, share)] for one month's expenses (or income), largest first.
+    """
+    first_day = day_number(month_start(month))
+    sums = matrix.range_sums(first_day, day_number(month_start(month + 1)) - 1)
+    cells = matrix.is_income if income else ~matrix.is_income
+    totals = np.bincount(matrix.categories[cells], weights=sums[cells], minlength=len(matrix.category_names))
+    grand_total = totals.sum()
+    order = np.argsort(-totals, kind="stable")
+    return [
+        (matrix.category_names[code], int(totals[code]), float(totals[code] / grand_total))
+        for code in order if totals[code] > 0
+    ]
+
+
+def burn_rate(matrix, today):
+    """
+    Average daily spending so far this month, in paisa.
+    """
+    sums = matrix.range_sums(day_number(today.replace(day=1)), day_number(today))
+    return int(sums[~matrix.is_income].sum()) / today.day
+
+
+def compare_with_last_month(matrix, today):
+    """
+    Returns this month's and last month's income and expense totals with the percentage changes.
+    """
+    this_month = month_number(today)
+    income, expense = monthly_totals(matrix, this_month - 1, this_month)
+
+    def change(current, previous):
+        return (current - previous) / previous * 100 if previous else None
+
+    return {
+        "income": (int(income[1]), int(income[0]), change(income[1], income[0])),
+        "expense": (int(expense[1]), int(expense[0]), change(expense[1], expense[0])),
+    }
+
+
+def savings_trend(matrix, today, months=TREND_MONTHS):
+    """
+    Returns [(month, income, expense, savings, rate)] for the last complete months, oldest first.
+    """
+    last_month = month_number(today) - 1
+    first_month = last_month - months + 1
+    income, expense = monthly_totals(matrix, first_month, last_month)
+    savings = income - expense
+    rates = np.divide(savings, income, out=np.full(months, np.nan), where=income > 0)
+    return [
+        (month_label(first_month + i), int(income[i]), int(expense[i]), int(savings[i]), None if np.isnan(rates[i]) else float(rates[i]))
+        for i in range(months)
+    ]
+
+
+def income_stability(matrix, today, months=STABILITY_MONTHS):
+    """
+    Returns (coefficient of variation, label) for monthly income over the last complete months.
+    """
+    last_month = month_number(today) - 1
+    income, _expense = monthly_totals(matrix, last_month - months + 1, last_month)
+    mean = income.mean()
+    if mean == 0:
+        return None, "No income"
+    variation = float(income.std() / mean)
+    if variation < 0.15:
+        return variation, "Regular"
+    if variation < 0.35:
+        return variation, "Somewhat irregular"
+    return variation, "Irregular"
+
+
+def health_score(matrix, budgets, today):
+    """
+    Scores financial health from 0 to 100 as the spec lays out:
+    savings rate (30), budget adherence (25), income vs expenses (25) and debt
+    management (20). Debts are not tracked, so that factor rewards the share of
+    recent months in which spending stayed within income.
+    Returns (score, {factor: (points, maximum)}, [recommendations]).
+    """
+    trend = savings_trend(matrix, today)
+    income = sum(month[1] for month in trend)
+    expense = sum(month[2] for month in trend)
+    recommendations = []
+
+    savings_rate = (income - expense) / income if income else 0.0
+    savings_points = 30 * min(max(savings_rate / TARGET_SAVINGS_RATE, 0.0), 1.0)
+    if savings_rate < TARGET_SAVINGS_RATE:
+        recommendations.append(f"Aim to save at least {TARGET_SAVINGS_RATE:.0%} of your income; you saved {savings_rate:.0%} over the last {TREND_MONTHS} months.")
+
+    spent = dict((category, amount) for category, amount, _share in category_breakdown(matrix, month_number(today)))
+    if budgets:
+        within = sum(1 for category, budget in budgets.items() if spent.get(category, 0) <= budget)
+        budget_points = 25 * within / len(budgets)
+        over = [category for category, budget in budgets.items() if spent.get(category, 0) > budget]
+        if over:
+            recommendations.append(f"You are over budget this month on {', '.join(over)}.")
+    else:
+        budget_points = 0.0
+        recommendations.append("Set monthly budgets so your spending can be tracked against them.")
+
+    ratio = expense / income if income else float("inf")
+    balance_points = 25 * min(max((1.2 - ratio) / 0.4, 0.0), 1.0)
+    if not income:
+        recommendations.append(f"No income was recorded in the last {TREND_MONTHS} months.")
+    elif ratio > 0.8:
+        recommendations.append("Your expenses are taking up most of your income; look for categories to trim.")
+
+    months_within = sum(1 for month in trend if month[1] and month[2] <= month[1])
+    debt_points = 20 * months_within / len(trend)
+    if income and months_within < len(trend):
+        recommendations.append("Some recent months cost more than you earned; avoid covering the gap with debt.")
+
+    breakdown = {
+        "Savings rate": (savings_points, 30),
+        "Budget adherence": (budget_points, 25),
+        "Income vs expenses": (balance_points, 25),
+        "Debt management": (debt_points, 20),
+    }
+    return round(sum(points for points, _maximum in breakdown.values())), breakdown, recommendations
+
+
+def analyze(matrix, budgets, today):
+    """
+    Computes every analytics metric for the month containing `today`.
+    """
+    this_month = month_number(today)
+    return {
+        "burn_rate": burn_rate(matrix, today),
+        "spending": category_breakdown(matrix, this_month),
+        "income_sources": category_breakdown(matrix, this_month, income=True),
+        "comparison": compare_with_last_month(matrix, today),
+        "savings_trend": savings_trend(matrix, today),
+        "income_stability": income_stability(matrix, today),
+        "health": health_score(matrix, budgets, today),
+    }
+
+
+def _load():
+    try:
+        matrix = load_totals_matrix()
+    except Exception as e:
+        console.print(f"[bold red]Error reading transactions: {e}[/bold red]")
+        return None
+    if not matrix.days:
+        console.print("[bold yellow]No transactions found.[/bold yellow]")
+        return None
+    return analyze(matrix, load_budgets(), datetime.now().date())
+
+
+def _change_text(change):
+    if change is None:
+        return "no data last month"
+    color = "red" if change > 0 else "green"
+    return f"[{color}]{'Up' if change > 0 else 'Down'} {abs(change):.1f}%[/{color}]"
+
+
+def _bar_chart(rows):
+    """
+    ASCII bar chart of (label, amount, share) rows.
+    """
+    table = Table(show_header=False, box=None)
+    table.add_column("Category", style="cyan")
+    table.add_column("Bar", style="magenta")
+    table.add_column("Amount", justify="right")
+    for category, amount, share in rows:
+        table.add_row(category, "█" * max(1, round(share * BAR_WIDTH)) + f" {share:.0%}", f"{amount/100:.2f}")
+    return table
+
+
+def display_spending_analysis(report):
+    console.print(Panel("[bold blue]Spending Analysis[/bold blue]", expand=False))
+    if report["spending"]:
+        console.print("Spending by Category (this month):")
+        console.print(_bar_chart(report["spending"]))
+        top = ", ".join(category for category, _amount, _share in report["spending"][:3])
+        console.print(f"Top categories: [bold]{top}[/bold]")
+    else:
+        console.print("[bold yellow]No expenses recorded this month.[/bold yellow]")
+    console.print(f"Average daily expense (burn rate): [red]{report['burn_rate']/100:.2f}[/red]")
+    current, previous, change = report["comparison"]["expense"]
+    console.print(f"Spending this month: {current/100:.2f} vs last month: {previous/100:.2f} ({_change_text(change)})")
+
+
+def display_income_analysis(report):
+    console.print(Panel("[bold blue]Income Analysis[/bold blue]", expand=False))
+    if report["income_sources"]:
+        console.print("Income by Source (this month):")
+        console.print(_bar_chart(report["income_sources"]))
+    else:
+        console.print("[bold yellow]No income recorded this month.[/bold yellow]")
+    current, previous, change = report["comparison"]["income"]
+    console.print(f"Income this month: [green]{current/100:.2f}[/green] vs last month: {previous/100:.2f} ({_change_text(change)})")
+    variation, label = report["income_stability"]
+    detail = f" (monthly variation {variation:.0%})" if variation is not None else ""
+    console.print(f"Income stability over the last {STABILITY_MONTHS} months: [bold]{label}[/bold]{detail}")
+
+
+def display_savings_analysis(report):
+    console.print(Panel("[bold blue]Savings Analysis[/bold blue]", expand=False))
+    table = Table(title=f"Savings, Last {TREND_MONTHS} Months")
+    table.add_column("Month", style="cyan")
+    table.add_column("Income", justify="right", style="green")
+    table.add_column("Expense", justify="right", style="red")
+    table.add_column("Savings", justify="right", style="bold")
+    table.add_column("Rate", justify="right", style="magenta")
+    for month, income, expense, savings, rate in report["savings_trend"]:
+        table.add_row(month, f"{income/100:.2f}", f"{expense/100:.2f}", f"{savings/100:.2f}", "N/A" if rate is None else f"{rate:.1%}")
+    console.print(table)
+    savings = [month[3] for month in report["savings_trend"]]
+    if savings[-1] > savings[0]:
+        console.print("Savings trend: [green]Up[/green]")
+    elif savings[-1] < savings[0]:
+        console.print("Savings trend: [red]Down[/red]")
+    else:
+        console.print("Savings trend: Flat")
+
+
+def display_health_score(report):
+    console.print(Panel("[bold blue]Financial Health Score[/bold blue]", expand=False))
+    score, breakdown, recommendations = report["health"]
+    if score >= 80:
+        verdict = "[green]Excellent[/green]"
+    elif score >= 60:
+        verdict = "[yellow]Good[/yellow]"
+    elif score >= 40:
+        verdict = "[yellow]Fair[/yellow]"
+    else:
+        verdict = "[red]Needs attention[/red]"
+    console.print(f"Overall score: [bold]{score}/100[/bold] - {verdict}")
+
+    table = Table(title="Score Breakdown")
+    table.add_column("Factor", style="cyan")
+    table.add_column("Points", justify="right", style="magenta")
+    for factor, (points, maximum) in breakdown.items():
+        table.add_row(factor, f"{points:.0f}/{maximum}")
+    console.print(table)
+
+    for recommendation in recommendations:
+        console.print(f"- {recommendation}")
+
+
+def display_financial_analytics_menu():
+    """
+    Displays the financial analytics menu and handles user choices.
+    """
+    choice = questionary.select(
+        "Financial Analytics Menu:",
+        choices=[
+            "Spending Analysis",
+            "Income Analysis",
+            "Savings Analysis",
+            "Financial Health Score",
+            "Full Report",
+            "Back to Main Menu"
+        ]
+    ).ask()
+
+    if choice is None or choice == "Back to Main Menu":
+        return
+    report = _load()
+    if report is None:
+        return
+
+    if choice == "Spending Analysis":
+        display_spending_analysis(report)
+    elif choice == "Income Analysis":
+        display_income_analysis(report)
+    elif choice == "Savings Analysis":
+        display_savings_analysis(report)
+    elif choice == "Financial Health Score":
+        display_health_score(report)
+    elif choice == "Full Report":
+        display_spending_analysis(report)
+        display_income_analysis(report)
+        display_savings_analysis(report)
+        display_health_score(report)
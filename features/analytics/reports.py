@@ -0,0 +1,346 @@
+import heapq
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from hashlib import blake2b
+from html import escape
+from features.analytics.analytics import load_daily_totals, month_label, month_number
+from features.storage.storage import TRANSACTIONS_FILE, DaemonStorage, SQLiteStorage, TextStorage, get_storage, month_bounds
+
+# Constants
+REPORTS_DIR = "exports/reports"
+MANIFEST_NAME = "manifest.json"
+REPORT_FORMATS = ("md", "html")
+REPORT_VERSION = 1      # bump when the report layout changes so every month is rendered again
+TREND_MONTHS = 3
+TOP_TRANSACTIONS = 5
+REPORT_WORKERS = None   # None means one worker per CPU
+
+# Filled in each worker process by _init_worker: {month: {type: {category: amount}}}, the budgets and the storage backend.
+_shared = {}
+
+
+def _is_income(type):
+    return type.lower() == "income"
+
+
+def _split_totals(totals):
+    """
+    Folds {type: {category: amount}} into separate income and expense {category: amount} tables.
+    """
+    income, expense = {}, {}
+    for type, categories in totals.items():
+        target = income if _is_income(type) else expense
+        for category, amount in categories.items():
+            target[category] = target.get(category, 0) + amount
+    return income, expense
+
+
+def monthly_totals(storage=None):
+    """
+    Returns {"YYYY-MM": {type: {category: amount}}} for every month holding transactions,
+    read from the daily totals with two row lookups per month.
+    """
+    return load_daily_totals(storage).month_totals()
+
+
+def _previous_months(label, count):
+    """
+    Returns the labels of `count` months ending with `label`, oldest first.
+    """
+    month = month_number(date.fromisoformat(label + "-01"))
+    return [month_label(month - offset) for offset in range(count - 1, -1, -1)]
+
+
+def month_sizes(storage=None):
+    """
+    Returns {"YYYY-MM": [rows, bytes]} for every month holding transactions, from one pass over the ledger lines.
+    """
+    sizes = {}
+    for line in (storage or get_storage()).iter_lines():
+        size = sizes.setdefault(line[:7], [0, 0])
+        size[0] += 1
+        size[1] += len(line) + 1
+    return sizes
+
+
+def report_key(label, months, budgets, size=None):
+    """
+    Digest of everything a month's report is built from: the totals of the month
+    and the months before it that the trend looks at, the budgets, and the
+    month's row count and size.
+    """
+    inputs = {
+        "version": REPORT_VERSION,
+        "months": {month: months.get(month, {}) for month in _previous_months(label, TREND_MONTHS)},
+        "budgets": budgets,
+        "size": size,
+    }
+    return blake2b(json.dumps(inputs, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _top_expenses(label):
+    """
+    The month's largest expenses as (date, category, description, amount) tuples.
+    """
+    year, month = int(label[:4]), int(label[5:])
+    rows = []
+    for line in _shared["storage"].iter_lines(*month_bounds(year, month)):
+        date_str, type, category, description, amount = line.split(",")
+        if not _is_income(type):
+            rows.append((date_str, category, description, int(amount)))
+    return heapq.nlargest(TOP_TRANSACTIONS, rows, key=lambda row: row[3])
+
+
+def build_report(label, months, budgets, top_expenses):
+    """
+    Collects the numbers of one monthly report as a dict.
+    """
+    trend = []
+    for month in _previous_months(label, TREND_MONTHS):
+        income, expense = _split_totals(months.get(month, {}))
+        trend.append((month, sum(income.values()), sum(expense.values())))
+    income, expense = _split_totals(months[label])
+    total_income = sum(income.values())
+    total_expense = sum(expense.values())
+    previous_income, previous_expense = trend[-2][1], trend[-2][2]
+    return {
+        "month": label,
+        "income": total_income,
+        "expense": total_expense,
+        "savings": total_income - total_expense,
+        "savings_rate": (total_income - total_expense) / total_income if total_income else None,
+        "income_by_category": sorted(income.items(), key=lambda item: -item[1]),
+        "expense_by_category": sorted(expense.items(), key=lambda item: -item[1]),
+        "budgets": [(category, budget, expense.get(category, 0)) for category, budget in sorted(budgets.items())],
+        "top_expenses": top_expenses,
+        "trend": trend,
+        "income_change": (total_income - previous_income) / previous_income * 100 if previous_income else None,
+        "expense_change": (total_expense - previous_expense) / previous_expense * 100 if previous_expense else None,
+        "projected_income": sum(month[1] for month in trend) // len(trend),
+        "projected_expense": sum(month[2] for month in trend) // len(trend),
+    }
+
+
+def _money(amount):
+    return f"{amount/100:,.2f}"
+
+
+def _percent(value):
+    return "N/A" if value is None else f"{value:.1f}%"
+
+
+def _sections(report):
+    """
+    The report as (heading, paragraphs, table header, table rows) sections shared by both renderers.
+    """
+    expense_total = report["expense"] or 1
+    income_total = report["income"] or 1
+    rate = None if report["savings_rate"] is None else report["savings_rate"] * 100
+    return [
+        ("Month Overview", [], ["", "Amount"], [
+            ["Income", _money(report["income"])],
+            ["Expenses", _money(report["expense"])],
+            ["Net savings", _money(report["savings"])],
+            ["Savings rate", _percent(rate)],
+        ]),
+        ("Income Summary", [], ["Category", "Amount", "Share"], [
+            [category, _money(amount), _percent(amount / income_total * 100)] for category, amount in report["income_by_category"]
+        ]),
+        ("Expense Summary", [], ["Category", "Amount", "Share"], [
+            [category, _money(amount), _percent(amount / expense_total * 100)] for category, amount in report["expense_by_category"]
+        ]),
+        ("Budget Performance", [] if report["budgets"] else ["No budgets set."], ["Category", "Budget", "Spent", "Remaining", "Status"], [
+            [category, _money(budget), _money(spent), _money(budget - spent), "Under Budget" if spent <= budget else "Over Budget"]
+            for category, budget, spent in report["budgets"]
+        ]),
+        ("Top Transactions", [], ["Date", "Category", "Description", "Amount"], [
+            [date_str, category, description, _money(amount)] for date_str, category, description, amount in report["top_expenses"]
+        ]),
+        ("Trends", [
+            f"Income vs last month: {_percent(report['income_change'])}",
+            f"Expenses vs last month: {_percent(report['expense_change'])}",
+        ], ["Month", "Income", "Expenses", "Savings"], [
+            [month, _money(income), _money(expense), _money(income - expense)] for month, income, expense in report["trend"]
+        ]),
+        ("Next Month Projection", [
+            f"Based on the average of the last {TREND_MONTHS} months: income {_money(report['projected_income'])}, "
+            f"expenses {_money(report['projected_expense'])}, savings {_money(report['projected_income'] - report['projected_expense'])}."
+        ], None, []),
+    ]
+
+
+def render_markdown(report):
+    lines = [f"# Monthly Report: {report['month']}", ""]
+    for heading, paragraphs, header, rows in _sections(report):
+        lines += [f"## {heading}", ""]
+        for paragraph in paragraphs:
+            lines += [paragraph, ""]
+        if header and rows:
+            lines.append("| " + " | ".join(header) + " |")
+            lines.append("|" + "|".join(" --- " for _ in header) + "|")
+            for row in rows:
+                lines.append("| " + " | ".join(str(cell).replace("|", "\\|") for cell in row) + " |")
+            lines.append("")
+    return "\n".join(lines)
+
+
+def render_html(report):
+    parts = [
+        "<!DOCTYPE html>",
+        f"<html><head><meta charset=\"utf-8\"><title>Monthly Report: {escape(report['month'])}</title></head><body>",
+        f"<h1>Monthly Report: {escape(report['month'])}</h1>",
+    ]
+    for heading, paragraphs, header, rows in _sections(report):
+        parts.append(f"<h2>{escape(heading)}</h2>")
+        for paragraph in paragraphs:
+            parts.append(f"<p>{escape(paragraph)}</p>")
+        if header and rows:
+            parts.append("<table><tr>" + "".join(f"<th>{escape(cell)}</th>" for cell in header) + "</tr>")
+            for row in rows:
+                parts.append("<tr>" + "".join(f"<td>{escape(str(cell))}</td>" for cell in row) + "</tr>")
+            parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+RENDERERS = {"md": render_markdown, "html": render_html}
+
+
+def report_path(label, format, directory=REPORTS_DIR):
+    return os.path.join(directory, f"{label}.{format}")
+
+
+def _backend(storage):
+    """
+    Describes a file backend so a worker process can open its own copy: ("sqlite", path) or ("text", None).
+    """
+    if isinstance(storage, SQLiteStorage):
+        return "sqlite", storage.path
+    return "text", None
+
+
+def _init_worker(months, budgets, backend):
+    kind, path = backend
+    _shared["months"] = months
+    _shared["budgets"] = budgets
+    _shared["storage"] = SQLiteStorage(path) if kind == "sqlite" else TextStorage()
+
+
+def _render_month(label, formats, directory):
+    """
+    Builds one month's report from the shared aggregates and writes it in each format. Runs in a worker.
+    """
+    report = build_report(label, _shared["months"], _shared["budgets"], _top_expenses(label))
+    paths = []
+    for format in formats:
+        path = report_path(label, format, directory)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(RENDERERS[format](report))
+        os.replace(path + ".tmp", path)
+        paths.append(path)
+    return label, paths
+
+
+def _load_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _save_manifest(manifest, directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    with open(path + ".tmp", "w") as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+class ReportRun:
+    """
+    Counts from one batch of report generation.
+    """
+
+    def __init__(self):
+        self.months = 0
+        self.written = []
+        self.skipped = 0
+        self.seconds = 0.0
+
+
+def generate_reports(year=None, formats=REPORT_FORMATS, directory=REPORTS_DIR, workers=REPORT_WORKERS, storage=None, on_progress=None):
+    """
+    Writes a Markdown and/or HTML report for every month with transactions (or
+    only those of `year`) into `directory`.
+
+    The monthly totals are computed once from the daily totals and handed to a
+    process pool, where each worker builds and renders whole months, reading
+    their top transactions from its own handle on the same storage backend, so
+    wall time falls with the number of cores. Through the ledger daemon the
+    months are rendered in this process over its one connection. A manifest keeps the digest of each
+    report's inputs (see report_key); months whose digest and files are
+    unchanged since the last run are skipped. on_progress(done, total) is called
+    as each rendered month finishes. Returns a ReportRun.
+    """
+    for format in formats:
+        if format not in RENDERERS:
+            raise ValueError(f"Unknown report format {format!r}")
+    storage = storage or get_storage()
+    started = time.perf_counter()
+    run = ReportRun()
+    os.makedirs(directory, exist_ok=True)
+
+    months = monthly_totals(storage)
+    budgets = storage.load_budgets()
+    sizes = month_sizes(storage)
+    # Bring the date order up to date here, before any worker starts, so the workers only ever read it.
+    if isinstance(storage, TextStorage) and os.path.exists(TRANSACTIONS_FILE):
+        storage.date_order()
+    manifest = _load_manifest(directory)
+
+    tasks = []
+    for label in sorted(months):
+        if year is not None and not label.startswith(f"{year}-"):
+            continue
+        key = report_key(label, months, budgets, sizes.get(label))
+        stale = [
+            format for format in formats
+            if manifest.get(f"{label}.{format}") != key or not os.path.exists(report_path(label, format, directory))
+        ]
+        if stale:
+            tasks.append((label, stale, key))
+        else:
+            run.skipped += 1
+
+    workers = workers or os.cpu_count() or 1
+    if isinstance(storage, DaemonStorage):
+        # Every read is answered by the daemon anyway; use this process's connection rather than one per worker.
+        workers = 1
+    pool = None
+    try:
+        if len(tasks) < 2 or workers == 1:
+            _shared.update(months=months, budgets=budgets, storage=storage)
+            results = (_render_month(label, stale, directory) for label, stale, _key in tasks)
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=min(workers, len(tasks)), initializer=_init_worker, initargs=(months, budgets, _backend(storage)),
+            )
+            results = pool.map(_render_month, *zip(*((label, stale, directory) for label, stale, _key in tasks)))
+        keys = {label: (stale, key) for label, stale, key in tasks}
+        for label, paths in results:
+            stale, key = keys[label]
+            for format in stale:
+                manifest[f"{label}.{format}"] = key
+            run.written.extend(paths)
+            run.months += 1
+            if on_progress:
+                on_progress(run.months, len(tasks))
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        _save_manifest(manifest, directory)
+    run.seconds = time.perf_counter() - started
+    return run
@@ -1,30 +1,21 @@
 import questionary
 from rich.console import Console
 from rich.table import Table
-from features.transactions.transactions import EXPENSE_CATEGORIES, load_transactions
+from features.storage.storage import get_storage
+from features.transactions.transactions import EXPENSE_CATEGORIES, load_totals, month_bounds
 from datetime import datetime
 
-# Constants
-BUDGETS_FILE = "database/budgets.txt"
-
 console = Console()
 
 def load_budgets():
     """
-    Reads all budgets from the file.
+    Reads all budgets from the configured storage backend.
     """
-    budgets = {}
     try:
-        with open(BUDGETS_FILE, "r") as f:
-            for line in f:
-                category, amount = line.strip().split(",")
-                budgets[category] = int(amount)
-    except FileNotFoundError:
-        return {}
+        return get_storage().load_budgets()
     except Exception as e:
         console.print(f"[bold red]Error reading budgets: {e}[/bold red]")
         return {}
-    return budgets
 
 def set_budget():
     """
@@ -44,15 +35,10 @@ def set_budget():
         console.print("[bold red]Invalid amount. Please enter a number.[/bold red]")
         return
 
-    budgets = load_budgets()
-    budgets[category] = amount
-
     try:
-        with open(BUDGETS_FILE, "w") as f:
-            for cat, amt in budgets.items():
-                f.write(f"{cat},{amt}\n")
+        get_storage().set_budget(category, amount)
         console.print(f"[bold green]Budget for {category} set to {amount/100:.2f}[/bold green]")
-    except IOError as e:
+    except Exception as e:
         console.print(f"[bold red]Error saving budget: {e}[/bold red]")
 
 def view_budgets():
@@ -64,17 +50,13 @@ def view_budgets():
         console.print("[bold yellow]No budgets set.[/bold yellow]")
         return
 
-    transactions = _get_transactions()
-    current_month = datetime.now().month
-    current_year = datetime.now().year
+    now = datetime.now()
+    totals = load_totals(*month_bounds(now.year, now.month))
 
     spent_by_category = {category: 0 for category in EXPENSE_CATEGORIES}
-    for transaction in transactions:
-        if transaction["date"].month == current_month and \
-           transaction["date"].year == current_year and \
-           transaction["type"] == "expense" and \
-           transaction["category"] in spent_by_category:
-            spent_by_category[transaction["category"]] += transaction["amount"]
+    for category, amount in totals.get("expense", {}).items():
+        if category in spent_by_category:
+            spent_by_category[category] += amount
 
     table = Table(title="Monthly Budgets")
     table.add_column("Category", style="cyan")
@@ -1,133 +1,322 @@
 import questionary
 from rich.console import Console
 from rich.panel import Panel
+from rich.table import Table
+from rich.progress import BarColumn, Progress, TaskProgressColumn, TextColumn
 import os
-import csv
-import json
-from features.transactions.transactions import load_transactions, TRANSACTIONS_FILE
-from features.budgets.budgets import load_budgets, BUDGETS_FILE
+from datetime import datetime
+from features.transactions.transactions import TRANSACTIONS_FILE
+from features.transactions.aggregates import verify_aggregates
+from features.transactions.fingerprints import FINGERPRINTS_FILE, rebuild_fingerprints
+from features.transactions.columnar import COLUMNAR_FILE, ColumnarLedger, convert_to_columnar, export_columnar_to_text
+from features.storage.storage import SQLITE_FILE, DaemonStorage, TextStorage, get_storage, migrate_text_to_sqlite
+from features.data_management.exporter import EXPORT_DIR, export_budgets, export_transactions
+from features.data_management.importer import IMPORT_FORMATS, file_format, import_file
+from features.data_management.parquet import available as parquet_available, export_budgets_parquet, export_parquet
+from features.analytics.reports import REPORTS_DIR, generate_reports
 
 console = Console()
-EXPORT_DIR = "exports"
 
 def export_data():
     """
-    Exports transaction and budget data to a chosen format (CSV or JSON).
+    Streams transactions (optionally one date range, compressed or split by month/year)
+    and budgets out to CSV or JSON-lines files.
     """
     console.print(Panel("[bold blue]Export Data[/bold blue]", expand=False))
     
     export_format = questionary.select(
         "Choose an export format:",
-        choices=["CSV", "JSON"]
+        choices=["CSV", "JSON Lines", "Parquet"]
     ).ask()
+    if export_format is None:
+        return
+    if export_format == "Parquet":
+        export_data_parquet()
+        return
+    format = "csv" if export_format == "CSV" else "jsonl"
+
+    partition = questionary.select(
+        "Split the export into files by:",
+        choices=["None", "Month", "Year"]
+    ).ask()
+    partition = None if partition in (None, "None") else partition.lower()
+    compress = questionary.confirm("Compress with gzip?", default=False).ask()
+
+    start_str = questionary.text("Start date (YYYY-MM-DD), or leave empty for the beginning:").ask()
+    end_str = questionary.text("End date (YYYY-MM-DD), or leave empty for the latest transaction:").ask()
+    try:
+        start = datetime.strptime(start_str, "%Y-%m-%d") if start_str else None
+        end = datetime.strptime(end_str, "%Y-%m-%d") if end_str else None
+    except ValueError:
+        console.print("[bold red]Invalid date format. Please use YYYY-MM-DD.[/bold red]")
+        return
+
+    name = "export"
+    if start or end:
+        name += f"_{start_str or 'start'}_{end_str or 'end'}"
+
+    try:
+        report = export_transactions(EXPORT_DIR, name, format, compress, start, end, partition)
+        budgets_path = export_budgets(EXPORT_DIR, "export_budgets", format, compress)
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error exporting data: {e}[/bold red]")
+        return
 
-    if not os.path.exists(EXPORT_DIR):
-        os.makedirs(EXPORT_DIR)
-
-    transactions = load_transactions()
-    budgets = load_budgets()
-
-    if export_format == "CSV":
-        export_path = os.path.join(EXPORT_DIR, "export.csv")
-        try:
-            with open(export_path, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["type", "date", "category", "description", "amount"])
-                for t in transactions:
-                    writer.writerow(["transaction", t["date"].strftime("%Y-%m-%d"), t["category"], t["description"], t["amount"]])
-                for category, amount in budgets.items():
-                    writer.writerow(["budget", "", category, "", amount])
-            console.print(f"[bold green]Data successfully exported to {export_path}[/bold green]")
-        except IOError as e:
-            console.print(f"[bold red]Error exporting data to CSV: {e}[/bold red]")
-
-    elif export_format == "JSON":
-        export_path = os.path.join(EXPORT_DIR, "export.json")
-        data_to_export = {
-            "transactions": [
-                {
-                    "date": t["date"].strftime("%Y-%m-%d"),
-                    "type": t["type"],
-                    "category": t["category"],
-                    "description": t["description"],
-                    "amount": t["amount"]
-                } for t in transactions
-            ],
-            "budgets": budgets
-        }
-        try:
-            with open(export_path, "w") as f:
-                json.dump(data_to_export, f, indent=4)
-            console.print(f"[bold green]Data successfully exported to {export_path}[/bold green]")
-        except IOError as e:
-            console.print(f"[bold red]Error exporting data to JSON: {e}[/bold red]")
+    console.print(
+        f"[bold green]Exported {report.rows} transactions to {len(report.paths)} file(s) "
+        f"in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/sec).[/bold green]"
+    )
+    for path in report.paths:
+        console.print(f"  {path}")
+    console.print(f"[bold green]Budgets exported to {budgets_path}[/bold green]")
+
+def export_data_parquet():
+    """
+    Exports transactions and budgets as typed Parquet files for other analytics tools.
+    """
+    if not parquet_available():
+        console.print("[bold red]Parquet export needs pyarrow. Install it with: pip install pyarrow[/bold red]")
+        return
+
+    transactions_path = os.path.join(EXPORT_DIR, "export.parquet")
+    budgets_path = os.path.join(EXPORT_DIR, "export_budgets.parquet")
+    try:
+        rows = export_parquet(transactions_path)
+        export_budgets_parquet(budgets_path)
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error exporting data to Parquet: {e}[/bold red]")
+        return
+    console.print(f"[bold green]Exported {rows} transactions to {transactions_path} and budgets to {budgets_path}[/bold green]")
 
 def import_data():
     """
-    Imports transaction and budget data from a chosen file (CSV or JSON).
+    Streams transaction and budget data in from a CSV, JSON or JSON-lines file.
+    Invalid rows are set aside in a side file instead of stopping the import.
     """
     console.print(Panel("[bold blue]Import Data[/bold blue]", expand=False))
     
     import_path = questionary.text("Enter the path to the import file:").ask()
 
-    if not os.path.exists(import_path):
+    if not import_path or not os.path.exists(import_path):
         console.print("[bold red]File not found. Please provide a valid path.[/bold red]")
         return
 
-    file_extension = os.path.splitext(import_path)[1].lower()
+    if file_format(import_path) not in IMPORT_FORMATS:
+        console.print("[bold red]Unsupported file format. Please use .csv, .json, .jsonl (optionally .gz) or .parquet files.[/bold red]")
+        return
+
+    skip_duplicates = questionary.confirm("Skip transactions that are already recorded?", default=True).ask()
 
     try:
-        if file_extension == ".csv":
-            with open(import_path, "r") as f:
-                reader = csv.reader(f)
-                next(reader) # Skip header
-                
-                transactions_to_add = []
-                budgets_to_add = {}
-
-                for row in reader:
-                    item_type, date, category, description, amount = row
-                    if item_type == "transaction":
-                        transactions_to_add.append(f"{date},{'expense' if float(amount) < 0 else 'income'},{category},{description},{int(float(amount))}")
-                    elif item_type == "budget":
-                        budgets_to_add[category] = int(float(amount))
-                
-                with open(TRANSACTIONS_FILE, "a") as f:
-                    for t in transactions_to_add:
-                        f.write(t + "\n")
-                
-                existing_budgets = load_budgets()
-                existing_budgets.update(budgets_to_add)
-                with open(BUDGETS_FILE, "w") as f:
-                    for cat, amt in existing_budgets.items():
-                        f.write(f"{cat},{amt}\n")
-                
-                console.print(f"[bold green]Successfully imported {len(transactions_to_add)} transactions and {len(budgets_to_add)} budgets from CSV.[/bold green]")
-
-        elif file_extension == ".json":
-            with open(import_path, "r") as f:
-                data_to_import = json.load(f)
-            
-            transactions_to_add = data_to_import.get("transactions", [])
-            budgets_to_add = data_to_import.get("budgets", {})
-
-            with open(TRANSACTIONS_FILE, "a") as f:
-                for t in transactions_to_add:
-                    f.write(f"{t['date']},{t['type']},{t['category']},{t['description']},{t['amount']}\n")
-            
-            existing_budgets = load_budgets()
-            existing_budgets.update(budgets_to_add)
-            with open(BUDGETS_FILE, "w") as f:
-                for cat, amt in existing_budgets.items():
-                    f.write(f"{cat},{amt}\n")
-
-            console.print(f"[bold green]Successfully imported {len(transactions_to_add)} transactions and {len(budgets_to_add)} budgets from JSON.[/bold green]")
-
-        else:
-            console.print("[bold red]Unsupported file format. Please use .csv or .json files.[/bold red]")
+        with Progress(
+            TextColumn("[bold blue]Importing"),
+            BarColumn(),
+            TaskProgressColumn(),
+            TextColumn("{task.fields[rows]:,} rows, {task.fields[duplicates]:,} duplicates at {task.fields[rate]:,.0f} rows/sec"),
+            console=console,
+        ) as progress:
+            task = progress.add_task("import", total=os.path.getsize(import_path), rows=0, duplicates=0, rate=0)
+
+            def on_progress(bytes_read, total_bytes, report):
+                progress.update(task, completed=bytes_read, rows=report.imported, duplicates=report.duplicates, rate=report.rows_per_second)
 
+            report = import_file(import_path, on_progress=on_progress, skip_duplicates=skip_duplicates)
+            progress.update(task, completed=os.path.getsize(import_path), rows=report.imported, duplicates=report.duplicates, rate=report.rows_per_second)
     except Exception as e:
         console.print(f"[bold red]An error occurred during import: {e}[/bold red]")
+        return
+
+    console.print(
+        f"[bold green]Successfully imported {report.imported} transactions and {len(report.budgets)} budgets "
+        f"in {report.seconds:.1f}s ({report.rows_per_second:,.0f} rows/sec).[/bold green]"
+    )
+    if report.duplicates:
+        console.print(f"[bold yellow]Skipped {report.duplicates} duplicate transactions.[/bold yellow]")
+    if report.rejected:
+        console.print(f"[bold yellow]{report.rejected} rows were rejected; see {report.rejects_path} for the reasons.[/bold yellow]")
+
+def generate_monthly_reports():
+    """
+    Writes a Markdown and/or HTML report for every month (or one year) into exports/reports,
+    rendering months in parallel and skipping those whose inputs are unchanged.
+    """
+    console.print(Panel("[bold blue]Generate Monthly Reports[/bold blue]", expand=False))
+
+    year_str = questionary.text("Year (YYYY), or leave empty for every month:").ask()
+    if year_str is None:
+        return
+    if year_str and not (len(year_str) == 4 and year_str.isdigit()):
+        console.print("[bold red]Invalid year. Please use YYYY.[/bold red]")
+        return
+    report_format = questionary.select("Report format:", choices=["Markdown", "HTML", "Both"]).ask()
+    if report_format is None:
+        return
+    formats = {"Markdown": ("md",), "HTML": ("html",), "Both": ("md", "html")}[report_format]
+
+    try:
+        with Progress(
+            TextColumn("[bold blue]Rendering"),
+            BarColumn(),
+            TaskProgressColumn(),
+            console=console,
+        ) as progress:
+            task = progress.add_task("reports", total=None)
+
+            def on_progress(done, total):
+                progress.update(task, completed=done, total=total)
+
+            run = generate_reports(int(year_str) if year_str else None, formats, on_progress=on_progress)
+    except Exception as e:
+        console.print(f"[bold red]An error occurred while generating reports: {e}[/bold red]")
+        return
+
+    console.print(
+        f"[bold green]Wrote {len(run.written)} report files for {run.months} months to {REPORTS_DIR} "
+        f"in {run.seconds:.1f}s.[/bold green]"
+    )
+    if run.skipped:
+        console.print(f"[bold yellow]Skipped {run.skipped} months whose reports were already up to date.[/bold yellow]")
+
+def convert_ledger_to_binary():
+    """
+    Converts the text ledger into the memory-mapped columnar format.
+    """
+    console.print(Panel("[bold blue]Convert Ledger to Binary[/bold blue]", expand=False))
+
+    if not os.path.exists(TRANSACTIONS_FILE):
+        console.print("[bold yellow]No transactions found to convert.[/bold yellow]")
+        return
+
+    try:
+        rows = convert_to_columnar(TRANSACTIONS_FILE, COLUMNAR_FILE)
+        console.print(f"[bold green]Converted {rows} transactions to {COLUMNAR_FILE}[/bold green]")
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error converting ledger: {e}[/bold red]")
+
+def export_binary_ledger_to_text():
+    """
+    Writes the columnar ledger back out as a plain text ledger.
+    """
+    console.print(Panel("[bold blue]Export Binary Ledger to Text[/bold blue]", expand=False))
+
+    if not os.path.exists(COLUMNAR_FILE):
+        console.print(f"[bold yellow]No binary ledger found at {COLUMNAR_FILE}.[/bold yellow]")
+        return
+
+    default_path = os.path.join(EXPORT_DIR, "transactions_from_binary.txt")
+    text_path = questionary.text("Enter the path for the text ledger:", default=default_path).ask()
+    if not text_path:
+        return
+
+    try:
+        if os.path.abspath(text_path) == os.path.abspath(TRANSACTIONS_FILE):
+            # The live ledger is only ever replaced through the storage backend, which
+            # settles the journal and keeps the tables derived from the ledger in step.
+            if not questionary.confirm("Replace every recorded transaction with the binary ledger's rows?", default=False).ask():
+                return
+            with ColumnarLedger(COLUMNAR_FILE) as ledger:
+                lines = [ledger.line(i) for i in range(len(ledger))]
+            get_storage().rewrite_transactions(lines)
+            console.print(f"[bold green]Replaced the ledger with {len(lines)} transactions from {COLUMNAR_FILE}[/bold green]")
+            return
+        os.makedirs(os.path.dirname(text_path) or ".", exist_ok=True)
+        rows = export_columnar_to_text(COLUMNAR_FILE, text_path)
+        console.print(f"[bold green]Exported {rows} transactions to {text_path}[/bold green]")
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error exporting binary ledger: {e}[/bold red]")
+
+def verify_and_rebuild_aggregates():
+    """
+    Recomputes the monthly totals from the raw ledger, reports any drift from the
+    daily totals table that balances and reports are read from, and offers to rebuild it.
+    """
+    console.print(Panel("[bold blue]Verify Aggregates[/bold blue]", expand=False))
+
+    storage = get_storage()
+    if isinstance(storage, DaemonStorage):
+        console.print("[bold yellow]The ledger daemon owns the daily totals while it runs. Stop it to verify them.[/bold yellow]")
+        return
+    if not isinstance(storage, TextStorage):
+        console.print("[bold yellow]The active SQLite storage sums its rows on every query and keeps no aggregates to verify.[/bold yellow]")
+        return
+
+    try:
+        drift = verify_aggregates(storage)
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error verifying aggregates: {e}[/bold red]")
+        return
+
+    if not drift:
+        console.print("[bold green]Aggregates match the ledger.[/bold green]")
+        return
+
+    table = Table(title="Aggregate Drift")
+    table.add_column("Month", style="cyan")
+    table.add_column("Type", style="magenta")
+    table.add_column("Category", style="yellow")
+    table.add_column("Stored", justify="right", style="red")
+    table.add_column("Actual", justify="right", style="green")
+    for month, type, category, stored, actual in drift:
+        table.add_row(month, type, category, f"{stored/100:.2f}", f"{actual/100:.2f}")
+    console.print(table)
+
+    if questionary.confirm("Rebuild the aggregates from the ledger?").ask():
+        storage.rebuild_daily_totals()
+        console.print("[bold green]Aggregates rebuilt.[/bold green]")
+
+def rebuild_duplicate_index():
+    """
+    Rebuilds the fingerprint index that imports use to skip duplicates from the text ledger.
+    """
+    console.print(Panel("[bold blue]Rebuild Duplicate Index[/bold blue]", expand=False))
+
+    try:
+        with rebuild_fingerprints(TRANSACTIONS_FILE) as index:
+            console.print(f"[bold green]Indexed {len(index)} distinct transactions in {FINGERPRINTS_FILE}[/bold green]")
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error rebuilding the duplicate index: {e}[/bold red]")
+
+def sort_ledger_by_date():
+    """
+    Rewrites the text ledger in date order, on request only; reads by date work on an unsorted ledger as it stands.
+    """
+    console.print(Panel("[bold blue]Sort Ledger by Date[/bold blue]", expand=False))
+
+    storage = get_storage()
+    if isinstance(storage, DaemonStorage):
+        console.print("[bold yellow]The ledger daemon owns the ledger while it runs. Stop it to sort the ledger.[/bold yellow]")
+        return
+    if not isinstance(storage, TextStorage):
+        console.print("[bold yellow]The active SQLite storage keeps no text ledger to sort.[/bold yellow]")
+        return
+
+    if not questionary.confirm(f"Rewrite {TRANSACTIONS_FILE} with its rows in date order?").ask():
+        return
+
+    try:
+        moved = storage.sort_ledger()
+    except (IOError, ValueError) as e:
+        console.print(f"[bold red]Error sorting the ledger: {e}[/bold red]")
+        return
+    if moved:
+        console.print(f"[bold green]Sorted the ledger; {moved} rows were out of date order.[/bold green]")
+    else:
+        console.print("[bold green]The ledger is already in date order.[/bold green]")
+
+def migrate_to_sqlite():
+    """
+    Copies the text ledger and budgets into the SQLite database, which becomes the active storage backend.
+    """
+    console.print(Panel("[bold blue]Migrate to SQLite[/bold blue]", expand=False))
+
+    if os.path.exists(SQLITE_FILE) and not questionary.confirm(f"{SQLITE_FILE} already exists. Replace it with the text data?").ask():
+        return
+
+    try:
+        transactions, budgets = migrate_text_to_sqlite(SQLITE_FILE)
+        console.print(f"[bold green]Migrated {transactions} transactions and {budgets} budgets to {SQLITE_FILE}. It is now the active storage.[/bold green]")
+    except Exception as e:
+        console.print(f"[bold red]Error migrating to SQLite: {e}[/bold red]")
 
 
 def display_data_management_menu():
@@ -139,6 +328,13 @@ def display_data_management_menu():
         choices=[
             "Export Data",
             "Import Data",
+            "Generate Monthly Reports",
+            "Convert Ledger to Binary",
+            "Export Binary Ledger to Text",
+            "Verify Aggregates",
+            "Rebuild Duplicate Index",
+            "Sort Ledger by Date",
+            "Migrate to SQLite",
             "Back to Main Menu"
         ]
     ).ask()
@@ -147,5 +343,19 @@ def display_data_management_menu():
         export_data()
     elif choice == "Import Data":
         import_data()
+    elif choice == "Generate Monthly Reports":
+        generate_monthly_reports()
+    elif choice == "Convert Ledger to Binary":
+        convert_ledger_to_binary()
+    elif choice == "Export Binary Ledger to Text":
+        export_binary_ledger_to_text()
+    elif choice == "Verify Aggregates":
+        verify_and_rebuild_aggregates()
+    elif choice == "Rebuild Duplicate Index":
+        rebuild_duplicate_index()
+    elif choice == "Sort Ledger by Date":
+        sort_ledger_by_date()
+    elif choice == "Migrate to SQLite":
+        migrate_to_sqlite()
     elif choice == "Back to Main Menu":
         return
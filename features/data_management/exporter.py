@@ -0,0 +1,151 @@
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from collections import OrderedDict
+from json.encoder import encode_basestring_ascii
+from features.storage.storage import get_storage
+
+# Constants
+EXPORT_DIR = "exports"
+FORMATS = ("csv", "jsonl")
+PARTITIONS = (None, "month", "year")
+CSV_HEADER = "date,type,category,description,amount"
+BUDGETS_CSV_HEADER = "category,amount"
+GZIP_LEVEL = 1               # exports are large and written once; favour speed over ratio
+BUFFER_SIZE = 1024 * 1024
+MAX_OPEN_PARTITIONS = 64     # unsorted ledgers touch partitions in any order; older handles are closed and reopened for append
+
+
+def _display_amount(amount):
+    """
+    Formats paisa as a fixed two-decimal amount without going through float.
+    """
+    amount = int(amount)
+    sign = "-" if amount < 0 else ""
+    amount = abs(amount)
+    return f"{sign}{amount // 100}.{amount % 100:02d}"
+
+
+def _csv_row(fields):
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(fields)
+    return buffer.getvalue()
+
+
+def format_line(line, format, display_amounts=False):
+    """
+    Turns one ledger line into a CSV or JSON-lines record (newline included).
+    """
+    if format == "csv" and not display_amounts and '"' not in line:
+        return line + "\n"
+    date, type, category, description, amount = line.split(",")
+    if format == "csv":
+        if display_amounts:
+            amount = _display_amount(amount)
+        return _csv_row([date, type, category, description, amount])
+    # Same output as json.dumps on the record dict, without building the dict per row.
+    amount = encode_basestring_ascii(_display_amount(amount)) if display_amounts else int(amount)
+    return (
+        f'{{"date": {encode_basestring_ascii(date)}, "type": {encode_basestring_ascii(type)}, '
+        f'"category": {encode_basestring_ascii(category)}, "description": {encode_basestring_ascii(description)}, '
+        f'"amount": {amount}}}\n'
+    )
+
+
+def export_path(directory, name, format, compress=False, partition_key=None):
+    filename = f"{name}-{partition_key}" if partition_key else name
+    return os.path.join(directory, f"{filename}.{format}" + (".gz" if compress else ""))
+
+
+def _open_export(path, append, compress):
+    mode = "at" if append else "wt"
+    if compress:
+        return gzip.open(path, mode, compresslevel=GZIP_LEVEL, encoding="utf-8", newline="")
+    return open(path, mode[0], buffering=BUFFER_SIZE, encoding="utf-8", newline="")
+
+
+class ExportReport:
+    """
+    Counts from one export run.
+    """
+
+    def __init__(self):
+        self.rows = 0
+        self.paths = []
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def export_transactions(directory=EXPORT_DIR, name="transactions", format="csv", compress=False,
+                        start=None, end=None, partition=None, display_amounts=False, storage=None):
+    """
+    Streams transactions dated between start and end (inclusive) into CSV or
+    JSON-lines files, optionally gzip-compressed and split into one file per
+    month or year. Rows go straight from the storage line iterator to buffered
+    file handles, so memory use does not grow with the ledger. Amounts are
+    paisa/cents unless display_amounts is set. Returns an ExportReport.
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown export format {format!r}")
+    if partition not in PARTITIONS:
+        raise ValueError(f"Unknown partition {partition!r}")
+    storage = storage or get_storage()
+    os.makedirs(directory, exist_ok=True)
+    key_length = {"month": 7, "year": 4}.get(partition)
+    handles = OrderedDict()
+    report = ExportReport()
+    started = time.perf_counter()
+
+    def handle_for(key):
+        f = handles.get(key)
+        if f is not None:
+            handles.move_to_end(key)
+            return f
+        path = export_path(directory, name, format, compress, key)
+        append = path in report.paths
+        if len(handles) >= MAX_OPEN_PARTITIONS:
+            handles.popitem(last=False)[1].close()
+        f = handles[key] = _open_export(path, append, compress)
+        if not append:
+            report.paths.append(path)
+            if format == "csv":
+                f.write(CSV_HEADER + "\n")
+        return f
+
+    try:
+        f = None if key_length else handle_for(None)
+        for line in storage.iter_lines(start, end):
+            if key_length:
+                f = handle_for(line[:key_length])
+            f.write(format_line(line, format, display_amounts))
+            report.rows += 1
+    finally:
+        for f in handles.values():
+            f.close()
+    report.seconds = time.perf_counter() - started
+    return report
+
+
+def export_budgets(directory=EXPORT_DIR, name="budgets", format="csv", compress=False, display_amounts=False, storage=None):
+    """
+    Writes the budgets as category,amount CSV or {"budget", "amount"} JSON lines. Returns the path.
+    """
+    storage = storage or get_storage()
+    os.makedirs(directory, exist_ok=True)
+    path = export_path(directory, name, format, compress)
+    with _open_export(path, False, compress) as f:
+        if format == "csv":
+            f.write(BUDGETS_CSV_HEADER + "\n")
+        for category, amount in storage.load_budgets().items():
+            shown = _display_amount(amount) if display_amounts else amount
+            if format == "csv":
+                f.write(_csv_row([category, shown]))
+            else:
+                f.write(json.dumps({"budget": category, "amount": shown}) + "\n")
+    return path
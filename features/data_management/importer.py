@@ -0,0 +1,405 @@
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from features.data_management.parquet import iter_parquet_records, parquet_rows
+from features.storage.storage import get_storage
+from features.transactions.fingerprints import FingerprintIndex, fingerprint
+from features.transactions.transactions import EXPENSE_CATEGORIES, INCOME_CATEGORIES, MAX_YEAR, MIN_YEAR
+
+# Constants
+BATCH_SIZE = 10_000          # rows handed to storage per append (one journal commit each)
+READ_SIZE = 1024 * 1024      # bytes pulled from a JSON file at a time
+REJECTS_SUFFIX = ".rejected.csv"
+MAX_AMOUNT = 10 ** 12        # paisa/cents (10 billion); keeps the int64 running totals far from overflowing
+
+
+class RowRejected(ValueError):
+    """
+    Raised by the validators with the reason a row cannot be imported.
+    """
+
+
+def _paisa(value):
+    """
+    Returns an amount as a positive integer number of paisa/cents up to MAX_AMOUNT, or rejects it.
+    """
+    if isinstance(value, bool):
+        raise RowRejected(f"amount {value!r} is not a number")
+    if isinstance(value, str):
+        try:
+            value = int(value.strip())
+        except ValueError:
+            raise RowRejected(f"amount {value!r} is not a whole number of paisa")
+    elif isinstance(value, float):
+        if not value.is_integer():
+            raise RowRejected(f"amount {value!r} is not a whole number of paisa")
+        value = int(value)
+    elif not isinstance(value, int):
+        raise RowRejected(f"amount {value!r} is not a number")
+    if value <= 0:
+        raise RowRejected(f"amount {value} must be positive")
+    if value > MAX_AMOUNT:
+        raise RowRejected(f"amount {value} is larger than the maximum of {MAX_AMOUNT}")
+    return value
+
+
+def validate_transaction(date_str, type, category, description, amount):
+    """
+    Checks one transaction and returns it as a ledger line.
+    The type is compared case-insensitively ("expense"/"Expense") but stored as given.
+    The date is written back as YYYY-MM-DD, the form every date range and order
+    lookup compares the ledger's lines in.
+    """
+    try:
+        day = datetime.strptime(str(date_str), "%Y-%m-%d").date()
+    except ValueError:
+        raise RowRejected(f"date {date_str!r} is not YYYY-MM-DD")
+    if not MIN_YEAR <= day.year <= MAX_YEAR:
+        raise RowRejected(f"date {date_str!r} is outside the years {MIN_YEAR} to {MAX_YEAR}")
+    kind = str(type).lower()
+    if kind not in ("income", "expense"):
+        raise RowRejected(f"type {type!r} is not income or expense")
+    allowed = INCOME_CATEGORIES if kind == "income" else EXPENSE_CATEGORIES
+    if category not in allowed:
+        raise RowRejected(f"category {category!r} is not a known {kind} category")
+    description = str(description)
+    if "," in description or "\n" in description:
+        raise RowRejected("description contains a comma or line break")
+    return f"{day.isoformat()},{type},{category},{description},{_paisa(amount)}"
+
+
+def validate_budget(category, amount):
+    if category not in EXPENSE_CATEGORIES:
+        raise RowRejected(f"budget category {category!r} is not an expense category")
+    return category, _paisa(amount)
+
+
+def _csv_type(category, amount):
+    """
+    The CSV export has no transaction type column: a negative amount marks an
+    expense, otherwise the category decides and "Other" counts as income.
+    """
+    if str(amount).strip().startswith("-"):
+        return "expense"
+    if category in EXPENSE_CATEGORIES and category not in INCOME_CATEGORIES:
+        return "expense"
+    return "income"
+
+
+def iter_csv_records(f):
+    """
+    Yields ("transaction" | "budget", fields) for each row of a CSV, reading one
+    row at a time. The header picks the layout: ledger-shaped transaction files
+    (date,type,category,description,amount), budget files (category,amount), or
+    the older combined export (type,date,category,description,amount).
+    Unusable rows come back as ("invalid", (reason, row)).
+    """
+    reader = csv.reader(f)
+    header = next(reader, None)
+    if header == ["date", "type", "category", "description", "amount"]:
+        for row in reader:
+            if len(row) != 5:
+                yield "invalid", (f"expected 5 columns, found {len(row)}", row)
+            else:
+                yield "transaction", tuple(row)
+        return
+    if header == ["category", "amount"]:
+        for row in reader:
+            if len(row) != 2:
+                yield "invalid", (f"expected 2 columns, found {len(row)}", row)
+            else:
+                yield "budget", tuple(row)
+        return
+    rows = reader if header == ["type", "date", "category", "description", "amount"] else _chain_row(header, reader)
+    for row in rows:
+        if len(row) != 5:
+            yield "invalid", (f"expected 5 columns, found {len(row)}", row)
+            continue
+        item_type, date_str, category, description, amount = row
+        if item_type == "budget":
+            yield "budget", (category, amount)
+        elif item_type == "transaction":
+            type = _csv_type(category, amount)
+            yield "transaction", (date_str, type, category, description, amount.strip().lstrip("-"))
+        else:
+            yield "invalid", (f"unknown record type {item_type!r}", row)
+
+
+def _chain_row(first, rows):
+    if first is not None:
+        yield first
+    yield from rows
+
+
+class _JSONStream:
+    """
+    Pulls one JSON value at a time out of a file without reading all of it.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(READ_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} in JSON but found {found or 'end of file'!r}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number at the very end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+    def items(self, close):
+        """
+        Yields the members of an array or object body up to the closing bracket.
+        """
+        if self.peek() == close:
+            self.pos += 1
+            return
+        while True:
+            yield
+            separator = self.peek()
+            self.pos += 1
+            if separator == close:
+                return
+            if separator != ",":
+                raise ValueError(f"expected ',' or {close!r} in JSON but found {separator or 'end of file'!r}")
+
+
+def _transaction_fields(item):
+    if not isinstance(item, dict):
+        return "invalid", ("transaction is not an object", item)
+    try:
+        return "transaction", tuple(item[key] for key in ("date", "type", "category", "description", "amount"))
+    except KeyError as e:
+        return "invalid", (f"missing field {e}", item)
+
+
+def iter_json_records(f):
+    """
+    Yields ("transaction" | "budget", fields) from an export-style JSON document
+    ({"transactions": [...], "budgets": {...}}), decoding one transaction at a time.
+    """
+    stream = _JSONStream(f)
+    stream.expect("{")
+    for _ in stream.items("}"):
+        key = stream.value()
+        stream.expect(":")
+        if key == "transactions":
+            stream.expect("[")
+            for _ in stream.items("]"):
+                yield _transaction_fields(stream.value())
+        elif key == "budgets":
+            budgets = stream.value()
+            if not isinstance(budgets, dict):
+                yield "invalid", ("budgets is not an object", budgets)
+                continue
+            for category, amount in budgets.items():
+                yield "budget", (category, amount)
+        else:
+            stream.value()
+
+
+def iter_jsonl_records(f):
+    """
+    Yields ("transaction", fields) for each JSON object line of a JSON-lines file.
+    """
+    for line in f:
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError:
+            yield "invalid", ("line is not valid JSON", line.rstrip("\n"))
+            continue
+        if isinstance(item, dict) and "budget" in item:
+            yield "budget", (item["budget"], item.get("amount"))
+        else:
+            yield _transaction_fields(item)
+
+
+READERS = {".csv": iter_csv_records, ".json": iter_json_records, ".jsonl": iter_jsonl_records}
+IMPORT_FORMATS = (*READERS, ".parquet")
+
+
+def file_format(path):
+    """
+    Returns the data extension of a path (".csv", ".json" or ".jsonl"), looking past a trailing ".gz".
+    """
+    if path.lower().endswith(".gz"):
+        path = path[:-3]
+    return os.path.splitext(path)[1].lower()
+
+
+@contextmanager
+def _open_records(path, extension):
+    """
+    Yields the record iterator for a file and a function returning how many of its bytes have been read.
+    """
+    if extension == ".parquet":
+        total_bytes = os.path.getsize(path)
+        total_rows = max(parquet_rows(path), 1)
+        read = [0]
+
+        def counted(records):
+            for record in records:
+                read[0] += 1
+                yield record
+
+        yield counted(iter_parquet_records(path)), lambda: min(total_bytes, total_bytes * read[0] // total_rows)
+        return
+
+    with open(path, "rb") as raw:
+        binary = gzip.GzipFile(fileobj=raw) if path.lower().endswith(".gz") else raw
+        f = io.TextIOWrapper(binary, encoding="utf-8", newline="" if extension == ".csv" else None)
+        try:
+            yield READERS[extension](f), raw.tell
+        finally:
+            f.detach()
+
+
+class ImportReport:
+    """
+    Counts from one import run.
+    """
+
+    def __init__(self):
+        self.imported = 0
+        self.duplicates = 0
+        self.budgets = {}
+        self.rejected = 0
+        self.rejects_path = None
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        """
+        Rows read per second, whether imported, skipped as duplicates or rejected.
+        """
+        return (self.imported + self.duplicates + self.rejected) / self.seconds if self.seconds else 0.0
+
+
+def import_file(path, batch_size=BATCH_SIZE, rejects_path=None, on_progress=None, skip_duplicates=True, storage=None):
+    """
+    Streams a CSV, JSON or JSON-lines export (optionally gzip-compressed) or a
+    Parquet export into storage.
+
+    Rows are validated one at a time and appended in batches of batch_size, so
+    memory stays flat however large the file is. Rows that fail validation are
+    written to rejects_path (default: <path>.rejected.csv) with the reason instead
+    of stopping the import. With skip_duplicates, transactions already stored are
+    counted and skipped copy for copy: a row the file holds k times is added only
+    as many times as storage holds fewer than k copies of it, so importing the
+    same export twice adds nothing the second time while identical transactions
+    within one file (two equal bills on the same day) are all kept. Budgets are merged into the
+    existing ones at the end. on_progress(bytes_read, total_bytes, report) is called after every batch.
+    Returns an ImportReport.
+    """
+    extension = file_format(path)
+    if extension not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported file format {extension!r}. Please use .csv, .json, .jsonl or .parquet files.")
+    storage = storage or get_storage()
+    rejects_path = rejects_path or path + REJECTS_SUFFIX
+    total_bytes = os.path.getsize(path)
+    report = ImportReport()
+    rejects = None
+    batch = []
+    batch_copies = []
+    started = time.perf_counter()
+
+    def flush():
+        new_lines = batch
+        if skip_duplicates:
+            # The nth copy of a line in the file is new while storage holds fewer than n copies of it.
+            stored = storage.count_existing(batch)
+            new_lines = [line for line, copy in zip(batch, batch_copies) if copy > stored.get(line, 0)]
+            report.duplicates += len(batch) - len(new_lines)
+        if new_lines:
+            storage.append_transactions(new_lines)
+        report.imported += len(new_lines)
+        batch.clear()
+        batch_copies.clear()
+        report.seconds = time.perf_counter() - started
+        if on_progress:
+            on_progress(position(), total_bytes, report)
+
+    with tempfile.TemporaryDirectory() as scratch, _open_records(path, extension) as (records, position):
+        # How many copies of each line the file has held so far, counted on disk so memory stays flat.
+        seen = FingerprintIndex.create(os.path.join(scratch, "seen.bin")) if skip_duplicates else None
+        try:
+            for number, (kind, fields) in enumerate(records, start=1):
+                try:
+                    if kind == "transaction":
+                        line = validate_transaction(*fields)
+                        batch.append(line)
+                        if seen is not None:
+                            batch_copies.append(seen.add(fingerprint(line)))
+                        if len(batch) >= batch_size:
+                            flush()
+                    elif kind == "budget":
+                        category, amount = validate_budget(*fields)
+                        report.budgets[category] = amount
+                    else:
+                        reason, fields = fields
+                        raise RowRejected(reason)
+                except RowRejected as e:
+                    if rejects is None:
+                        rejects = open(rejects_path, "w", newline="")
+                        writer = csv.writer(rejects)
+                        writer.writerow(["record", "reason", "data"])
+                        report.rejects_path = rejects_path
+                    writer.writerow([number, str(e), json.dumps(fields, default=str)])
+                    report.rejected += 1
+            if batch:
+                flush()
+        finally:
+            if rejects is not None:
+                rejects.close()
+            if seen is not None:
+                seen.close()
+
+    if report.budgets:
+        budgets = storage.load_budgets()
+        budgets.update(report.budgets)
+        storage.save_budgets(budgets)
+    report.seconds = time.perf_counter() - started
+    return report
@@ -0,0 +1,218 @@
+import json
+import os
+from itertools import islice
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage, get_storage
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; the Parquet commands report it as missing
+    pa = None
+
+# Constants
+PARQUET_SNAPSHOT_FILE = "database/transactions.parquet"
+ROW_GROUP_SIZE = 1_000_000
+READ_BLOCK_SIZE = 16 * 1024 * 1024
+FIELDS = ["date", "type", "category", "description", "amount"]
+SOURCE_KEY = b"finance_tracker.source"
+
+
+def available():
+    return pa is not None
+
+
+def _require():
+    if pa is None:
+        raise ImportError("Parquet support needs pyarrow (pip install pyarrow)")
+
+
+def _column_types():
+    return {
+        "date": pa.date32(),
+        "type": pa.dictionary(pa.int32(), pa.string()),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "description": pa.string(),
+        "amount": pa.int64(),
+    }
+
+
+def _csv_options():
+    # Ledger lines are unquoted and headerless; descriptions never contain commas.
+    return (
+        pa_csv.ReadOptions(column_names=FIELDS, block_size=READ_BLOCK_SIZE),
+        pa_csv.ParseOptions(quote_char=False),
+        pa_csv.ConvertOptions(column_types=_column_types(), strings_can_be_null=False),
+    )
+
+
+def _ledger_batches(ledger_path):
+    """
+    Streams a text ledger as Arrow record batches, parsed by pyarrow's CSV reader.
+    """
+    read_options, parse_options, convert_options = _csv_options()
+    reader = pa_csv.open_csv(ledger_path, read_options=read_options, parse_options=parse_options, convert_options=convert_options)
+    for batch in reader:
+        yield batch
+
+
+def _line_batches(lines, batch_rows=ROW_GROUP_SIZE):
+    """
+    Turns an iterator of ledger lines into Arrow record batches of up to batch_rows rows.
+    """
+    read_options, parse_options, convert_options = _csv_options()
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, batch_rows))
+        if not chunk:
+            return
+        data = pa.py_buffer(("\n".join(chunk) + "\n").encode("utf-8"))
+        yield from pa_csv.read_csv(data, read_options=read_options, parse_options=parse_options,
+                                   convert_options=convert_options).to_batches()
+
+
+def _write_parquet(path, batches, schema, metadata=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Writes record batches to a Parquet file in row groups of row_group_size rows,
+    building it beside the target and renaming it into place. Returns the row count.
+    """
+    schema = schema.with_metadata(metadata or {})
+    tmp_path = path + ".tmp"
+    rows = 0
+    pending = []
+    pending_rows = 0
+    with pq.ParquetWriter(tmp_path, schema) as writer:
+        for batch in batches:
+            pending.append(batch)
+            pending_rows += batch.num_rows
+            if pending_rows >= row_group_size:
+                writer.write_table(pa.Table.from_batches(pending, schema=schema), row_group_size=row_group_size)
+                rows += pending_rows
+                pending, pending_rows = [], 0
+        if pending:
+            writer.write_table(pa.Table.from_batches(pending, schema=schema), row_group_size=row_group_size)
+            rows += pending_rows
+    os.replace(tmp_path, path)
+    return rows
+
+
+def _transactions_schema():
+    return pa.schema([(name, type) for name, type in _column_types().items()])
+
+
+def export_parquet(path, start=None, end=None, storage=None, row_group_size=ROW_GROUP_SIZE):
+    """
+    Writes transactions dated between start and end (inclusive) to a Parquet file
+    with typed columns: date32 dates, dictionary-encoded type and category, string
+    descriptions and int64 paisa amounts. A whole text ledger is parsed straight
+    from disk by pyarrow; other sources go through the storage line iterator.
+    Returns the row count.
+    """
+    _require()
+    storage = storage or get_storage()
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if isinstance(storage, TextStorage) and not (start or end) and os.path.exists(TRANSACTIONS_FILE):
+        batches = _ledger_batches(TRANSACTIONS_FILE)
+    else:
+        batches = _line_batches(storage.iter_lines(start, end))
+    return _write_parquet(path, batches, _transactions_schema(), row_group_size=row_group_size)
+
+
+def export_budgets_parquet(path, storage=None):
+    """
+    Writes the budgets to a Parquet file of (category, amount) rows.
+    """
+    _require()
+    budgets = (storage or get_storage()).load_budgets()
+    table = pa.table({
+        "category": pa.array(list(budgets.keys()), pa.string()).dictionary_encode(),
+        "amount": pa.array(list(budgets.values()), pa.int64()),
+    })
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    pq.write_table(table, path)
+    return path
+
+
+def iter_parquet_records(path):
+    """
+    Yields ("transaction" | "budget", fields) from a Parquet export, one row group at a time.
+    A file with only category and amount columns holds budgets.
+    """
+    _require()
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    names = parquet_file.schema_arrow.names
+    if names == ["category", "amount"]:
+        for batch in parquet_file.iter_batches():
+            for category, amount in zip(batch.column("category").to_pylist(), batch.column("amount").to_pylist()):
+                yield "budget", (category, amount)
+        return
+    if names != FIELDS:
+        raise ValueError(f"{path} does not have the columns {', '.join(FIELDS)}")
+    for batch in parquet_file.iter_batches():
+        columns = [batch.column(name).to_pylist() for name in FIELDS]
+        for date, type, category, description, amount in zip(*columns):
+            yield "transaction", (date.isoformat() if date else date, type, category, description, amount)
+
+
+def parquet_rows(path):
+    _require()
+    return pq.ParquetFile(path).metadata.num_rows
+
+
+def read_transactions_frame(path):
+    """
+    Loads a Parquet transactions file as a pandas DataFrame with the dashboard's
+    columns (Date, Type, Category, Description, Amount). The file is memory-mapped;
+    dates arrive as datetime64 rather than one date object per row, type and
+    category stay dictionary-encoded and arrive as pandas categoricals, and the
+    int64 amounts convert without a copy. Row groups are combined into one chunk
+    per column so that taking a few rows by position does not touch the rest.
+    """
+    _require()
+    table = pq.read_table(path, memory_map=True)
+    table = table.rename_columns(["Date", "Type", "Category", "Description", "Amount"])
+    return table.combine_chunks().to_pandas(date_as_object=False)
+
+
+def _ledger_signature(ledger_path):
+    """
+    Returns the (size, mtime_ns) pair used to detect outside edits to the ledger.
+    """
+    try:
+        stat = os.stat(ledger_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def ensure_parquet_snapshot(ledger_path=TRANSACTIONS_FILE, snapshot_path=PARQUET_SNAPSHOT_FILE):
+    """
+    Returns the path of a Parquet copy of the text ledger, rewriting it only when
+    the ledger changed since it was written.
+    """
+    _require()
+    signature = json.dumps(_ledger_signature(ledger_path)).encode("utf-8")
+    try:
+        metadata = pq.read_schema(snapshot_path).metadata or {}
+    except (FileNotFoundError, OSError, pa.ArrowInvalid):
+        metadata = {}
+    if metadata.get(SOURCE_KEY) != signature:
+        if os.path.getsize(ledger_path):
+            batches = _ledger_batches(ledger_path)
+        else:
+            batches = iter(())
+        _write_parquet(snapshot_path, batches, _transactions_schema(), {SOURCE_KEY: signature})
+    return snapshot_path
+
+
+def snapshot_source(snapshot_path=PARQUET_SNAPSHOT_FILE):
+    """
+    Returns the [size, mtime_ns] of the ledger a snapshot was written from, or None when it records none.
+    """
+    _require()
+    try:
+        metadata = pq.read_schema(snapshot_path).metadata or {}
+    except (FileNotFoundError, OSError, pa.ArrowInvalid):
+        return None
+    source = metadata.get(SOURCE_KEY)
+    return json.loads(source) if source else None
@@ -1,7 +1,7 @@
 import questionary
 from rich.console import Console
 from rich.panel import Panel
-from features.transactions.transactions import load_transactions
+from features.transactions.transactions import load_totals
 from datetime import datetime, timedelta
 
 console = Console()
@@ -14,26 +14,18 @@ def get_personalized_advice():
     console.print("Connecting to the Smart Assistant for personalized advice...")
 
     # 1. Gather financial summary
-    transactions = load_transactions()
-    if not transactions:
+    if not load_totals():
         console.print("[bold red]No transactions found. Cannot generate advice.[/bold red]")
         return
 
     end_date = datetime.now()
     start_date = end_date - timedelta(days=30)
 
-    recent_transactions = [
-        t for t in transactions 
-        if start_date <= t["date"] <= end_date
-    ]
+    totals = load_totals(start_date, end_date)
+    total_income = sum(totals.get("income", {}).values())
+    total_expenses = sum(totals.get("expense", {}).values())
 
-    total_income = sum(t["amount"] for t in recent_transactions if t["type"] == "income")
-    total_expenses = sum(t["amount"] for t in recent_transactions if t["type"] == "expense")
-
-    spending_by_category = {}
-    for t in recent_transactions:
-        if t["type"] == "expense":
-            spending_by_category[t["category"]] = spending_by_category.get(t["category"], 0) + t["amount"]
+    spending_by_category = dict(totals.get("expense", {}))
 
     # 2. Format the prompt for the LLM
     prompt = f"""
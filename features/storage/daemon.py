@@ -0,0 +1,290 @@
+"""
+Single-writer ledger daemon.
+
+Owns the storage files for as long as it runs: every client request arrives as
+one JSON line on a Unix domain socket and is answered from the daemon's
+in-memory state. Reads from different clients run side by side on worker
+threads; writes are applied one at a time in arrival order, each with the files
+to itself. The CLI and the dashboard route through it whenever the socket
+answers and fall back to direct file access otherwise.
+
+Run from the project root:
+    python -m features.storage.daemon
+"""
+import asyncio
+import base64
+import json
+import os
+import signal
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime
+from itertools import count, islice
+from features.storage.storage import DAEMON_SOCKET, direct_storage
+from rich.console import Console
+
+# Constants
+REQUEST_LIMIT = 16 * 1024 * 1024  # the largest request line is an import batch; rewrites arrive as a file
+MAX_CURSORS = 16  # open row streams kept per connection; the oldest is dropped beyond this
+WRITE_OPS = {"append_transactions", "rewrite_transactions", "save_budgets", "set_budget", "recover"}
+
+console = Console()
+
+
+def _parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def _row_fields(t):
+    return [t["date"].strftime("%Y-%m-%d"), t["type"], t["category"], t["description"], t["amount"]]
+
+
+class Cursors:
+    """
+    The row streams one connection is reading page by page. Each stays open
+    between requests, so a page costs only its own rows however far into the
+    stream it is.
+
+    A stream is pinned to the write count it was opened at: once a write has
+    landed, asking for its next page fails instead of returning a mix of rows
+    from before and after the write.
+    """
+
+    def __init__(self):
+        self._open = {}
+        self._ids = count(1)
+
+    def page(self, request, open_rows, version=0):
+        """
+        Returns {"rows": [...], "cursor": id} with the next `limit` rows of the request's
+        stream, opening it with open_rows() when no cursor is given; the cursor is None once the stream is used up.
+        """
+        cursor = request.get("cursor")
+        if cursor is None:
+            if len(self._open) >= MAX_CURSORS:
+                self._open.pop(next(iter(self._open)))[0].close()
+            cursor = next(self._ids)
+            self._open[cursor] = (open_rows(), version)
+        elif cursor not in self._open:
+            raise ValueError(f"cursor {cursor} is no longer open")
+        elif self._open[cursor][1] != version:
+            self._open.pop(cursor)[0].close()
+            raise ValueError(f"cursor {cursor} was opened before the ledger changed; read it again from the start")
+        rows = list(islice(self._open[cursor][0], request["limit"]))
+        if len(rows) < request["limit"]:
+            self._open.pop(cursor)[0].close()
+            cursor = None
+        return {"rows": rows, "cursor": cursor}
+
+    def close(self):
+        for rows, _version in self._open.values():
+            rows.close()
+        self._open.clear()
+
+
+def _daily_totals_fields(daily_totals):
+    return {
+        "first_day": daily_totals.first_day,
+        "days": daily_totals.days,
+        "cells": daily_totals.cells,
+        "sums": base64.b64encode(daily_totals.sums.tobytes()).decode("ascii"),
+    }
+
+
+def _file_lines(path):
+    with open(path, "r") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def handle_request(storage, request, cursors=None, version=0):
+    """
+    Runs one decoded request against the storage backend and returns its JSON-ready result.
+    Row streams are served a page at a time through the connection's `cursors`,
+    pinned to `version`, the number of writes applied so far.
+    """
+    op = request["op"]
+    cursors = cursors if cursors is not None else Cursors()
+    if op == "ping":
+        return "pong"
+    if op == "iter_transactions":
+        return cursors.page(request, lambda: (
+            _row_fields(t)
+            for t in storage.iter_transactions(
+                _parse_date(request.get("start")), _parse_date(request.get("end")),
+                request.get("type"), request.get("categories"),
+            )
+        ), version)
+    if op == "lines":
+        return cursors.page(request, lambda: (
+            line for line in storage.iter_lines(_parse_date(request.get("start")), _parse_date(request.get("end")))
+        ), version)
+    if op == "newest":
+        return cursors.page(request, lambda: (_row_fields(t) for t in storage.iter_newest(_parse_date(request.get("start")))), version)
+    if op == "search":
+        return [
+            _row_fields(t)
+            for t in storage.search(
+                request["query"], _parse_date(request.get("start")), _parse_date(request.get("end")),
+                request.get("categories"), request.get("min_amount"), request.get("max_amount"), request["limit"],
+            )
+        ]
+    if op == "totals":
+        return storage.totals(_parse_date(request.get("start")), _parse_date(request.get("end")))
+    if op == "daily_totals":
+        return _daily_totals_fields(storage.daily_totals())
+    if op == "append_transactions":
+        return storage.append_transactions(request["lines"])
+    if op == "count_existing":
+        return storage.count_existing(request["lines"])
+    if op == "rewrite_transactions":
+        # The lines come in a file the client wrote, so a whole-ledger rewrite never travels as one request line.
+        return storage.rewrite_transactions(_file_lines(request["path"]), request.get("appended_lines"))
+    if op == "load_budgets":
+        return storage.load_budgets()
+    if op == "save_budgets":
+        return storage.save_budgets(request["budgets"])
+    if op == "set_budget":
+        return storage.set_budget(request["category"], request["amount"])
+    if op == "recover":
+        return list(storage.recover())
+    raise ValueError(f"Unknown request {op!r}")
+
+
+class ReadWriteLock:
+    """
+    asyncio lock that lets any number of reads run together while each write runs
+    alone. A waiting write holds back new reads so a stream of them cannot starve it.
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @asynccontextmanager
+    async def reading(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writing and not self._writers_waiting)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def writing(self):
+        async with self._condition:
+            self._writers_waiting += 1
+            await self._condition.wait_for(lambda: not self._writing and not self._readers)
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class LedgerDaemon:
+    """
+    asyncio server that serializes writes and answers reads for any number of clients.
+    Each connection's requests run in order on a thread of its own, off the event
+    loop, so one client's long read does not hold up the others; a write waits for
+    the reads in flight and runs with the files to itself.
+    """
+
+    def __init__(self, path=DAEMON_SOCKET, storage=None):
+        self.path = path
+        self.storage = storage or direct_storage()
+        self.requests = 0
+        self.writes = 0
+        self._lock = ReadWriteLock()
+
+    async def _serve_client(self, reader, writer):
+        # One thread per connection also keeps a SQLite backend's open cursors on the thread that made them.
+        executor = ThreadPoolExecutor(max_workers=1)
+        cursors = Cursors()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                    write = request.get("op") in WRITE_OPS
+                    async with (self._lock.writing if write else self._lock.reading)():
+                        try:
+                            result = await loop.run_in_executor(executor, handle_request, self.storage, request, cursors, self.writes)
+                        finally:
+                            if write:
+                                self.writes += 1
+                    response = {"ok": True, "result": result}
+                except Exception as e:
+                    response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                self.requests += 1
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            await loop.run_in_executor(executor, cursors.close)
+            executor.shutdown(wait=False)
+            writer.close()
+
+    def _claim_socket(self):
+        """
+        Removes a stale socket file left by a daemon that died; refuses if one is still answering.
+        """
+        if not os.path.exists(self.path):
+            return
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except OSError:
+            os.remove(self.path)
+        else:
+            raise RuntimeError(f"a ledger daemon is already listening on {self.path}")
+        finally:
+            probe.close()
+
+    async def serve(self, stop=None):
+        """
+        Serves clients until SIGINT/SIGTERM arrives, or until the given asyncio.Event `stop` is set.
+        """
+        self._claim_socket()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        replayed, discarded = self.storage.recover()
+        if replayed or discarded:
+            console.print(f"[bold yellow]Recovered interrupted writes: {replayed} replayed, {discarded} discarded.[/bold yellow]")
+        server = await asyncio.start_unix_server(self._serve_client, path=self.path, limit=REQUEST_LIMIT)
+        if stop is None:
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                loop.add_signal_handler(sig, stop.set)
+        console.print(f"[bold green]Ledger daemon listening on {self.path}[/bold green]")
+        try:
+            async with server:
+                await stop.wait()
+        finally:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            console.print(f"[bold]Ledger daemon stopped after {self.requests} requests.[/bold]")
+
+
+def main():
+    try:
+        asyncio.run(LedgerDaemon().serve())
+    except RuntimeError as e:
+        console.print(f"[bold red]Error starting ledger daemon: {e}[/bold red]")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import os
+import struct
+import threading
+import zlib
+
+# Constants
+JOURNAL_FILE = "database/transactions.journal"
+RECORD_HEADER = struct.Struct("<IIQ")  # payload length, crc32 of payload, ledger offset it was written at
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+def fsync_dir(path):
+    """
+    Flushes a directory entry so a rename inside it survives a crash.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, lines):
+    """
+    Replaces a file with the given lines via write-to-temp, fsync and rename,
+    so a crash leaves either the old file or the new one, never a torn mix.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        for line in lines:
+            f.write(line + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    fsync_dir(path)
+
+
+class Journal:
+    """
+    Write-ahead journal with group commit for ledger appends.
+
+    Each batch is written to the journal as one checksummed record that also
+    remembers the ledger offset it belongs at, fsynced, and only then appended
+    to the ledger by `apply(lines)`. Threads that call append() while a batch
+    is being committed queue up and are committed together by the next leader,
+    so many concurrent writers share one fsync. The journal is truncated
+    (checkpointed) once the ledger itself has been fsynced.
+    """
+
+    def __init__(self, path, ledger_path, apply):
+        self.path = path
+        self.ledger_path = ledger_path
+        self._apply = apply
+        self._cond = threading.Condition()
+        self._pending = []
+        self._enqueued = 0
+        self._committed = 0
+        self._committing = False
+        self._failures = {}  # ticket -> error, for callers whose batch another thread committed and failed
+        self._recovered = False
+
+    def _ledger_size(self):
+        try:
+            return os.path.getsize(self.ledger_path)
+        except FileNotFoundError:
+            return 0
+
+    def append(self, lines):
+        """
+        Durably appends lines to the ledger; returns once they are journaled and applied.
+        """
+        if not lines:
+            return
+        with self._cond:
+            self._pending.extend(lines)
+            self._enqueued += 1
+            ticket = self._enqueued
+            while self._committed < ticket and self._committing:
+                self._cond.wait()
+            if self._committed >= ticket:
+                # Another thread committed our lines along with its own.
+                error = self._failures.pop(ticket, None)
+                if error is not None:
+                    raise error
+                return
+            self._committing = True
+            batch, self._pending = self._pending, []
+            first, last = self._committed, self._enqueued
+
+        error = None
+        try:
+            self._commit(batch)
+        except Exception as e:
+            error = e
+        with self._cond:
+            self._committing = False
+            self._committed = last
+            if error is not None:
+                for waiter in range(first + 1, last + 1):
+                    if waiter != ticket:
+                        self._failures[waiter] = error
+            self._cond.notify_all()
+        if error is not None:
+            raise error
+
+    def _commit(self, lines):
+        if not self._recovered:
+            self.recover()
+        payload = "".join(line + "\n" for line in lines).encode("utf-8")
+        offset = self._ledger_size()
+        header = RECORD_HEADER.pack(len(payload), zlib.crc32(payload), offset)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "ab") as f:
+            record_start = f.tell()
+            f.write(header + payload)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            self._apply(lines)
+        except Exception:
+            if self._ledger_size() == offset:
+                # The batch was refused before any of it reached the ledger; drop its record so recovery does not replay it.
+                with open(self.path, "r+b") as f:
+                    f.truncate(record_start)
+                    os.fsync(f.fileno())
+            raise
+        if os.path.getsize(self.path) >= CHECKPOINT_BYTES:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """
+        Makes the ledger durable and empties the journal.
+        """
+        if os.path.exists(self.ledger_path):
+            with open(self.ledger_path, "rb+") as f:
+                os.fsync(f.fileno())
+        if os.path.exists(self.path):
+            with open(self.path, "wb") as f:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _read_records(self):
+        """
+        Returns the complete, checksum-valid records and the offset where they end.
+        """
+        records = []
+        valid_end = 0
+        with open(self.path, "rb") as f:
+            data = f.read()
+        position = 0
+        while position + RECORD_HEADER.size <= len(data):
+            length, crc, offset = RECORD_HEADER.unpack_from(data, position)
+            payload = data[position + RECORD_HEADER.size:position + RECORD_HEADER.size + length]
+            if len(payload) != length or zlib.crc32(payload) != crc:
+                break
+            records.append((offset, payload))
+            position += RECORD_HEADER.size + length
+            valid_end = position
+        return records, valid_end, len(data)
+
+    def recover(self):
+        """
+        Replays journaled batches that never fully reached the ledger and discards
+        torn records at the end of the journal. Returns (replayed, discarded) record counts.
+        """
+        self._recovered = True
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return 0, 0
+
+        records, valid_end, journal_size = self._read_records()
+        discarded = 1 if valid_end < journal_size else 0
+        replayed = 0
+        for offset, payload in records:
+            ledger_size = self._ledger_size()
+            if ledger_size < offset:
+                # The ledger was rewritten after this record; it no longer applies.
+                discarded += 1
+                continue
+            existing = b""
+            if os.path.exists(self.ledger_path):
+                with open(self.ledger_path, "rb") as f:
+                    f.seek(offset)
+                    existing = f.read(len(payload))
+            if existing == payload:
+                continue
+            if not payload.startswith(existing) or offset + len(existing) != ledger_size:
+                discarded += 1
+                continue
+            with open(self.ledger_path, "ab") as f:
+                f.write(payload[len(existing):])
+                f.flush()
+                os.fsync(f.fileno())
+            replayed += 1
+
+        self.checkpoint()
+        return replayed, discarded
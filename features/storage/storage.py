@@ -0,0 +1,841 @@
+import base64
+import calendar
+import heapq
+import json
+import os
+import socket
+import sqlite3
+import tempfile
+import threading
+from array import array
+from datetime import datetime
+from features.storage.journal import JOURNAL_FILE, Journal, atomic_write
+from features.transactions.columnar import COLUMNAR_FILE, ColumnarLedger, is_fresh
+from features.transactions.daily_totals import (
+    DailyTotals, add_to_daily_totals, commit_daily_totals, day_number, ensure_daily_totals, rebuild_daily_totals,
+)
+from features.transactions.date_order import commit_date_order, ensure_date_order, merge_ledger
+from features.transactions.fingerprints import FINGERPRINTS_FILE, commit_fingerprints, ensure_fingerprints, fingerprint
+from features.transactions.records import Transaction, TransactionColumns, iter_matching
+from features.transactions.search_index import (
+    SEARCH_INDEX_FILE, SEARCH_LIMIT, commit_search_index, description_matches, ensure_search_index, parse_query,
+    rebuild_search_index, search_rows,
+)
+from features.transactions.store import TransactionStore
+
+# Constants
+TRANSACTIONS_FILE = "database/transactions.txt"
+BUDGETS_FILE = "database/budgets.txt"
+SQLITE_FILE = "database/finance.db"
+STORAGE_ENV_VAR = "FINANCE_TRACKER_STORAGE"  # "text" or "sqlite"; unset picks sqlite once migrated
+DAEMON_SOCKET = "database/ledger.sock"
+NEWEST_PAGE_SIZE = 500  # rows per daemon request when paging newest-first
+LINES_PAGE_SIZE = 10_000  # rows per daemon request when streaming lines or transactions
+BUDGET_COMPACT_RECORDS = 64  # superseded budget records allowed in budgets.txt before it is rewritten
+
+
+def month_bounds(year, month):
+    """
+    Returns the first and last day of a month.
+    """
+    return datetime(year, month, 1), datetime(year, month, calendar.monthrange(year, month)[1])
+
+
+def _date_str(value):
+    return value.strftime("%Y-%m-%d") if value else None
+
+
+def _add_rows_to_totals(totals, transactions):
+    for t in transactions:
+        categories = totals.setdefault(t["type"], {})
+        categories[t["category"]] = categories.get(t["category"], 0) + t["amount"]
+    return totals
+
+
+class Storage:
+    """
+    Interface every storage backend implements.
+
+    Transactions move in and out as ledger lines ("date,type,category,description,amount")
+    and come back as Transaction records; budgets are {category: amount} dicts.
+    All amounts are integer paisa/cents.
+    """
+
+    def iter_transactions(self, start=None, end=None, type=None, categories=None):
+        """
+        Yields transactions dated between start and end (inclusive) matching the given type and categories.
+        """
+        raise NotImplementedError
+
+    def iter_lines(self, start=None, end=None):
+        """
+        Yields the transactions dated between start and end (inclusive) as ledger lines.
+        """
+        for t in self.iter_transactions(start, end):
+            yield f"{t['date'].strftime('%Y-%m-%d')},{t['type']},{t['category']},{t['description']},{t['amount']}"
+
+    def totals(self, start=None, end=None):
+        """
+        Returns {type: {category: amount}} for transactions dated between start and end (inclusive).
+        """
+        raise NotImplementedError
+
+    def iter_newest(self, start=None):
+        """
+        Yields the transactions dated on or after start, newest first; rows sharing
+        a date come most recently added first.
+        """
+        rows = list(self.iter_transactions(start))
+        rows.reverse()
+        rows.sort(key=lambda t: t.ordinal, reverse=True)
+        yield from rows
+
+    def daily_totals(self):
+        """
+        Returns a DailyTotals table of every transaction, summed up from the ledger lines.
+        """
+        daily_totals = DailyTotals()
+        daily_totals.add_lines(self.iter_lines())
+        return daily_totals
+
+    def search(self, query, start=None, end=None, categories=None, min_amount=None, max_amount=None, limit=SEARCH_LIMIT):
+        """
+        Returns the newest `limit` transactions whose description contains the query
+        (case-insensitive; a trailing "*" matches the start of a word instead),
+        dated between start and end, in the given categories and with an amount
+        between min_amount and max_amount (inclusive paisa/cents).
+        """
+        matches = (
+            (t.ordinal, position, t)
+            for position, t in enumerate(self.iter_transactions(start, end, categories=categories))
+            if description_matches(t["description"], query)
+            and (min_amount is None or t["amount"] >= min_amount)
+            and (max_amount is None or t["amount"] <= max_amount)
+        )
+        return [t for _ordinal, _position, t in heapq.nlargest(limit, matches, key=lambda match: match[:2])]
+
+    def append_transactions(self, lines):
+        """
+        Adds new transactions.
+        """
+        raise NotImplementedError
+
+    def count_existing(self, lines):
+        """
+        Returns {line: copies stored} for the given ledger lines that are already stored.
+        """
+        raise NotImplementedError
+
+    def rewrite_transactions(self, lines, appended_lines=None):
+        """
+        Replaces every transaction. `appended_lines` may name the only rows that are new
+        compared with what is stored, letting a backend update derived data incrementally.
+        """
+        raise NotImplementedError
+
+    def load_budgets(self):
+        raise NotImplementedError
+
+    def save_budgets(self, budgets):
+        """
+        Replaces every budget.
+        """
+        raise NotImplementedError
+
+    def set_budget(self, category, amount):
+        raise NotImplementedError
+
+    def recover(self):
+        """
+        Finishes or discards writes a crash interrupted. Returns (replayed, discarded) counts.
+        """
+        return 0, 0
+
+
+def _columnar_snapshot():
+    if not is_fresh(COLUMNAR_FILE, TRANSACTIONS_FILE):
+        return None
+    with ColumnarLedger(COLUMNAR_FILE) as ledger:
+        return TransactionColumns.from_columnar(ledger)
+
+# Shared by every feature in this process so a menu action only parses what changed since the last one.
+transaction_store = TransactionStore(TRANSACTIONS_FILE, snapshot=_columnar_snapshot)
+
+
+class TextStorage(Storage):
+    """
+    The plain text files under database/, together with the daily totals, date
+    order and indexes kept alongside the ledger and the in-memory store.
+    Appends go through a write-ahead journal with group commit; whole-file
+    rewrites are written to a temp file and renamed into place.
+    """
+
+    def __init__(self):
+        self.journal = Journal(JOURNAL_FILE, TRANSACTIONS_FILE, self._apply_append)
+        self._daily_totals = None
+        self._date_order = None
+        self._search_index = None
+        # Held while a cached table is checked against the ledger and swapped, so concurrent readers refresh it once.
+        self._refresh_lock = threading.RLock()
+        self._budgets_lock = threading.Lock()
+
+    def iter_transactions(self, start=None, end=None, type=None, categories=None):
+        """
+        Date-bounded reads binary-search the date-ordered ledger for the first row
+        in range and stop at the first row past it, rejecting rows on their raw text
+        fields before any record building. Unbounded reads are served from the
+        shared in-memory transaction store.
+        """
+        if categories is not None:
+            categories = set(categories)
+
+        if (start or end) and os.path.exists(TRANSACTIONS_FILE):
+            lines = self.date_order().range_lines(TRANSACTIONS_FILE, _date_str(start), _date_str(end))
+        elif os.path.exists(TRANSACTIONS_FILE):
+            yield from iter_matching(transaction_store.rows(), type=type, categories=categories)
+            return
+        elif os.path.exists(COLUMNAR_FILE):
+            with ColumnarLedger(COLUMNAR_FILE) as ledger:
+                yield from ledger.iter_rows(_date_str(start), _date_str(end), type, categories)
+            return
+        else:
+            return
+
+        for line in lines:
+            fields = line.split(",")
+            if type is not None and fields[1] != type:
+                continue
+            if categories is not None and fields[2] not in categories:
+                continue
+            yield Transaction.from_fields(*fields)
+
+    def iter_lines(self, start=None, end=None):
+        """
+        Reads raw lines from the ledger without parsing them into records; a
+        date-bounded range is looked up in date order with a binary search.
+        """
+        if not os.path.exists(TRANSACTIONS_FILE):
+            yield from super().iter_lines(start, end)
+            return
+        if start or end:
+            yield from self.date_order().range_lines(TRANSACTIONS_FILE, _date_str(start), _date_str(end))
+            return
+        with open(TRANSACTIONS_FILE, "r") as f:
+            for line in f:
+                line = line.rstrip("\n")
+                if line.strip():
+                    yield line
+
+    def iter_newest(self, start=None):
+        """
+        Reads the date-ordered ledger backwards from its end (merging in the small
+        out-of-order delta), so the first rows arrive after reading one block
+        however long the history is.
+        """
+        if not os.path.exists(TRANSACTIONS_FILE):
+            yield from super().iter_newest(start)
+            return
+        for line in self.date_order().newest_lines(TRANSACTIONS_FILE, _date_str(start)):
+            yield Transaction.from_fields(*line.split(","))
+
+    def totals(self, start=None, end=None):
+        """
+        Answered from the daily prefix-sum table with two row lookups, however
+        long the range or large the ledger.
+        """
+        if not os.path.exists(TRANSACTIONS_FILE):
+            return _add_rows_to_totals({}, self.iter_transactions(start, end))
+        return self.daily_totals().range_totals(
+            day_number(start) if start else None,
+            day_number(end) if end else None,
+        )
+
+    def daily_totals(self):
+        """
+        Returns the DailyTotals table for the current ledger, kept in memory between calls.
+        """
+        with self._refresh_lock:
+            self._daily_totals = ensure_daily_totals(TRANSACTIONS_FILE, cached=self._daily_totals)
+            return self._daily_totals
+
+    def date_order(self):
+        """
+        Returns the DateOrder describing the current ledger, kept in memory between calls.
+        """
+        with self._refresh_lock:
+            self._date_order = ensure_date_order(TRANSACTIONS_FILE, cached=self._date_order)
+            return self._date_order
+
+    def search(self, query, start=None, end=None, categories=None, min_amount=None, max_amount=None, limit=SEARCH_LIMIT):
+        """
+        Looks the query up in the trigram index over descriptions (built on first
+        use) and applies the other filters to the matching rows of the in-memory store.
+        """
+        if not os.path.exists(TRANSACTIONS_FILE):
+            return super().search(query, start, end, categories, min_amount, max_amount, limit)
+        columns = transaction_store.rows()
+        with self._refresh_lock:
+            self._search_index = ensure_search_index(TRANSACTIONS_FILE, cached=self._search_index)
+            if self._search_index.rows != len(columns):
+                self._search_index = rebuild_search_index(TRANSACTIONS_FILE)
+            search_index = self._search_index
+        rows = search_rows(
+            search_index, columns, query,
+            day_number(start) if start else None, day_number(end) if end else None,
+            categories, min_amount, max_amount, limit,
+        )
+        return [columns[row] for row in rows]
+
+    def append_transactions(self, lines):
+        """
+        Journals the lines and, once they are durable, appends them to the ledger.
+        Concurrent callers are batched into a single journal fsync.
+        """
+        self.journal.append(list(lines))
+
+    def _apply_append(self, lines):
+        """
+        Appends to the ledger file, the daily totals, the date order and the
+        duplicate and search indexes, and merges the ledger back into date order
+        once enough rows arrived out of order.
+
+        The lines are folded into every table in memory before the ledger is
+        touched, so a line one of them cannot take (an amount overflowing the
+        totals, say) fails the append with the ledger and its stored tables as
+        they were; the cached tables, partly updated by then, are dropped.
+        """
+        os.makedirs(os.path.dirname(TRANSACTIONS_FILE), exist_ok=True)
+        daily_totals = self.daily_totals()
+        date_order = self.date_order()
+        # The fingerprint and search indexes only exist once an import or a search has asked for them.
+        fingerprints = ensure_fingerprints(TRANSACTIONS_FILE) if os.path.exists(FINGERPRINTS_FILE) else None
+        search_index = None
+        if os.path.exists(SEARCH_INDEX_FILE):
+            search_index = self._search_index = ensure_search_index(TRANSACTIONS_FILE, cached=self._search_index)
+        try:
+            daily_totals.add_lines(lines)
+            date_order.add_lines(lines)
+            if search_index is not None:
+                search_index.add_lines(lines)
+            if fingerprints is not None:
+                fingerprints.add_lines(lines)
+        except Exception:
+            self._daily_totals = self._date_order = self._search_index = None
+            if fingerprints is not None:
+                # Left marked dirty, so it is rebuilt from the ledger on next use.
+                fingerprints.close()
+            raise
+
+        with open(TRANSACTIONS_FILE, "a") as f:
+            for line in lines:
+                f.write(line + "\n")
+        commit_daily_totals(daily_totals, TRANSACTIONS_FILE)
+        commit_date_order(date_order, TRANSACTIONS_FILE)
+        if fingerprints is not None:
+            commit_fingerprints(fingerprints, TRANSACTIONS_FILE)
+        if search_index is not None:
+            self._search_index = commit_search_index(search_index, lines, TRANSACTIONS_FILE)
+        if date_order.needs_merge():
+            # These lines are already in the ledger; empty the journal so none of its offsets point into the merged file.
+            self.journal.checkpoint()
+            self._merge_ledger()
+
+    def _merge_ledger(self):
+        """
+        Rewrites the ledger in date order. The daily totals and the duplicate index
+        do not depend on row order, so they are carried over to the new file instead
+        of being rebuilt; the search index, which does, is rebuilt.
+        """
+        daily_totals = self.daily_totals()
+        fingerprints = ensure_fingerprints(TRANSACTIONS_FILE) if os.path.exists(FINGERPRINTS_FILE) else None
+        self._date_order = merge_ledger(self.date_order(), TRANSACTIONS_FILE)
+        source = self._date_order.source
+        daily_totals.source = source
+        daily_totals.save()
+        if fingerprints is not None:
+            fingerprints.set_source(source)
+            fingerprints.close()
+        if os.path.exists(SEARCH_INDEX_FILE):
+            self._search_index = rebuild_search_index(TRANSACTIONS_FILE)
+
+    def count_existing(self, lines):
+        """
+        Looks each line up in the persistent fingerprint index, one O(1) probe per line.
+        """
+        with ensure_fingerprints(TRANSACTIONS_FILE) as index:
+            counts = {line: index.copies(fingerprint(line)) for line in lines}
+        return {line: copies for line, copies in counts.items() if copies}
+
+    def rewrite_transactions(self, lines, appended_lines=None):
+        # Settle and empty the journal first so its ledger offsets never point into the rewritten file.
+        self.journal.recover()
+        daily_totals = self.daily_totals() if appended_lines else None
+        atomic_write(TRANSACTIONS_FILE, lines)
+        if appended_lines:
+            add_to_daily_totals(daily_totals, appended_lines, TRANSACTIONS_FILE)
+        else:
+            self.rebuild_daily_totals()
+
+    def rebuild_daily_totals(self):
+        """
+        Recomputes the daily totals from the raw ledger, replacing the stored and cached table.
+        """
+        self._daily_totals = rebuild_daily_totals(TRANSACTIONS_FILE)
+        return self._daily_totals
+
+    def _read_budgets(self):
+        """
+        Returns the budgets, the number of records budgets.txt holds and whether it
+        ends in a torn record. The file is a log of "category,amount" upserts in
+        which the last record for a category wins; a final record without its
+        newline was cut short by a crash and is ignored.
+        """
+        budgets = {}
+        records = 0
+        try:
+            with open(BUDGETS_FILE, "r") as f:
+                for line in f:
+                    if not line.endswith("\n"):
+                        return budgets, records, True
+                    if not line.strip():
+                        continue
+                    category, amount = line.strip().split(",")
+                    budgets[category] = int(amount)
+                    records += 1
+        except FileNotFoundError:
+            pass
+        return budgets, records, False
+
+    def load_budgets(self):
+        return self._read_budgets()[0]
+
+    def save_budgets(self, budgets):
+        atomic_write(BUDGETS_FILE, (f"{category},{amount}" for category, amount in budgets.items()))
+
+    def set_budget(self, category, amount):
+        """
+        Appends one upsert record instead of rewriting the file. Once more than
+        BUDGET_COMPACT_RECORDS records have been superseded (or a torn record is
+        found) the file is compacted to one record per category.
+        """
+        with self._budgets_lock:
+            budgets, records, torn = self._read_budgets()
+            budgets[category] = amount
+            if torn or records + 1 - len(budgets) > BUDGET_COMPACT_RECORDS:
+                self.save_budgets(budgets)
+                return
+            os.makedirs(os.path.dirname(BUDGETS_FILE), exist_ok=True)
+            with open(BUDGETS_FILE, "a") as f:
+                f.write(f"{category},{amount}\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def recover(self):
+        return self.journal.recover()
+
+    def sort_ledger(self):
+        """
+        Rewrites the ledger in date order on request; returns the number of rows
+        that were out of order. Date reads do not need it, so startup never does it.
+        """
+        self.journal.recover()
+        if not os.path.exists(TRANSACTIONS_FILE):
+            return 0
+        moved = self.date_order().delta_rows
+        if moved:
+            self._merge_ledger()
+        return moved
+
+
+class SQLiteStorage(Storage):
+    """
+    SQLite database in WAL mode with indexes on date, type and category, so single
+    rows are inserted or updated in place and balance, budget and windowed queries
+    run as SQL aggregates. Each thread gets its own connection.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,
+            date TEXT NOT NULL,
+            type TEXT NOT NULL,
+            category TEXT NOT NULL,
+            description TEXT NOT NULL,
+            amount INTEGER NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+        CREATE INDEX IF NOT EXISTS idx_transactions_type ON transactions(type);
+        CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category);
+        CREATE VIRTUAL TABLE IF NOT EXISTS transactions_search USING fts5(
+            description, content='transactions', content_rowid='id', tokenize='trigram'
+        );
+        CREATE TRIGGER IF NOT EXISTS transactions_search_insert AFTER INSERT ON transactions BEGIN
+            INSERT INTO transactions_search (rowid, description) VALUES (new.id, new.description);
+        END;
+        CREATE TRIGGER IF NOT EXISTS transactions_search_delete AFTER DELETE ON transactions BEGIN
+            INSERT INTO transactions_search (transactions_search, rowid, description) VALUES ('delete', old.id, old.description);
+        END;
+        CREATE TABLE IF NOT EXISTS budgets (
+            category TEXT PRIMARY KEY,
+            amount INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path=SQLITE_FILE):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            indexed = connection.execute("SELECT 1 FROM sqlite_master WHERE name = 'transactions_search'").fetchone()
+            connection.executescript(self.SCHEMA)
+            if not indexed:
+                # Databases created before the search index existed: index the rows already there.
+                with connection:
+                    connection.execute("INSERT INTO transactions_search (transactions_search) VALUES ('rebuild')")
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        """
+        Closes this thread's connection; the next access reopens it.
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _where(self, start=None, end=None, type=None, categories=None):
+        clauses = []
+        params = []
+        if start:
+            clauses.append("date >= ?")
+            params.append(_date_str(start))
+        if end:
+            clauses.append("date <= ?")
+            params.append(_date_str(end))
+        if type is not None:
+            clauses.append("type = ?")
+            params.append(type)
+        if categories is not None:
+            categories = list(categories)
+            clauses.append(f"category IN ({', '.join('?' * len(categories))})")
+            params.extend(categories)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def iter_transactions(self, start=None, end=None, type=None, categories=None):
+        where, params = self._where(start, end, type, categories)
+        query = f"SELECT date, type, category, description, amount FROM transactions{where} ORDER BY id"
+        for row in self.connection.execute(query, params):
+            yield Transaction.from_fields(*row)
+
+    def iter_newest(self, start=None):
+        """
+        Walks the date index backwards, so rows stream out without a sort.
+        """
+        where, params = self._where(start)
+        query = f"SELECT date, type, category, description, amount FROM transactions{where} ORDER BY date DESC, id DESC"
+        for row in self.connection.execute(query, params):
+            yield Transaction.from_fields(*row)
+
+    def totals(self, start=None, end=None):
+        where, params = self._where(start, end)
+        query = f"SELECT type, category, SUM(amount) FROM transactions{where} GROUP BY type, category"
+        totals = {}
+        for type, category, amount in self.connection.execute(query, params):
+            totals.setdefault(type, {})[category] = amount
+        return totals
+
+    def search(self, query, start=None, end=None, categories=None, min_amount=None, max_amount=None, limit=SEARCH_LIMIT):
+        """
+        Matches descriptions through the FTS5 trigram index, which serves LIKE
+        patterns of three or more characters; the other filters use the column indexes.
+        """
+        needle = parse_query(query)
+        where, params = self._where(start, end, categories=categories)
+        clauses = [where[len(" WHERE "):]] if where else []
+        pattern = needle.strip()
+        escape = ""
+        if any(char in pattern for char in "%_\\"):
+            # The trigram index cannot serve LIKE ... ESCAPE, so only escape when the query needs it.
+            pattern = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            escape = " ESCAPE '\\'"
+        clauses.append(f"s.description LIKE ?{escape}")
+        params.append(f"%{pattern}%")
+        if needle.startswith(" "):
+            clauses.append(f"(' ' || lower(t.description)) LIKE ?{escape}")
+            params.append(f"% {pattern}%")
+        if min_amount is not None:
+            clauses.append("amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            clauses.append("amount <= ?")
+            params.append(max_amount)
+        query = (
+            # CROSS JOIN keeps the trigram lookup as the outer loop even when a date filter is present.
+            "SELECT t.date, t.type, t.category, t.description, t.amount FROM transactions_search s "
+            "CROSS JOIN transactions t ON t.id = s.rowid "
+            f"WHERE {' AND '.join(clauses)} ORDER BY t.date DESC, t.id DESC LIMIT ?"
+        )
+        return [Transaction.from_fields(*row) for row in self.connection.execute(query, params + [limit])]
+
+    def _insert(self, lines):
+        self.connection.executemany(
+            "INSERT INTO transactions (date, type, category, description, amount) VALUES (?, ?, ?, ?, ?)",
+            (_line_fields(line) for line in lines),
+        )
+
+    def append_transactions(self, lines):
+        with self.connection:
+            self._insert(lines)
+
+    def count_existing(self, lines):
+        """
+        Counts each line's copies through the date index.
+        """
+        query = (
+            "SELECT COUNT(*) FROM transactions WHERE date = ? AND type = ? AND category = ? "
+            "AND description = ? AND amount = ?"
+        )
+        counts = {line: self.connection.execute(query, _line_fields(line)).fetchone()[0] for line in set(lines)}
+        return {line: copies for line, copies in counts.items() if copies}
+
+    def rewrite_transactions(self, lines, appended_lines=None):
+        with self.connection:
+            self.connection.execute("DELETE FROM transactions")
+            self._insert(lines)
+
+    def load_budgets(self):
+        return dict(self.connection.execute("SELECT category, amount FROM budgets ORDER BY rowid"))
+
+    def save_budgets(self, budgets):
+        with self.connection:
+            self.connection.execute("DELETE FROM budgets")
+            self.connection.executemany("INSERT INTO budgets (category, amount) VALUES (?, ?)", budgets.items())
+
+    def set_budget(self, category, amount):
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO budgets (category, amount) VALUES (?, ?) "
+                "ON CONFLICT(category) DO UPDATE SET amount = excluded.amount",
+                (category, amount),
+            )
+
+
+class DaemonStorage(Storage):
+    """
+    Client for the ledger daemon (features/storage/daemon.py), which owns the
+    files while it runs so the CLI and the dashboard can write at the same time.
+    Each thread keeps its own connection; requests and responses are JSON lines.
+    Row streams come back one page per request, continued through a cursor the
+    daemon keeps for the connection, so memory stays flat however many rows are
+    read; a stream that a write lands in the middle of fails with a RuntimeError
+    rather than mixing rows from before and after it.
+    """
+
+    def __init__(self, path=DAEMON_SOCKET):
+        self.path = path
+        self._local = threading.local()
+
+    def available(self):
+        """
+        True when this thread holds a connection or the daemon socket accepts a new one.
+        """
+        if getattr(self._local, "connection", None) is not None:
+            return True
+        if not os.path.exists(self.path):
+            return False
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.path)
+        except OSError:
+            connection.close()
+            return False
+        self._local.connection = connection
+        self._local.reader = connection.makefile("rb")
+        return True
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            self._local.reader.close()
+            connection.close()
+            self._local.connection = None
+
+    def _call(self, op, **params):
+        if not self.available():
+            raise ConnectionError(f"ledger daemon is not running on {self.path}")
+        try:
+            self._local.connection.sendall(json.dumps({"op": op, **params}).encode("utf-8") + b"\n")
+            line = self._local.reader.readline()
+        except OSError:
+            self.close()
+            raise
+        if not line:
+            self.close()
+            raise ConnectionError("ledger daemon closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def _pages(self, op, page_size, **params):
+        """
+        Yields the rows of a paged request, fetching the next page once the last one is used up.
+        """
+        cursor = None
+        while True:
+            page = self._call(op, cursor=cursor, limit=page_size, **params)
+            yield from page["rows"]
+            cursor = page["cursor"]
+            if cursor is None:
+                return
+
+    def iter_transactions(self, start=None, end=None, type=None, categories=None):
+        rows = self._pages(
+            "iter_transactions", LINES_PAGE_SIZE, start=_date_str(start), end=_date_str(end), type=type,
+            categories=list(categories) if categories is not None else None,
+        )
+        for date, type, category, description, amount in rows:
+            yield Transaction.from_fields(date, type, category, description, amount)
+
+    def iter_lines(self, start=None, end=None):
+        return self._pages("lines", LINES_PAGE_SIZE, start=_date_str(start), end=_date_str(end))
+
+    def iter_newest(self, start=None, page_size=NEWEST_PAGE_SIZE):
+        """
+        Fetches newest-first rows from the daemon one page at a time.
+        """
+        for row in self._pages("newest", page_size, start=_date_str(start)):
+            yield Transaction.from_fields(*row)
+
+    def totals(self, start=None, end=None):
+        return self._call("totals", start=_date_str(start), end=_date_str(end))
+
+    def daily_totals(self):
+        """
+        Fetches the daemon's daily totals table instead of the rows it is summed from.
+        """
+        table = self._call("daily_totals")
+        sums = array("q")
+        sums.frombytes(base64.b64decode(table["sums"]))
+        return DailyTotals(table["first_day"], table["days"], table["cells"], sums)
+
+    def search(self, query, start=None, end=None, categories=None, min_amount=None, max_amount=None, limit=SEARCH_LIMIT):
+        rows = self._call(
+            "search", query=query, start=_date_str(start), end=_date_str(end),
+            categories=list(categories) if categories is not None else None,
+            min_amount=min_amount, max_amount=max_amount, limit=limit,
+        )
+        return [Transaction.from_fields(*row) for row in rows]
+
+    def append_transactions(self, lines):
+        self._call("append_transactions", lines=list(lines))
+
+    def count_existing(self, lines):
+        return self._call("count_existing", lines=list(lines))
+
+    def rewrite_transactions(self, lines, appended_lines=None):
+        """
+        Writes the lines to a temp file beside the socket and has the daemon rewrite the ledger from it.
+        """
+        fd, path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix=".rewrite")
+        try:
+            with os.fdopen(fd, "w") as f:
+                for line in lines:
+                    f.write(line + "\n")
+            self._call("rewrite_transactions", path=path, appended_lines=appended_lines)
+        finally:
+            os.remove(path)
+
+    def load_budgets(self):
+        return self._call("load_budgets")
+
+    def save_budgets(self, budgets):
+        self._call("save_budgets", budgets=budgets)
+
+    def set_budget(self, category, amount):
+        self._call("set_budget", category=category, amount=amount)
+
+    def recover(self):
+        # The daemon recovers its files when it starts.
+        return 0, 0
+
+
+def _line_fields(line):
+    date, type, category, description, amount = line.strip().split(",")
+    return date, type, category, description, int(amount)
+
+
+def get_storage():
+    """
+    Returns the ledger daemon client while the daemon is running, otherwise the
+    backend files are opened directly (see direct_storage).
+    """
+    if _daemon_storage.available():
+        return _daemon_storage
+    return direct_storage()
+
+
+def direct_storage():
+    """
+    Returns the configured file backend: FINANCE_TRACKER_STORAGE when set, otherwise
+    SQLite once database/finance.db exists and the text files before that.
+    """
+    backend = os.environ.get(STORAGE_ENV_VAR)
+    if backend is None:
+        backend = "sqlite" if os.path.exists(SQLITE_FILE) else "text"
+    if backend == "sqlite":
+        return _sqlite_storage
+    if backend == "text":
+        return _text_storage
+    raise ValueError(f"Unknown storage backend {backend!r} in {STORAGE_ENV_VAR}")
+
+
+def migrate_text_to_sqlite(sqlite_path=SQLITE_FILE):
+    """
+    Copies every transaction and budget from the text files into a new SQLite
+    database, which is built beside the target and swapped in when complete.
+    Returns (transactions, budgets) counts.
+    """
+    text = TextStorage()
+    text.recover()
+    tmp_path = sqlite_path + ".tmp"
+    for path in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+    target = SQLiteStorage(tmp_path)
+    rows = 0
+    with target.connection:
+        target.connection.executemany(
+            "INSERT INTO transactions (date, type, category, description, amount) VALUES (?, ?, ?, ?, ?)",
+            (
+                (t["date"].strftime("%Y-%m-%d"), t["type"], t["category"], t["description"], t["amount"])
+                for t in text.iter_transactions()
+            ),
+        )
+        rows = target.connection.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    budgets = text.load_budgets()
+    target.save_budgets(budgets)
+    target.connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    target.connection.execute("PRAGMA journal_mode=DELETE")
+    target.connection.close()
+
+    _sqlite_storage.close()
+    for path in (sqlite_path + "-wal", sqlite_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    os.replace(tmp_path, sqlite_path)
+    return rows, len(budgets)
+
+
+_text_storage = TextStorage()
+_sqlite_storage = SQLiteStorage()
+_daemon_storage = DaemonStorage()
@@ -0,0 +1,37 @@
+def _add_line(months, line):
+    date, type, category, _description, amount = line.strip().split(",")
+    categories = months.setdefault(date[:7], {}).setdefault(type, {})
+    categories[category] = categories.get(category, 0) + int(amount)
+
+
+def compute_aggregates(lines):
+    """
+    Sums ledger lines into {"YYYY-MM": {type: {category: amount}}}.
+    """
+    months = {}
+    for line in lines:
+        if line.strip():
+            _add_line(months, line)
+    return months
+
+
+def verify_aggregates(storage):
+    """
+    Recomputes the monthly totals from a storage backend's ledger lines and compares them with its daily totals table.
+    Returns a list of (month, type, category, stored, actual) tuples for every cell that drifted.
+    """
+    stored = storage.daily_totals().month_totals()
+    actual = compute_aggregates(storage.iter_lines())
+    drift = []
+    for month in sorted(set(stored) | set(actual)):
+        stored_month = stored.get(month, {})
+        actual_month = actual.get(month, {})
+        for type in sorted(set(stored_month) | set(actual_month)):
+            stored_type = stored_month.get(type, {})
+            actual_type = actual_month.get(type, {})
+            for category in sorted(set(stored_type) | set(actual_type)):
+                stored_amount = stored_type.get(category, 0)
+                actual_amount = actual_type.get(category, 0)
+                if stored_amount != actual_amount:
+                    drift.append((month, type, category, stored_amount, actual_amount))
+    return drift
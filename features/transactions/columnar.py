@@ -0,0 +1,257 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date
+from features.transactions.records import EPOCH_ORDINAL, Transaction, iter_matching
+
+# Constants
+COLUMNAR_FILE = "database/transactions.bin"
+MAGIC = b"FTLC"
+VERSION = 1
+HEADER = struct.Struct("<4sIQQ")  # magic, version, row count, metadata length
+ALIGNMENT = 8
+
+# Column name -> array/memoryview typecode
+COLUMN_TYPECODES = {
+    "dates": "i",         # int32 days since 1970-01-01
+    "types": "B",         # uint8 code into metadata["types"]
+    "categories": "B",    # uint8 code into metadata["categories"]
+    "amounts": "q",       # int64 paisa/cents
+    "desc_offsets": "Q",  # uint64 offsets into the description heap (rows + 1)
+}
+
+
+def _file_signature(path):
+    """
+    Returns the (size, mtime_ns) pair used to tell whether a text ledger changed.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _pad(length):
+    return (-length) % ALIGNMENT
+
+
+def convert_to_columnar(text_path, columnar_path=COLUMNAR_FILE):
+    """
+    Converts a text ledger into the memory-mappable columnar format.
+    Returns the number of rows written.
+    """
+    dates = array("i")
+    types = array("B")
+    categories = array("B")
+    amounts = array("q")
+    desc_offsets = array("Q", [0])
+    heap = bytearray()
+    type_codes = {}
+    category_codes = {}
+
+    with open(text_path, "r") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                date_str, type, category, description, amount = line.split(",")
+                dates.append(date.fromisoformat(date_str).toordinal() - EPOCH_ORDINAL)
+                amounts.append(int(amount))
+            except ValueError as e:
+                raise ValueError(f"line {line_number}: {e}") from e
+            for value, codes, column in ((type, type_codes, types), (category, category_codes, categories)):
+                if value not in codes:
+                    if len(codes) > 255:
+                        raise ValueError(f"line {line_number}: more than 256 distinct values for a uint8 column")
+                    codes[value] = len(codes)
+                column.append(codes[value])
+            heap += description.encode("utf-8")
+            desc_offsets.append(len(heap))
+
+    columns = {
+        "dates": dates,
+        "types": types,
+        "categories": categories,
+        "amounts": amounts,
+        "desc_offsets": desc_offsets,
+    }
+    layout = {}
+    offset = 0
+    for name, column in columns.items():
+        nbytes = column.itemsize * len(column)
+        layout[name] = [offset, nbytes]
+        offset += nbytes + _pad(nbytes)
+    layout["desc_heap"] = [offset, len(heap)]
+
+    metadata = json.dumps({
+        "byteorder": sys.byteorder,
+        "types": list(type_codes),
+        "categories": list(category_codes),
+        "columns": layout,
+        "source": _file_signature(text_path),
+    }).encode("utf-8")
+    metadata += b" " * _pad(HEADER.size + len(metadata))
+
+    tmp_path = columnar_path + ".tmp"
+    os.makedirs(os.path.dirname(columnar_path) or ".", exist_ok=True)
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(dates), len(metadata)))
+        f.write(metadata)
+        for column in columns.values():
+            nbytes = column.itemsize * len(column)
+            f.write(column.tobytes())
+            f.write(b"\0" * _pad(nbytes))
+        f.write(heap)
+    os.replace(tmp_path, columnar_path)
+    return len(dates)
+
+
+def export_columnar_to_text(columnar_path, text_path):
+    """
+    Writes a columnar ledger back out in the plain text format.
+    Returns the number of rows written.
+    """
+    with ColumnarLedger(columnar_path) as ledger:
+        tmp_path = text_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            for i in range(len(ledger)):
+                f.write(ledger.line(i) + "\n")
+        os.replace(tmp_path, text_path)
+        return len(ledger)
+
+
+def is_fresh(columnar_path, text_path):
+    """
+    True when the columnar file exists and was built from the current text ledger.
+    A columnar file without a text ledger next to it is treated as authoritative.
+    """
+    if not os.path.exists(columnar_path):
+        return False
+    if not os.path.exists(text_path):
+        return True
+    try:
+        with ColumnarLedger(columnar_path) as ledger:
+            return ledger.metadata.get("source") == _file_signature(text_path)
+    except (OSError, ValueError):
+        return False
+
+
+class ColumnarLedger:
+    """
+    Read-only, memory-mapped view over a columnar ledger file.
+
+    Columns are exposed as typed memoryviews straight over the mapping, so opening
+    the file copies nothing; Transaction records are only built when indexed or iterated.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} is not a columnar ledger")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+        self._buffer = memoryview(self._map)
+        magic, version, rows, metadata_length = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {VERSION} columnar ledger")
+        self.metadata = json.loads(bytes(self._buffer[HEADER.size:HEADER.size + metadata_length]))
+        if self.metadata["byteorder"] != sys.byteorder:
+            self.close()
+            raise ValueError(f"{path} was written on a {self.metadata['byteorder']}-endian machine")
+        self._rows = rows
+        base = HEADER.size + metadata_length
+        self._columns = {}
+        for name, (offset, nbytes) in self.metadata["columns"].items():
+            view = self._buffer[base + offset:base + offset + nbytes]
+            typecode = COLUMN_TYPECODES.get(name)
+            self._columns[name] = view.cast(typecode) if typecode else view
+        self.type_names = self.metadata["types"]
+        self.category_names = self.metadata["categories"]
+
+    @property
+    def dates(self):
+        return self._columns["dates"]
+
+    @property
+    def types(self):
+        return self._columns["types"]
+
+    @property
+    def categories(self):
+        return self._columns["categories"]
+
+    @property
+    def amounts(self):
+        return self._columns["amounts"]
+
+    @property
+    def desc_offsets(self):
+        return self._columns["desc_offsets"]
+
+    @property
+    def desc_heap(self):
+        return self._columns["desc_heap"]
+
+    def description(self, i):
+        offsets = self._columns["desc_offsets"]
+        return bytes(self._columns["desc_heap"][offsets[i]:offsets[i + 1]]).decode("utf-8")
+
+    def line(self, i):
+        """
+        Returns row i formatted as a text ledger line (without the newline).
+        """
+        day = date.fromordinal(self.dates[i] + EPOCH_ORDINAL)
+        return ",".join((
+            day.isoformat(),
+            self.type_names[self.types[i]],
+            self.category_names[self.categories[i]],
+            self.description(i),
+            str(self.amounts[i]),
+        ))
+
+    def __len__(self):
+        return self._rows
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self._rows
+        if not 0 <= i < self._rows:
+            raise IndexError("ledger row out of range")
+        return Transaction(
+            self.dates[i] + EPOCH_ORDINAL,
+            self.type_names[self.types[i]],
+            self.category_names[self.categories[i]],
+            self.description(i),
+            self.amounts[i],
+        )
+
+    def __iter__(self):
+        for i in range(self._rows):
+            yield self[i]
+
+    def iter_rows(self, start=None, end=None, type=None, categories=None):
+        """
+        Yields rows matching every given filter without materializing rejected ones.
+        `start` and `end` are inclusive "YYYY-MM-DD" strings.
+        """
+        return iter_matching(self, start, end, type, categories)
+
+    def close(self):
+        for view in getattr(self, "_columns", {}).values():
+            view.release()
+        self._buffer.release()
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
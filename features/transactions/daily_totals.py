@@ -0,0 +1,297 @@
+import json
+import os
+import struct
+from array import array
+from datetime import date
+from features.transactions.records import EPOCH_ORDINAL
+
+# Constants
+DAILY_TOTALS_FILE = "database/daily_totals.bin"
+MAGIC = b"FTDT"
+VERSION = 2
+HEADER = struct.Struct("<4sIQqqqq")  # magic, version, metadata length, first day, days, ledger size, ledger mtime_ns
+ALIGNMENT = 8
+NO_LEDGER = (0, 0)
+DIRTY = (-1, -1)  # source written while rows are being changed in place, so a crash forces a rebuild
+
+
+def _ledger_signature(ledger_path):
+    """
+    Returns the (size, mtime_ns) pair used to detect outside edits to the ledger.
+    """
+    try:
+        stat = os.stat(ledger_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def day_number(value):
+    """
+    Days since 1970-01-01 for a date, datetime or "YYYY-MM-DD" string.
+    """
+    if isinstance(value, str):
+        value = date.fromisoformat(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+class DailyTotals:
+    """
+    Running totals per (type, category) cell for every day the ledger spans.
+
+    Row r of the int64 table holds, for each cell, the sum of all amounts dated
+    before first_day + r, so the total over any inclusive day range is the
+    difference of two rows: O(cells) however many rows or days the range covers.
+    An append only changes the rows from its earliest date onwards, which for
+    new transactions is the last row or two, and save() writes just those rows
+    back in place.
+    """
+
+    def __init__(self, first_day=0, days=0, cells=(), sums=None, source=None):
+        self.first_day = first_day
+        self.days = days
+        self.cells = [tuple(cell) for cell in cells]
+        self._cell_codes = {cell: code for code, cell in enumerate(self.cells)}
+        self.sums = sums if sums is not None else array("q", bytes(8 * (days + 1) * len(self.cells)))
+        self.source = source
+        self._stored = None      # (path, first day, cells, header) as last loaded or saved
+        self._dirty_row = None   # first row changed since then
+
+    def _row(self, day):
+        """
+        The table row holding the sums of everything dated before `day`, clamped to the table.
+        """
+        return min(max(day - self.first_day, 0), self.days)
+
+    def range_totals(self, start=None, end=None):
+        """
+        Returns {type: {category: amount}} for the inclusive day-number range (open ends allowed).
+        """
+        width = len(self.cells)
+        low = 0 if start is None else self._row(start)
+        high = self.days if end is None else self._row(end + 1)
+        totals = {}
+        if high <= low:
+            return totals
+        sums = self.sums
+        low *= width
+        high *= width
+        for code, (type, category) in enumerate(self.cells):
+            amount = sums[high + code] - sums[low + code]
+            if amount:
+                totals.setdefault(type, {})[category] = amount
+        return totals
+
+    def month_totals(self):
+        """
+        Returns {"YYYY-MM": {type: {category: amount}}} for every month holding
+        transactions, with two row lookups per month.
+        """
+        months = {}
+        if not self.days:
+            return months
+        month = date.fromordinal(self.first_day + EPOCH_ORDINAL).replace(day=1)
+        while day_number(month) < self.first_day + self.days:
+            following = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            totals = self.range_totals(day_number(month), day_number(following) - 1)
+            if totals:
+                months[month.strftime("%Y-%m")] = totals
+            month = following
+        return months
+
+    def _add_cells(self, cells):
+        """
+        Widens the table with zero columns for new (type, category) cells.
+        """
+        old_width = len(self.cells)
+        for cell in cells:
+            self._cell_codes[cell] = len(self.cells)
+            self.cells.append(cell)
+        padding = array("q", bytes(8 * (len(self.cells) - old_width)))
+        sums = array("q")
+        for row in range(self.days + 1):
+            sums += self.sums[row * old_width:(row + 1) * old_width]
+            sums += padding
+        self.sums = sums
+
+    def _cover(self, first_day, last_day):
+        """
+        Extends the table so it spans first_day..last_day. Earlier days get
+        zero rows in front; later days repeat the final row.
+        """
+        width = len(self.cells)
+        if not self.days:
+            self.first_day, self.days = first_day, last_day - first_day + 1
+            self.sums = array("q", bytes(8 * (self.days + 1) * width))
+            return
+        if first_day < self.first_day:
+            extra = self.first_day - first_day
+            self.sums[0:0] = array("q", bytes(8 * extra * width))
+            self.first_day = first_day
+            self.days += extra
+        if last_day >= self.first_day + self.days:
+            extra = last_day - (self.first_day + self.days) + 1
+            self.sums += self.sums[self.days * width:] * extra
+            self.days += extra
+
+    def add_lines(self, lines):
+        """
+        Folds ledger lines into the table.
+        """
+        deltas = {}
+        day_cache = {}
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            date_str, type, category, _description, amount = line.split(",")
+            day = day_cache.get(date_str)
+            if day is None:
+                day = day_cache[date_str] = day_number(date_str)
+            cells = deltas.setdefault(day, {})
+            cells[(type, category)] = cells.get((type, category), 0) + int(amount)
+        if not deltas:
+            return
+
+        new_cells = {cell for cells in deltas.values() for cell in cells if cell not in self._cell_codes}
+        if new_cells:
+            self._add_cells(sorted(new_cells))
+        old_days = self.days
+        self._cover(min(deltas), max(deltas))
+
+        width = len(self.cells)
+        sums = self.sums
+        running = {}
+        first_row = min(deltas) - self.first_day + 1
+        self._dirty_row = min(first_row, old_days + 1, self._dirty_row if self._dirty_row is not None else first_row)
+        for row in range(first_row, self.days + 1):
+            for cell, amount in deltas.get(self.first_day + row - 1, {}).items():
+                code = self._cell_codes[cell]
+                running[code] = running.get(code, 0) + amount
+            base = row * width
+            for code, amount in running.items():
+                sums[base + code] += amount
+
+    def _header(self, metadata_length, source):
+        return HEADER.pack(MAGIC, VERSION, metadata_length, self.first_day, self.days, *source)
+
+    def save(self, path=DAILY_TOTALS_FILE):
+        """
+        Stores the table. While the file still holds the table as this object last
+        loaded or saved it, with the same first day and cells, only the header and
+        the rows changed since then are written, in place: O(cells) bytes for an
+        append of new transactions. Anything else replaces the file atomically.
+        """
+        stored = self._stored
+        if stored is not None and stored[:3] == (path, self.first_day, len(self.cells)) and _read_header(path) == stored[3]:
+            self._write_rows(path, stored[3][2])
+        else:
+            self._write_file(path)
+        self._dirty_row = None
+
+    def _write_rows(self, path, metadata_length):
+        width = len(self.cells)
+        first = self.days + 1 if self._dirty_row is None else self._dirty_row
+        with open(path, "r+b") as f:
+            f.write(self._header(metadata_length, DIRTY))
+            f.flush()
+            f.seek(HEADER.size + metadata_length + first * width * 8)
+            f.write(memoryview(self.sums)[first * width:])
+            f.flush()
+            f.seek(0)
+            header = self._header(metadata_length, _source_fields(self.source))
+            f.write(header)
+        self._stored = (path, self.first_day, len(self.cells), HEADER.unpack(header))
+
+    def _write_file(self, path):
+        metadata = json.dumps({"cells": self.cells}).encode("utf-8")
+        metadata += b" " * ((-len(metadata) - HEADER.size) % ALIGNMENT)
+        header = self._header(len(metadata), _source_fields(self.source))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(header)
+            f.write(metadata)
+            self.sums.tofile(f)
+        os.replace(path + ".tmp", path)
+        self._stored = (path, self.first_day, len(self.cells), HEADER.unpack(header))
+
+    @classmethod
+    def load(cls, path=DAILY_TOTALS_FILE):
+        """
+        Reads a stored table, or returns None when there is no usable one.
+        """
+        try:
+            with open(path, "rb") as f:
+                header = HEADER.unpack(f.read(HEADER.size))
+                magic, version, metadata_length, first_day, days, *source = header
+                if magic != MAGIC or version != VERSION:
+                    return None
+                metadata = json.loads(f.read(metadata_length))
+                sums = array("q")
+                sums.frombytes(f.read())
+        except (FileNotFoundError, struct.error, ValueError):
+            return None
+        if len(sums) != (days + 1) * len(metadata["cells"]):
+            return None
+        daily_totals = cls(first_day, days, metadata["cells"], sums, None if tuple(source) == NO_LEDGER else source)
+        daily_totals._stored = (path, first_day, len(daily_totals.cells), header)
+        return daily_totals
+
+
+def _source_fields(source):
+    return NO_LEDGER if source is None else tuple(source)
+
+
+def _read_header(path):
+    try:
+        with open(path, "rb") as f:
+            return HEADER.unpack(f.read(HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return None
+
+
+def rebuild_daily_totals(ledger_path, totals_path=DAILY_TOTALS_FILE):
+    """
+    Recomputes the table from the raw ledger and stores it.
+    """
+    daily_totals = DailyTotals()
+    try:
+        with open(ledger_path, "r") as f:
+            daily_totals.add_lines(f)
+    except FileNotFoundError:
+        pass
+    daily_totals.source = _ledger_signature(ledger_path)
+    daily_totals.save(totals_path)
+    return daily_totals
+
+
+def ensure_daily_totals(ledger_path, totals_path=DAILY_TOTALS_FILE, cached=None):
+    """
+    Returns a table that matches the ledger: `cached` when it is still current,
+    otherwise the stored one, rebuilding only when the ledger was changed
+    without going through add_to_daily_totals.
+    """
+    signature = _ledger_signature(ledger_path)
+    if cached is not None and cached.source == signature:
+        return cached
+    daily_totals = DailyTotals.load(totals_path)
+    if daily_totals is None or daily_totals.source != signature:
+        daily_totals = rebuild_daily_totals(ledger_path, totals_path)
+    return daily_totals
+
+
+def commit_daily_totals(daily_totals, ledger_path, totals_path=DAILY_TOTALS_FILE):
+    """
+    Stores a table once the lines folded into it with add_lines have been written to the ledger.
+    """
+    daily_totals.source = _ledger_signature(ledger_path)
+    daily_totals.save(totals_path)
+
+
+def add_to_daily_totals(daily_totals, lines, ledger_path, totals_path=DAILY_TOTALS_FILE):
+    """
+    Folds freshly written ledger lines into the table and stores it.
+    `daily_totals` must be the table that matched the ledger before the lines were written.
+    """
+    daily_totals.add_lines(lines)
+    commit_daily_totals(daily_totals, ledger_path, totals_path)
@@ -0,0 +1,360 @@
+import bisect
+import heapq
+import json
+import os
+import tempfile
+import numpy as np
+from features.storage.journal import fsync_dir
+
+# Constants
+DATE_ORDER_FILE = "database/date_order.json"
+MERGE_MIN_ROWS = 50_000
+MERGE_RATIO = 0.1       # merge once the delta holds this share of the sorted run
+READ_BLOCK = 64 * 1024
+PAST_END = b"\xff"      # sorts after every date; stands for positions past the last line of the run
+
+
+def _ledger_signature(ledger_path):
+    """
+    Returns the (size, mtime_ns) pair used to detect outside edits to the ledger.
+    """
+    try:
+        stat = os.stat(ledger_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _date(line):
+    return line[:10]
+
+
+def _day_key(date_str):
+    """
+    Turns a "YYYY-MM-DD" date (str or bytes) into the number YYYYMMDD, which sorts the same way.
+    """
+    return int(date_str[0:4]) * 10000 + int(date_str[5:7]) * 100 + int(date_str[8:10])
+
+
+def _line_start(f, position):
+    """
+    Returns the offset of the first line starting at or after `position`.
+    """
+    if position == 0:
+        return 0
+    f.seek(position - 1)
+    f.readline()
+    return f.tell()
+
+
+class _RunDates:
+    """
+    Read-only sequence over the byte positions of the sorted run, for bisect:
+    item i is the date of the first non-blank line starting at or after byte i,
+    which never decreases as i grows because the run is in date order.
+    """
+
+    def __init__(self, f, run_bytes):
+        self.f = f
+        self.run_bytes = run_bytes
+
+    def __len__(self):
+        return self.run_bytes
+
+    def __getitem__(self, position):
+        position = _line_start(self.f, position)
+        self.f.seek(position)
+        while position < self.run_bytes:
+            line = self.f.readline()
+            if line.strip():
+                return line[:10]
+            position += len(line)
+        return PAST_END
+
+
+def _run_offset(f, run_bytes, date_str):
+    """
+    Binary-searches the run for the offset of the first line dated on or after date_str.
+    """
+    position = bisect.bisect_left(_RunDates(f, run_bytes), date_str.encode("ascii"))
+    return min(_line_start(f, position), run_bytes)
+
+
+def _run_lines(f, start, stop, end_str=None):
+    """
+    Yields the lines between two offsets of the run in file order, stopping at the first one dated after end_str.
+    """
+    end = end_str.encode("ascii") if end_str else None
+    f.seek(start)
+    position = start
+    while position < stop:
+        line = f.readline()
+        if not line:
+            return
+        position += len(line)
+        if not line.strip():
+            continue
+        if end and line[:10] > end:
+            return
+        yield line.rstrip(b"\r\n").decode("utf-8")
+
+
+def _lines_at(f, offsets):
+    """
+    Yields the lines starting at the given byte offsets, in the order given.
+    """
+    for offset in offsets:
+        f.seek(int(offset))
+        yield f.readline().rstrip(b"\r\n").decode("utf-8")
+
+
+def _reverse_lines(f, start, stop):
+    """
+    Yields the lines between two line starts from last to first, reading backwards one block at a time.
+    """
+    position = stop
+    tail = b""
+    while position > start:
+        size = min(READ_BLOCK, position - start)
+        position -= size
+        f.seek(position)
+        pieces = (f.read(size) + tail).split(b"\n")
+        if position > start:
+            # The first piece may be the end of a line that starts in the next block back.
+            tail = pieces.pop(0)
+        for line in reversed(pieces):
+            if line.strip():
+                yield line.rstrip(b"\r").decode("utf-8")
+
+
+class DateOrder:
+    """
+    How much of the ledger is already in date order.
+
+    The ledger file is a sorted run, its first run_bytes bytes holding run_rows
+    rows in non-decreasing date order, followed by a delta of rows that were
+    appended out of order. Appends dated on or after the end of the run simply
+    extend it, which covers everyday use; anything older goes to the delta.
+    Date-range reads binary-search the run on disk with bisect and the delta
+    through an index held in memory, its rows' dates and byte offsets sorted by
+    date (12 bytes a row, however long the lines), so they cost O(log n) seeks
+    plus the rows returned instead of a scan of the whole ledger. A ledger that
+    arrives out of order as a whole, kept newest first say, is read this way
+    as it stands.
+
+    Once the delta reaches MERGE_RATIO of the run (and at least MERGE_MIN_ROWS
+    rows), an append has merge_ledger fold it back in; see there for what that costs.
+    """
+
+    def __init__(self, run_bytes=0, run_rows=0, last_date="", delta_rows=0, source=None):
+        self.run_bytes = run_bytes
+        self.run_rows = run_rows
+        self.last_date = last_date
+        self.delta_rows = delta_rows
+        self.source = source
+        self._delta = None
+        self._end = 0  # ledger size the loaded delta index reaches, where the next appended line starts
+
+    def add_lines(self, lines):
+        """
+        Records lines just appended to the ledger, extending the run while they stay in date order.
+        """
+        keys = []
+        offsets = []
+        for line in lines:
+            date_str = _date(line)
+            length = len(line.encode("utf-8")) + 1
+            if not self.delta_rows and date_str >= self.last_date:
+                self.run_bytes += length
+                self.run_rows += 1
+                self.last_date = date_str
+            else:
+                self.delta_rows += 1
+                keys.append(_day_key(date_str))
+                offsets.append(self._end)
+            self._end += length
+        if keys and self._delta is not None:
+            order = np.argsort(np.array(keys, dtype=np.int32), kind="stable")
+            keys = np.array(keys, dtype=np.int32)[order]
+            delta_keys, delta_offsets = self._delta
+            # New rows go after every stored row of their date, keeping ties in file order.
+            positions = np.searchsorted(delta_keys, keys, side="right")
+            self._delta = (
+                np.insert(delta_keys, positions, keys),
+                np.insert(delta_offsets, positions, np.array(offsets, dtype=np.uint64)[order]),
+            )
+
+    def needs_merge(self):
+        return self.delta_rows >= max(MERGE_MIN_ROWS, self.run_rows * MERGE_RATIO)
+
+    def delta(self, ledger_path):
+        """
+        Returns the delta index, read from the ledger on first use: the rows'
+        dates as YYYYMMDD numbers and their byte offsets, as two arrays sorted
+        by date with rows of the same date in file order.
+        """
+        if self._delta is None:
+            keys = []
+            offsets = []
+            position = self.run_bytes
+            if self.delta_rows:
+                with open(ledger_path, "rb") as f:
+                    f.seek(position)
+                    for line in f:
+                        if line.strip():
+                            keys.append(_day_key(line))
+                            offsets.append(position)
+                        position += len(line)
+            keys = np.array(keys, dtype=np.int32)
+            order = np.argsort(keys, kind="stable")
+            self._delta = (keys[order], np.array(offsets, dtype=np.uint64)[order])
+            self._end = position
+        return self._delta
+
+    def range_lines(self, ledger_path, start_str=None, end_str=None):
+        """
+        Yields the raw lines dated within the inclusive range (open ends allowed) in date order.
+        """
+        keys, offsets = self.delta(ledger_path)
+        low = np.searchsorted(keys, _day_key(start_str), side="left") if start_str else 0
+        high = np.searchsorted(keys, _day_key(end_str), side="right") if end_str else len(keys)
+        with open(ledger_path, "rb") as f, open(ledger_path, "rb") as delta_file:
+            first = _run_offset(f, self.run_bytes, start_str) if start_str else 0
+            yield from heapq.merge(
+                _run_lines(f, first, self.run_bytes, end_str), _lines_at(delta_file, offsets[low:high]), key=_date,
+            )
+
+    def newest_lines(self, ledger_path, start_str=None):
+        """
+        Yields the raw lines dated on or after start_str, newest first; among rows
+        of the same date the most recently added comes first.
+        """
+        keys, offsets = self.delta(ledger_path)
+        low = np.searchsorted(keys, _day_key(start_str), side="left") if start_str else 0
+        with open(ledger_path, "rb") as f, open(ledger_path, "rb") as delta_file:
+            first = _run_offset(f, self.run_bytes, start_str) if start_str else 0
+            yield from heapq.merge(
+                _lines_at(delta_file, offsets[low:][::-1]), _reverse_lines(f, first, self.run_bytes), key=_date, reverse=True,
+            )
+
+    def save(self, path=DATE_ORDER_FILE):
+        """
+        Atomically replaces the stored description of the ledger's order. Each
+        save writes a temp file of its own, so processes that refresh the
+        description at the same time never rename one another's.
+        """
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({
+                    "source": self.source,
+                    "run_bytes": self.run_bytes,
+                    "run_rows": self.run_rows,
+                    "last_date": self.last_date,
+                    "delta_rows": self.delta_rows,
+                }, f, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path=DATE_ORDER_FILE):
+        """
+        Reads the stored description, or returns None when there is no usable one.
+        """
+        try:
+            with open(path, "r") as f:
+                stored = json.load(f)
+            return cls(stored["run_bytes"], stored["run_rows"], stored["last_date"], stored["delta_rows"], stored["source"])
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+
+def scan_date_order(ledger_path, order_path=DATE_ORDER_FILE):
+    """
+    Measures the longest date-ordered prefix of the ledger in one pass and stores the result.
+    """
+    order = DateOrder()
+    last = b""
+    position = 0
+    try:
+        with open(ledger_path, "rb") as f:
+            for line in f:
+                position += len(line)
+                if line.strip():
+                    if order.delta_rows or line[:10] < last:
+                        order.delta_rows += 1
+                        continue
+                    last = line[:10]
+                    order.run_rows += 1
+                if not order.delta_rows:
+                    order.run_bytes = position
+    except FileNotFoundError:
+        pass
+    order.last_date = last.decode("ascii")
+    order.source = _ledger_signature(ledger_path)
+    order.save(order_path)
+    return order
+
+
+def ensure_date_order(ledger_path, order_path=DATE_ORDER_FILE, cached=None):
+    """
+    Returns a description that matches the ledger: `cached` when it is still
+    current, otherwise the stored one, scanning the ledger again only when it
+    was changed without going through commit_date_order or merge_ledger.
+    """
+    signature = _ledger_signature(ledger_path)
+    if cached is not None and cached.source == signature:
+        return cached
+    order = DateOrder.load(order_path)
+    if order is None or order.source != signature:
+        order = scan_date_order(ledger_path, order_path)
+    return order
+
+
+def commit_date_order(order, ledger_path, order_path=DATE_ORDER_FILE):
+    """
+    Stores a description once the lines recorded in it with add_lines have been written to the ledger.
+    """
+    order.source = _ledger_signature(ledger_path)
+    order.save(order_path)
+
+
+def merge_ledger(order, ledger_path, order_path=DATE_ORDER_FILE):
+    """
+    Rewrites the ledger fully in date order and returns its new DateOrder.
+
+    The run is streamed from disk and merged with the sorted delta into a temp
+    file that is fsynced and renamed over the ledger, so the cost is one
+    sequential read and write of the whole file plus sorting the delta and
+    reading its rows at their offsets: O(n + d log d) time for n ledger rows
+    and d delta rows, and 12 bytes of memory per delta row.
+    Because a merge only happens after the delta has grown to MERGE_RATIO of
+    the run, each out-of-order row pays for about 1 / MERGE_RATIO rows copied.
+    Rows of the same date keep their order, run rows before delta rows.
+    benchmarks/date_order_benchmark.py measures it.
+    """
+    _keys, offsets = order.delta(ledger_path)
+    tmp_path = ledger_path + ".tmp"
+    last_date = order.last_date
+    with open(ledger_path, "rb") as source, open(ledger_path, "rb") as delta_file, open(tmp_path, "w") as out:
+        for line in heapq.merge(_run_lines(source, 0, order.run_bytes), _lines_at(delta_file, offsets), key=_date):
+            out.write(line + "\n")
+            last_date = _date(line)
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, ledger_path)
+    fsync_dir(ledger_path)
+
+    merged = DateOrder(
+        os.path.getsize(ledger_path),
+        order.run_rows + len(offsets),
+        last_date,
+        source=_ledger_signature(ledger_path),
+    )
+    merged.delta(ledger_path)
+    merged.save(order_path)
+    return merged
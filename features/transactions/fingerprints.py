@@ -0,0 +1,205 @@
+import mmap
+import os
+import struct
+from hashlib import blake2b
+
+# Constants
+FINGERPRINTS_FILE = "database/fingerprints.bin"
+MAGIC = b"FTFP"
+VERSION = 2
+HEADER = struct.Struct("<4sIQQqq")  # magic, version, capacity, count, ledger size, ledger mtime_ns
+MIN_CAPACITY = 1 << 16
+MAX_LOAD = 0.7
+DIRTY = (-1, -1)  # source written while slots are being changed, so a crash forces a rebuild
+NO_LEDGER = (0, 0)
+
+
+def _ledger_signature(ledger_path):
+    """
+    Returns the (size, mtime_ns) pair used to detect outside edits to the ledger.
+    """
+    try:
+        stat = os.stat(ledger_path)
+    except FileNotFoundError:
+        return NO_LEDGER
+    return stat.st_size, stat.st_mtime_ns
+
+
+def fingerprint(line):
+    """
+    Returns the non-zero 64-bit hash identifying a ledger line.
+    """
+    digest = blake2b(line.strip().encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+
+class FingerprintIndex:
+    """
+    Memory-mapped open-addressing hash table counting 64-bit line fingerprints.
+
+    The file is a small header followed by a power-of-two table of uint64 slots
+    (0 marks an empty slot), kept at most 70% full, and a uint32 count for each
+    slot: how many times the fingerprint was added, i.e. how many copies of the
+    line the ledger holds. A lookup or insert probes a handful of slots and tens
+    of millions of rows fit in a few hundred MiB. Pages are loaded by the OS only when probed.
+    """
+
+    def __init__(self, path=FINGERPRINTS_FILE):
+        self.path = path
+        self._file = open(path, "r+b")
+        self._map()
+
+    @classmethod
+    def create(cls, path=FINGERPRINTS_FILE, capacity=MIN_CAPACITY):
+        """
+        Writes an empty index with room for `capacity` slots (rounded up to a power of two).
+        """
+        size = MIN_CAPACITY
+        while size < capacity:
+            size *= 2
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, size, 0, *DIRTY))
+            f.truncate(HEADER.size + size * 12)
+        return cls(path)
+
+    def _map(self):
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        magic, version, self.capacity, self.count, *source = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            self._file.close()
+            raise ValueError(f"{self.path} is not a fingerprint index")
+        self.source = tuple(source)
+        self._slots = memoryview(self._mmap)[HEADER.size:HEADER.size + self.capacity * 8].cast("Q")
+        self._counts = memoryview(self._mmap)[HEADER.size + self.capacity * 8:].cast("I")
+        self._mask = self.capacity - 1
+
+    def _write_header(self):
+        HEADER.pack_into(self._mmap, 0, MAGIC, VERSION, self.capacity, self.count, *self.source)
+
+    def set_source(self, source):
+        self.source = tuple(source)
+        self._write_header()
+
+    def _find(self, value):
+        """
+        Returns the slot holding a fingerprint, or the empty slot where it would go.
+        """
+        slots, mask = self._slots, self._mask
+        i = value & mask
+        while True:
+            slot = slots[i]
+            if slot == value or slot == 0:
+                return i
+            i = (i + 1) & mask
+
+    def __contains__(self, value):
+        return self._slots[self._find(value)] == value
+
+    def copies(self, value):
+        """
+        Returns how many times a fingerprint was added; 0 when it never was.
+        """
+        i = self._find(value)
+        return self._counts[i] if self._slots[i] == value else 0
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value, copies=1):
+        """
+        Counts `copies` more of a fingerprint and returns its new count.
+        """
+        if (self.count + 1) > self.capacity * MAX_LOAD:
+            self._grow()
+        i = self._find(value)
+        if self._slots[i] == 0:
+            self._slots[i] = value
+            self.count += 1
+        self._counts[i] += copies
+        return self._counts[i]
+
+    def add_lines(self, lines):
+        """
+        Inserts the fingerprints of ledger lines, marking the index dirty until commit_fingerprints.
+        """
+        self.set_source(DIRTY)
+        for line in lines:
+            self.add(fingerprint(line))
+
+    def _grow(self):
+        """
+        Rehashes into a table twice the size, built beside this one and swapped in.
+        """
+        bigger = FingerprintIndex.create(self.path + ".tmp", self.capacity * 2)
+        for value, copies in zip(self._slots, self._counts):
+            if value:
+                bigger.add(value, copies)
+        bigger.set_source(self.source)
+        bigger.close()
+        self.close()
+        os.replace(self.path + ".tmp", self.path)
+        self._file = open(self.path, "r+b")
+        self._map()
+
+    def close(self):
+        if self._mmap is None:
+            return
+        self._slots.release()
+        self._counts.release()
+        self._write_header()
+        self._mmap.flush()
+        self._mmap.close()
+        self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def rebuild_fingerprints(ledger_path, index_path=FINGERPRINTS_FILE):
+    """
+    Recomputes the index from every line of the ledger. Returns the open index.
+    """
+    rows = 0
+    if os.path.exists(ledger_path):
+        with open(ledger_path, "rb") as f:
+            rows = sum(1 for _ in f)
+    tmp_path = index_path + ".tmp"
+    index = FingerprintIndex.create(tmp_path, int(rows / MAX_LOAD) + 1)
+    if rows:
+        with open(ledger_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    index.add(fingerprint(line))
+    index.set_source(_ledger_signature(ledger_path))
+    index.close()
+    os.replace(tmp_path, index_path)
+    return FingerprintIndex(index_path)
+
+
+def ensure_fingerprints(ledger_path, index_path=FINGERPRINTS_FILE):
+    """
+    Returns an open index that matches the ledger, rebuilding it only when the
+    ledger was changed without going through commit_fingerprints.
+    """
+    try:
+        index = FingerprintIndex(index_path)
+    except (FileNotFoundError, ValueError):
+        return rebuild_fingerprints(ledger_path, index_path)
+    if index.source != _ledger_signature(ledger_path):
+        index.close()
+        return rebuild_fingerprints(ledger_path, index_path)
+    return index
+
+
+def commit_fingerprints(index, ledger_path):
+    """
+    Marks the index as matching the ledger once the lines added with add_lines have been written to it, and closes it.
+    """
+    index.set_source(_ledger_signature(ledger_path))
+    index.close()
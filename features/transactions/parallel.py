@@ -0,0 +1,79 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from features.transactions.records import TransactionColumns
+
+# Constants
+CHUNK_SIZE = 32 * 1024 * 1024      # bytes handed to each worker task
+PARALLEL_MIN_BYTES = 64 * 1024 * 1024  # below this, pool startup costs more than it saves
+PARALLEL_WORKERS = None            # None means one worker per CPU
+
+
+def parse_block(block, columns=None):
+    """
+    Parses the complete ledger lines in a block of bytes into `columns`
+    (a new TransactionColumns container when not given) and returns it.
+    """
+    if columns is None:
+        columns = TransactionColumns()
+    for line in block.decode("utf-8").split("\n"):
+        line = line.strip()
+        if line:
+            columns.append_fields(*line.split(","))
+    return columns
+
+
+def _parse_range(path, start, end):
+    """
+    Parses the complete lines in bytes [start, end) of a ledger file.
+    `start` and `end` must both sit on line boundaries.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        return parse_block(f.read(end - start))
+
+
+def chunk_ranges(path, end, chunk_size=None):
+    """
+    Splits bytes [0, end) of a file into roughly chunk_size ranges (default CHUNK_SIZE) that each end on a newline.
+    """
+    chunk_size = chunk_size or CHUNK_SIZE
+    ranges = []
+    start = 0
+    with open(path, "rb") as f:
+        while start < end:
+            stop = start + chunk_size
+            if stop < end:
+                f.seek(stop - 1)
+                f.readline()
+                stop = f.tell()
+            stop = min(stop, end)
+            ranges.append((start, stop))
+            start = stop
+    return ranges
+
+
+def parse_ledger(path, end=None, workers=None, chunk_size=None, min_parallel_bytes=None):
+    """
+    Parses bytes [0, end) of a text ledger into a TransactionColumns container.
+
+    Large files are split into newline-aligned byte ranges that are parsed in a
+    process pool and merged back in file order.
+    Files smaller than min_parallel_bytes, or runs with a single worker, take the
+    serial path because starting the pool would cost more than it saves.
+    Arguments left as None take the module constants as they are at call time.
+    """
+    if end is None:
+        end = os.path.getsize(path)
+    workers = workers or PARALLEL_WORKERS or os.cpu_count() or 1
+    if min_parallel_bytes is None:
+        min_parallel_bytes = PARALLEL_MIN_BYTES
+
+    if end < min_parallel_bytes or workers == 1:
+        columns = _parse_range(path, 0, end)
+    else:
+        ranges = chunk_ranges(path, end, chunk_size)
+        columns = TransactionColumns()
+        with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+            for chunk in pool.map(_parse_range, [path] * len(ranges), *zip(*ranges)):
+                columns.extend(chunk)
+    return columns
@@ -0,0 +1,188 @@
+import sys
+from array import array
+from datetime import date, datetime
+
+# Constants
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+FIELDS = ("date", "type", "category", "description", "amount")
+
+
+class Transaction:
+    """
+    One ledger row in a compact form: the date is kept as a proleptic ordinal and
+    type/category are interned, so thousands of rows share the same few strings.
+    Rows are read with the same keys the old dicts used (t["date"], t["amount"], ...).
+    """
+
+    __slots__ = ("ordinal", "type", "category", "description", "amount")
+
+    def __init__(self, ordinal, type, category, description, amount):
+        self.ordinal = ordinal
+        self.type = type
+        self.category = category
+        self.description = description
+        self.amount = amount
+
+    @classmethod
+    def from_fields(cls, date_str, type, category, description, amount):
+        """
+        Builds a row from the five text fields of a ledger line.
+        """
+        return cls(
+            date.fromisoformat(date_str).toordinal(),
+            sys.intern(type),
+            sys.intern(category),
+            description,
+            int(amount),
+        )
+
+    @property
+    def date(self):
+        return datetime.fromordinal(self.ordinal)
+
+    def __getitem__(self, key):
+        if key not in FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return self[key] if key in FIELDS else default
+
+    def __repr__(self):
+        return (
+            f"Transaction({date.fromordinal(self.ordinal).isoformat()}, {self.type}, "
+            f"{self.category}, {self.description!r}, {self.amount})"
+        )
+
+
+def iter_matching(columns, start=None, end=None, type=None, categories=None):
+    """
+    Yields the rows of a column container (TransactionColumns or ColumnarLedger)
+    that match every given filter. Filters are checked against the integer
+    columns, so rejected rows never materialize. `start` and `end` are
+    inclusive "YYYY-MM-DD" strings.
+    """
+    first_day = date.fromisoformat(start).toordinal() - EPOCH_ORDINAL if start else None
+    last_day = date.fromisoformat(end).toordinal() - EPOCH_ORDINAL if end else None
+    type_code = None
+    if type is not None:
+        if type not in columns.type_names:
+            return
+        type_code = columns.type_names.index(type)
+    category_codes = None
+    if categories is not None:
+        category_codes = {code for code, name in enumerate(columns.category_names) if name in categories}
+
+    dates, types, category_column = columns.dates, columns.types, columns.categories
+    for i in range(len(columns)):
+        day = dates[i]
+        if (first_day is not None and day < first_day) or (last_day is not None and day > last_day):
+            continue
+        if type_code is not None and types[i] != type_code:
+            continue
+        if category_codes is not None and category_column[i] not in category_codes:
+            continue
+        yield columns[i]
+
+
+class TransactionColumns:
+    """
+    Array-backed container holding the same rows as a list of Transactions in a
+    fraction of the memory: int32 day numbers, uint8 type/category codes, int64
+    amounts and one UTF-8 heap for all descriptions. Indexing or iterating
+    materializes Transaction records on demand.
+    """
+
+    def __init__(self):
+        self.dates = array("i")
+        self.types = array("B")
+        self.categories = array("B")
+        self.amounts = array("q")
+        self.desc_offsets = array("Q", [0])
+        self.desc_heap = bytearray()
+        self.type_names = []
+        self.category_names = []
+        self._type_codes = {}
+        self._category_codes = {}
+
+    @classmethod
+    def from_columnar(cls, ledger):
+        """
+        Copies an open ColumnarLedger into memory with bulk buffer copies.
+        """
+        columns = cls()
+        columns.dates.frombytes(ledger.dates.cast("B"))
+        columns.types.frombytes(ledger.types.cast("B"))
+        columns.categories.frombytes(ledger.categories.cast("B"))
+        columns.amounts.frombytes(ledger.amounts.cast("B"))
+        columns.desc_offsets = array("Q")
+        columns.desc_offsets.frombytes(ledger.desc_offsets.cast("B"))
+        columns.desc_heap = bytearray(ledger.desc_heap)
+        columns.type_names = [sys.intern(name) for name in ledger.type_names]
+        columns.category_names = [sys.intern(name) for name in ledger.category_names]
+        columns._type_codes = {name: code for code, name in enumerate(columns.type_names)}
+        columns._category_codes = {name: code for code, name in enumerate(columns.category_names)}
+        return columns
+
+    def _code(self, value, names, codes):
+        code = codes.get(value)
+        if code is None:
+            if len(names) > 255:
+                raise ValueError(f"more than 256 distinct values while adding {value!r}")
+            code = codes[value] = len(names)
+            names.append(sys.intern(value))
+        return code
+
+    def append_fields(self, date_str, type, category, description, amount):
+        """
+        Appends one row from the five text fields of a ledger line.
+        """
+        day = date.fromisoformat(date_str).toordinal() - EPOCH_ORDINAL
+        amount = int(amount)
+        type_code = self._code(type, self.type_names, self._type_codes)
+        category_code = self._code(category, self.category_names, self._category_codes)
+        self.dates.append(day)
+        self.types.append(type_code)
+        self.categories.append(category_code)
+        self.amounts.append(amount)
+        self.desc_heap += description.encode("utf-8")
+        self.desc_offsets.append(len(self.desc_heap))
+
+    def extend(self, other):
+        """
+        Appends every row of another container, remapping its type/category codes onto this one's.
+        """
+        for names, codes, column, other_names, other_column in (
+            (self.type_names, self._type_codes, self.types, other.type_names, other.types),
+            (self.category_names, self._category_codes, self.categories, other.category_names, other.categories),
+        ):
+            table = bytearray(range(256))
+            for code, name in enumerate(other_names):
+                table[code] = self._code(name, names, codes)
+            column.frombytes(other_column.tobytes().translate(table))
+        self.dates.extend(other.dates)
+        self.amounts.extend(other.amounts)
+        base = len(self.desc_heap)
+        self.desc_heap += other.desc_heap
+        self.desc_offsets.extend(offset + base for offset in other.desc_offsets[1:])
+
+    def description(self, i):
+        return self.desc_heap[self.desc_offsets[i]:self.desc_offsets[i + 1]].decode("utf-8")
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self.dates)
+        return Transaction(
+            self.dates[i] + EPOCH_ORDINAL,
+            self.type_names[self.types[i]],
+            self.category_names[self.categories[i]],
+            self.description(i),
+            self.amounts[i],
+        )
+
+    def __iter__(self):
+        for i in range(len(self.dates)):
+            yield self[i]
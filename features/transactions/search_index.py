@@ -0,0 +1,371 @@
+import json
+import os
+import struct
+import numpy as np
+
+# Constants
+SEARCH_INDEX_FILE = "database/search_index.bin"
+SEARCH_LOG_SUFFIX = ".log"
+MAGIC = b"FTSI"
+VERSION = 1
+HEADER = struct.Struct("<4sIQ")  # magic, version, metadata length
+ALIGNMENT = 8
+COMPACT_ROWS = 100_000   # appended rows kept in the log before it is folded into the base file
+SEARCH_LIMIT = 100
+
+
+def _ledger_signature(ledger_path):
+    """
+    Returns the (size, mtime_ns) pair used to detect outside edits to the ledger.
+    """
+    try:
+        stat = os.stat(ledger_path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _key(description):
+    # Searches ignore case; the leading space lets a trigram mark the start of a word.
+    return " " + description.lower()
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def parse_query(query):
+    """
+    Returns the text a matching description key must contain: a trailing "*"
+    asks for a word starting with the query, anything else is a plain substring.
+    """
+    query = query.strip().lower()
+    if query.endswith("*"):
+        return " " + query[:-1].strip()
+    return query
+
+
+def description_matches(description, query):
+    return parse_query(query) in _key(description)
+
+
+def _csr(keys, values, key_count):
+    """
+    Groups values by key: returns (offsets, values ordered by key), so the values
+    of key k are ordered_values[offsets[k]:offsets[k + 1]] in their original order.
+    """
+    order = np.argsort(keys, kind="stable")
+    offsets = np.zeros(key_count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=key_count), out=offsets[1:])
+    return offsets, np.ascontiguousarray(values[order], dtype=np.uint32)
+
+
+class SearchIndex:
+    """
+    Trigram index over transaction descriptions.
+
+    Descriptions repeat a lot, so the index works on the distinct lower-cased
+    descriptions: each trigram lists the distinct descriptions containing it and
+    each distinct description lists the ledger rows (in file order) that carry
+    it. A query intersects the posting lists of its trigrams, checks the few
+    surviving descriptions for the exact substring and expands them to rows.
+
+    The base file holds these lists as flat arrays; rows appended later are kept
+    in memory and in a JSON-lines log beside it until there are enough of them
+    to rewrite the base file.
+    """
+
+    def __init__(self, descriptions, trigram_names, trigram_offsets, trigram_descs, row_offsets, desc_rows, rows, source=None):
+        self.descriptions = descriptions
+        self.trigrams = {name: code for code, name in enumerate(trigram_names)}
+        self.trigram_offsets = trigram_offsets
+        self.trigram_descs = trigram_descs
+        self.row_offsets = row_offsets
+        self.desc_rows = desc_rows
+        self.base_rows = rows
+        self.rows = rows
+        self.source = source
+        self.logged_rows = 0
+        self._desc_ids = None
+        self._extra_trigrams = {}
+        self._extra_rows = {}
+
+    @classmethod
+    def from_descriptions(cls, descriptions, row_descs, source=None):
+        """
+        Builds the index from the distinct description keys and the key id of every row.
+        """
+        trigram_codes = {}
+        pairs = []
+        for desc_id, text in enumerate(descriptions):
+            for trigram in _trigrams(text):
+                code = trigram_codes.setdefault(trigram, len(trigram_codes))
+                pairs.append((code, desc_id))
+        pairs = np.array(pairs, dtype=np.int64).reshape(-1, 2)
+        trigram_offsets, trigram_descs = _csr(pairs[:, 0], pairs[:, 1], len(trigram_codes))
+        row_descs = np.asarray(row_descs, dtype=np.int64)
+        row_offsets, desc_rows = _csr(row_descs, np.arange(len(row_descs)), len(descriptions))
+        return cls(descriptions, list(trigram_codes), trigram_offsets, trigram_descs, row_offsets, desc_rows, len(row_descs), source)
+
+    @classmethod
+    def build(cls, descriptions, source=None):
+        """
+        Builds the index from every row's description, in ledger order.
+        """
+        desc_ids = {}
+        row_descs = []
+        for description in descriptions:
+            row_descs.append(desc_ids.setdefault(_key(description), len(desc_ids)))
+        return cls.from_descriptions(list(desc_ids), row_descs, source)
+
+    def _desc_id_map(self):
+        if self._desc_ids is None:
+            self._desc_ids = {text: desc_id for desc_id, text in enumerate(self.descriptions)}
+        return self._desc_ids
+
+    def add_descriptions(self, descriptions):
+        """
+        Indexes the descriptions of rows appended after the current last row.
+        """
+        desc_ids = self._desc_id_map()
+        for description in descriptions:
+            text = _key(description)
+            desc_id = desc_ids.get(text)
+            if desc_id is None:
+                desc_id = desc_ids[text] = len(self.descriptions)
+                self.descriptions.append(text)
+                for trigram in _trigrams(text):
+                    self._extra_trigrams.setdefault(trigram, []).append(desc_id)
+            self._extra_rows.setdefault(desc_id, []).append(self.rows)
+            self.rows += 1
+
+    def add_lines(self, lines):
+        """
+        Indexes the descriptions of ledger lines appended after the current last row.
+        """
+        self.add_descriptions(_line_descriptions(lines))
+
+    def _trigram_descs(self, trigram):
+        code = self.trigrams.get(trigram)
+        base = self.trigram_descs[int(self.trigram_offsets[code]):int(self.trigram_offsets[code + 1])] if code is not None else ()
+        extra = self._extra_trigrams.get(trigram, ())
+        return np.concatenate([np.asarray(base, dtype=np.uint32), np.asarray(extra, dtype=np.uint32)])
+
+    def matching_descriptions(self, query):
+        """
+        Returns the ids of the distinct descriptions that match a query.
+        """
+        needle = parse_query(query)
+        trigrams = sorted(_trigrams(needle), key=lambda trigram: len(self._trigram_descs(trigram)))
+        if trigrams:
+            candidates = self._trigram_descs(trigrams[0])
+            for trigram in trigrams[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, self._trigram_descs(trigram), assume_unique=True)
+        else:
+            # Too short for a trigram: check every distinct description.
+            candidates = range(len(self.descriptions))
+        return [int(desc_id) for desc_id in candidates if needle in self.descriptions[desc_id]]
+
+    def matching_rows(self, query):
+        """
+        Returns the row numbers of every row whose description matches, ascending.
+        """
+        desc_ids = np.array(self.matching_descriptions(query), dtype=np.int64)
+        base_ids = desc_ids[desc_ids < len(self.row_offsets) - 1]
+        starts = self.row_offsets[base_ids]
+        counts = self.row_offsets[base_ids + 1] - starts
+        # Gather every base row list at once: position i of the output reads desc_rows[start + i - run start].
+        run_starts = np.cumsum(counts) - counts
+        positions = np.repeat(starts - run_starts, counts) + np.arange(int(counts.sum()))
+        parts = [self.desc_rows[positions]]
+        for desc_id in desc_ids.tolist():
+            if desc_id in self._extra_rows:
+                parts.append(np.asarray(self._extra_rows[desc_id], dtype=np.uint32))
+        return np.sort(np.concatenate(parts).astype(np.int64))
+
+    def row_descriptions(self):
+        """
+        Returns the description id of every row, in row order.
+        """
+        row_descs = np.empty(self.rows, dtype=np.int64)
+        counts = np.diff(self.row_offsets.astype(np.int64))
+        row_descs[self.desc_rows[:self.base_rows]] = np.repeat(np.arange(len(counts)), counts)
+        for desc_id, rows in self._extra_rows.items():
+            row_descs[rows] = desc_id
+        return row_descs
+
+    def compacted(self):
+        """
+        Returns an equivalent index with every appended row folded into the base arrays.
+        """
+        return SearchIndex.from_descriptions(list(self.descriptions), self.row_descriptions(), self.source)
+
+    def save(self, path=SEARCH_INDEX_FILE):
+        """
+        Atomically replaces the base file and removes the append log.
+        Only an index without appended rows can be saved; see compacted().
+        """
+        heap = "\n".join(self.descriptions).encode("utf-8")
+        arrays = {
+            "trigram_offsets": self.trigram_offsets,
+            "trigram_descs": self.trigram_descs,
+            "row_offsets": self.row_offsets,
+            "desc_rows": self.desc_rows,
+        }
+        layout = {}
+        offset = len(heap) + (-len(heap) % ALIGNMENT)
+        for name, values in arrays.items():
+            layout[name] = [offset, len(values), values.dtype.str]
+            offset += values.nbytes + (-values.nbytes % ALIGNMENT)
+        metadata = json.dumps({
+            "source": self.source,
+            "rows": self.rows,
+            "descriptions": len(self.descriptions),
+            "heap_bytes": len(heap),
+            "trigrams": list(self.trigrams),
+            "layout": layout,
+        }).encode("utf-8")
+        metadata += b" " * ((-len(metadata) - HEADER.size) % ALIGNMENT)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(metadata)))
+            f.write(metadata)
+            f.write(heap + b"\0" * (-len(heap) % ALIGNMENT))
+            for values in arrays.values():
+                f.write(values.tobytes())
+                f.write(b"\0" * (-values.nbytes % ALIGNMENT))
+        os.replace(path + ".tmp", path)
+        try:
+            os.remove(path + SEARCH_LOG_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def load(cls, path=SEARCH_INDEX_FILE):
+        """
+        Reads the base file and replays the append log, or returns None when either is unusable.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            magic, version, metadata_length = HEADER.unpack_from(data)
+            if magic != MAGIC or version != VERSION:
+                return None
+            metadata = json.loads(data[HEADER.size:HEADER.size + metadata_length])
+            body = HEADER.size + metadata_length
+            heap = data[body:body + metadata["heap_bytes"]].decode("utf-8")
+            descriptions = heap.split("\n") if metadata["descriptions"] else []
+            arrays = {
+                name: np.frombuffer(data, dtype=np.dtype(dtype), count=count, offset=body + offset)
+                for name, (offset, count, dtype) in metadata["layout"].items()
+            }
+        except (FileNotFoundError, struct.error, ValueError, KeyError):
+            return None
+        index = cls(descriptions, metadata["trigrams"], rows=metadata["rows"], source=metadata["source"], **arrays)
+        try:
+            with open(path + SEARCH_LOG_SUFFIX, "r") as f:
+                for line in f:
+                    entry = json.loads(line)
+                    if entry["first_row"] != index.rows:
+                        return None
+                    index.add_descriptions(entry["descriptions"])
+                    index.source = entry["source"]
+                    index.logged_rows += len(entry["descriptions"])
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError):
+            return None
+        return index
+
+
+def _ledger_descriptions(ledger_path):
+    try:
+        with open(ledger_path, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip().split(",")[3]
+    except FileNotFoundError:
+        return
+
+
+def rebuild_search_index(ledger_path, index_path=SEARCH_INDEX_FILE):
+    """
+    Recomputes the index from every ledger row and stores it.
+    """
+    source = _ledger_signature(ledger_path)
+    index = SearchIndex.build(_ledger_descriptions(ledger_path), source)
+    index.save(index_path)
+    return index
+
+
+def ensure_search_index(ledger_path, index_path=SEARCH_INDEX_FILE, cached=None):
+    """
+    Returns an index that matches the ledger: `cached` when it is still current,
+    otherwise the stored one, rebuilding only when the ledger was changed
+    without going through commit_search_index.
+    """
+    signature = _ledger_signature(ledger_path)
+    if cached is not None and cached.source == signature:
+        return cached
+    index = SearchIndex.load(index_path)
+    if index is None or index.source != signature:
+        index = rebuild_search_index(ledger_path, index_path)
+    return index
+
+
+def _line_descriptions(lines):
+    return [line.strip().split(",")[3] for line in lines if line.strip()]
+
+
+def commit_search_index(index, lines, ledger_path, index_path=SEARCH_INDEX_FILE):
+    """
+    Records lines already indexed with add_lines in the append log once
+    they have been written to the ledger, folding the log into the base file
+    once it holds COMPACT_ROWS rows. Returns the index to keep using.
+    """
+    descriptions = _line_descriptions(lines)
+    first_row = index.rows - len(descriptions)
+    index.source = _ledger_signature(ledger_path)
+    index.logged_rows += len(descriptions)
+    if index.logged_rows >= COMPACT_ROWS:
+        index = index.compacted()
+        index.save(index_path)
+        return index
+    with open(index_path + SEARCH_LOG_SUFFIX, "a") as f:
+        f.write(json.dumps({"first_row": first_row, "source": index.source, "descriptions": descriptions}) + "\n")
+    return index
+
+
+def search_rows(index, columns, query, start_day=None, end_day=None, categories=None,
+                min_amount=None, max_amount=None, limit=SEARCH_LIMIT):
+    """
+    Returns the row numbers of the newest `limit` rows of a TransactionColumns
+    container whose description matches the query and that fall inside the
+    date (day numbers, inclusive), category and amount (paisa, inclusive) filters.
+    """
+    rows = index.matching_rows(query)
+    if not len(rows):
+        return []
+    dates = np.frombuffer(columns.dates, dtype=np.int32)[rows]
+    keep = np.ones(len(rows), dtype=bool)
+    if start_day is not None:
+        keep &= dates >= start_day
+    if end_day is not None:
+        keep &= dates <= end_day
+    if categories is not None:
+        codes = [code for code, name in enumerate(columns.category_names) if name in set(categories)]
+        keep &= np.isin(np.frombuffer(columns.categories, dtype=np.uint8)[rows], codes)
+    if min_amount is not None or max_amount is not None:
+        amounts = np.frombuffer(columns.amounts, dtype=np.int64)[rows]
+        if min_amount is not None:
+            keep &= amounts >= min_amount
+        if max_amount is not None:
+            keep &= amounts <= max_amount
+    # Newest first; rows on the same day in reverse file order.
+    keys = (dates[keep].astype(np.int64) << 32) | rows[keep]
+    if len(keys) > limit:
+        keys = keys[np.argpartition(-keys, limit - 1)[:limit]]
+    return [int(key & 0xFFFFFFFF) for key in np.sort(keys)[::-1]]
@@ -0,0 +1,130 @@
+import os
+import threading
+from features.transactions.parallel import parse_block, parse_ledger
+from features.transactions.records import TransactionColumns
+
+# Constants
+TAIL_CHECK_BYTES = 64
+
+
+def _last_line_end(f, size):
+    """
+    Returns the offset just past the last newline in the first `size` bytes of f.
+    """
+    position = size
+    while position > 0:
+        start = max(0, position - 65536)
+        f.seek(start)
+        block = f.read(position - start)
+        newline = block.rfind(b"\n")
+        if newline != -1:
+            return start + newline + 1
+        position = start
+    return 0
+
+
+class TransactionStore:
+    """
+    Process-wide cache of the parsed ledger.
+
+    Every access stats the ledger file. While its inode, size and mtime are
+    unchanged the cached rows are returned as-is; when the file has only grown
+    (the bytes just before the old end are still the same) only the appended
+    lines are parsed; anything else, such as a full rewrite, triggers a reload,
+    which large ledgers parse across a process pool.
+    Only newline-terminated lines are cached, so a row that is still being
+    written becomes visible on the next access after its newline lands.
+    Rows are held in a TransactionColumns container rather than one object per row.
+    """
+
+    def __init__(self, path, snapshot=None):
+        """
+        `snapshot()` may return a TransactionColumns already holding the current
+        file contents (e.g. copied from the columnar ledger) to speed up full reloads.
+        """
+        self.path = path
+        self._snapshot = snapshot
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._rows = TransactionColumns()
+        self._offset = 0
+        self._tail = b""
+        self._stat_key = None
+
+    def _consume(self, f, start, size):
+        """
+        Parses the complete lines between `start` and `size` and advances the offset past them.
+        """
+        f.seek(start)
+        block = f.read(size - start)
+        end = block.rfind(b"\n") + 1
+        parse_block(block[:end], self._rows)
+        self._offset = start + end
+        consumed = block[:end]
+        if len(consumed) >= TAIL_CHECK_BYTES or start == 0:
+            self._tail = consumed[-TAIL_CHECK_BYTES:]
+        else:
+            self._tail = (self._tail + consumed)[-TAIL_CHECK_BYTES:]
+
+    def _full_reload(self, f, stat):
+        self._reset()
+        rows = self._snapshot() if self._snapshot else None
+        if rows is not None:
+            self._rows = rows
+            self._offset = stat.st_size
+        else:
+            self._offset = _last_line_end(f, stat.st_size)
+            self._rows = parse_ledger(self.path, self._offset)
+        tail_start = max(0, self._offset - TAIL_CHECK_BYTES)
+        f.seek(tail_start)
+        self._tail = f.read(self._offset - tail_start)
+
+    def refresh(self):
+        """
+        Brings the cache up to date with the ledger file.
+        """
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return
+        stat_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if stat_key == self._stat_key:
+            return
+
+        with open(self.path, "rb") as f:
+            grown = (
+                self._stat_key is not None
+                and stat.st_ino == self._stat_key[0]
+                and stat.st_size > self._offset
+            )
+            if grown:
+                tail_start = self._offset - len(self._tail)
+                f.seek(tail_start)
+                grown = f.read(len(self._tail)) == self._tail
+            if grown:
+                self._consume(f, self._offset, stat.st_size)
+            else:
+                self._full_reload(f, stat)
+        self._stat_key = stat_key
+
+    def rows(self):
+        """
+        Returns the cached TransactionColumns in file order after refreshing them.
+        The container is shared; callers must not modify it.
+        """
+        self.refresh()
+        return self._rows
+
+    def invalidate(self):
+        """
+        Drops the cache so the next access reloads the whole file.
+        """
+        with self._lock:
+            self._reset()
@@ -1,37 +1,54 @@
 import questionary
 from datetime import datetime, timedelta
+from itertools import islice
 from rich.console import Console
 from rich.table import Table
+from features.storage.storage import TRANSACTIONS_FILE, get_storage, month_bounds
+from features.transactions.search_index import SEARCH_LIMIT
 
 # Constants
-TRANSACTIONS_FILE = "database/transactions.txt"
 EXPENSE_CATEGORIES = ["Food", "Transport", "Shopping", "Bills", "Entertainment", "Health", "Other"]
 INCOME_CATEGORIES = ["Salary", "Freelance", "Business", "Investment", "Gift", "Other"]
+PAGE_SIZE = 20
+MIN_YEAR = 1900  # dates outside MIN_YEAR..MAX_YEAR are refused; the daily totals table holds a row for every day in between
+MAX_YEAR = 2100
 
 console = Console()
 
-def load_transactions():
+def iter_transactions(start=None, end=None, type=None, categories=None):
     """
-    Reads all transactions from the file.
+    Yields the transactions dated between start and end (inclusive) that match
+    the given type and categories, one at a time, from the configured storage backend.
+    """
+    return get_storage().iter_transactions(start, end, type, categories)
+
+def load_totals(start=None, end=None):
+    """
+    Returns {type: {category: amount}} for transactions dated between start and end (inclusive).
     """
-    transactions = []
     try:
-        with open(TRANSACTIONS_FILE, "r") as f:
-            for line in f:
-                date, type, category, description, amount = line.strip().split(",")
-                transactions.append({
-                    "date": datetime.strptime(date, "%Y-%m-%d"),
-                    "type": type,
-                    "category": category,
-                    "description": description,
-                    "amount": int(amount)
-                })
-    except FileNotFoundError:
-        return []
+        return get_storage().totals(start, end)
     except Exception as e:
-        console.print(f"[bold red]Error reading transactions: {e}[/bold red]")
-        return []
-    return transactions
+        console.print(f"[bold red]Error reading transaction totals: {e}[/bold red]")
+        return {}
+
+def append_transactions(lines):
+    """
+    Stores new transactions given as ledger lines ("date,type,category,description,amount").
+    """
+    get_storage().append_transactions(lines)
+
+def recover_ledger():
+    """
+    Replays or discards ledger writes interrupted by a crash; run once at startup.
+    """
+    try:
+        replayed, discarded = get_storage().recover()
+    except Exception as e:
+        console.print(f"[bold red]Error recovering transactions: {e}[/bold red]")
+        return
+    if replayed or discarded:
+        console.print(f"[bold yellow]Recovered interrupted writes: {replayed} replayed, {discarded} discarded.[/bold yellow]")
 
 def add_transaction(transaction_type):
     """
@@ -59,16 +76,19 @@ def add_transaction(transaction_type):
     date_str = questionary.text("Enter the date (YYYY-MM-DD), leave empty for today:", default=datetime.now().strftime("%Y-%m-%d")).ask()
 
     try:
-        date = datetime.strptime(date_str, "%Y-%m-%d").strftime("%Y-%m-%d")
+        date = datetime.strptime(date_str, "%Y-%m-%d")
     except ValueError:
         console.print("[bold red]Invalid date format. Please use YYYY-MM-DD.[/bold red]")
         return
+    if not MIN_YEAR <= date.year <= MAX_YEAR:
+        console.print(f"[bold red]The date must fall between {MIN_YEAR} and {MAX_YEAR}.[/bold red]")
+        return
+    date = date.strftime("%Y-%m-%d")
 
     try:
-        with open(TRANSACTIONS_FILE, "a") as f:
-            f.write(f"{date},{transaction_type},{category},{description},{amount}\n")
+        append_transactions([f"{date},{transaction_type},{category},{description},{amount}"])
         console.print(f"[bold {color}]Successfully added {transaction_type}: {description} ({amount/100:.2f})[/bold {color}]")
-    except IOError as e:
+    except Exception as e:
         console.print(f"[bold red]Error saving transaction: {e}[/bold red]")
 
 def add_expense():
@@ -83,21 +103,34 @@ def add_income():
     """
     add_transaction("income")
 
-def list_transactions(days=None):
+class TransactionPages:
     """
-    Lists all transactions in a table, with optional filtering by days.
+    Pages over a newest-first transaction iterator. Rows are pulled only as far
+    as the requested page needs and are kept, so going back never re-reads or re-sorts.
     """
-    transactions = load_transactions()
-    if not transactions:
-        console.print("[bold yellow]No transactions found.[/bold yellow]")
-        return
 
-    if days:
-        transactions = [t for t in transactions if t["date"] >= datetime.now() - timedelta(days=days)]
-
-    transactions.sort(key=lambda t: t["date"], reverse=True)
-
-    table = Table(title="Transactions")
+    def __init__(self, rows, page_size=PAGE_SIZE):
+        self._rows = iter(rows)
+        self._fetched = []
+        self._exhausted = False
+        self.page_size = page_size
+
+    def page(self, number):
+        """
+        Returns the rows on page `number` (0-based); empty past the last page.
+        """
+        end = (number + 1) * self.page_size
+        if len(self._fetched) < end and not self._exhausted:
+            more = list(islice(self._rows, end - len(self._fetched)))
+            self._fetched.extend(more)
+            self._exhausted = len(self._fetched) < end
+        return self._fetched[number * self.page_size:end]
+
+    def has_next(self, number):
+        return bool(self.page(number + 1))
+
+def _transactions_table(transactions, title):
+    table = Table(title=title)
     table.add_column("Date", style="cyan")
     table.add_column("Type", style="magenta")
     table.add_column("Category", style="yellow")
@@ -105,7 +138,7 @@ def list_transactions(days=None):
     table.add_column("Amount", justify="right", style="bold")
 
     for transaction in transactions:
-        color = "red" if transaction["type"] == "expense" else "green"
+        color = "red" if transaction["type"].lower() == "expense" else "green"
         table.add_row(
             transaction["date"].strftime("%Y-%m-%d"),
             transaction["type"],
@@ -113,26 +146,100 @@ def list_transactions(days=None):
             transaction["description"],
             f"[{color}]{transaction['amount']/100:.2f}[/{color}]"
         )
+    return table
 
-    console.print(table)
+def list_transactions(days=None, page_size=PAGE_SIZE):
+    """
+    Lists transactions newest first, one page of page_size rows at a time with
+    next/previous navigation, with optional filtering by days.
+    """
+    start = datetime.now() - timedelta(days=days) if days else None
+    try:
+        pages = TransactionPages(get_storage().iter_newest(start), page_size)
+        number = 0
+        transactions = pages.page(number)
+    except Exception as e:
+        console.print(f"[bold red]Error reading transactions: {e}[/bold red]")
+        return
+    if not transactions:
+        console.print("[bold yellow]No transactions found.[/bold yellow]")
+        return
+
+    totals = load_totals(start=start)
+    total_income = sum(totals.get("income", {}).values())
+    total_expense = sum(sum(categories.values()) for type, categories in totals.items() if type != "income")
+
+    while True:
+        first_row = number * page_size + 1
+        console.print(_transactions_table(transactions, f"Transactions (page {number + 1}, rows {first_row}-{first_row + len(transactions) - 1})"))
+        console.print(f"Income: [green]{total_income/100:.2f}[/green]  Expense: [red]{total_expense/100:.2f}[/red]")
+
+        choices = []
+        if pages.has_next(number):
+            choices.append("Next Page")
+        if number > 0:
+            choices.append("Previous Page")
+        if not choices:
+            return
+        choice = questionary.select("Navigate:", choices=choices + ["Done"]).ask()
+        if choice == "Next Page":
+            number += 1
+        elif choice == "Previous Page":
+            number -= 1
+        else:
+            return
+        transactions = pages.page(number)
+
+def search_transactions():
+    """
+    Finds transactions by description, optionally narrowed by date range, category and amount.
+    """
+    query = questionary.text("Search descriptions (end with * to match the start of a word):").ask()
+    if query is None:
+        return
+    start_str = questionary.text("Start date (YYYY-MM-DD), or leave empty:").ask()
+    end_str = questionary.text("End date (YYYY-MM-DD), or leave empty:").ask()
+    category = questionary.select(
+        "Category:", choices=["All"] + list(dict.fromkeys(EXPENSE_CATEGORIES + INCOME_CATEGORIES))
+    ).ask()
+    min_str = questionary.text("Minimum amount, or leave empty:").ask()
+    max_str = questionary.text("Maximum amount, or leave empty:").ask()
+    try:
+        start = datetime.strptime(start_str, "%Y-%m-%d") if start_str else None
+        end = datetime.strptime(end_str, "%Y-%m-%d") if end_str else None
+    except ValueError:
+        console.print("[bold red]Invalid date format. Please use YYYY-MM-DD.[/bold red]")
+        return
+    try:
+        min_amount = int(float(min_str) * 100) if min_str else None
+        max_amount = int(float(max_str) * 100) if max_str else None
+    except ValueError:
+        console.print("[bold red]Invalid amount. Please enter a number.[/bold red]")
+        return
+    categories = None if category in (None, "All") else [category]
+
+    try:
+        transactions = get_storage().search(query, start, end, categories, min_amount, max_amount)
+    except Exception as e:
+        console.print(f"[bold red]Error searching transactions: {e}[/bold red]")
+        return
+    if not transactions:
+        console.print("[bold yellow]No matching transactions found.[/bold yellow]")
+        return
+
+    console.print(_transactions_table(transactions, f"Transactions matching '{query}'"))
+    if len(transactions) == SEARCH_LIMIT:
+        console.print(f"[bold yellow]Showing the newest {SEARCH_LIMIT} matches; narrow the search to see older ones.[/bold yellow]")
 
 def get_balance():
     """
     Calculates and displays the balance for the current month.
     """
-    transactions = load_transactions()
-    current_month = datetime.now().month
-    current_year = datetime.now().year
-
-    total_income = 0
-    total_expense = 0
+    now = datetime.now()
+    totals = load_totals(*month_bounds(now.year, now.month))
 
-    for transaction in transactions:
-        if transaction["date"].month == current_month and transaction["date"].year == current_year:
-            if transaction["type"] == "income":
-                total_income += transaction["amount"]
-            else:
-                total_expense += transaction["amount"]
+    total_income = sum(totals.get("income", {}).values())
+    total_expense = sum(sum(categories.values()) for type, categories in totals.items() if type != "income")
 
     balance = total_income - total_expense
 
@@ -9,6 +9,7 @@ def main():
     """
     Main function to run the CLI application.
     """
+    transactions.recover_ledger()
     while True:
         choice = questionary.select(
             "What do you want to do?",
@@ -16,6 +17,7 @@ def main():
                 "Add Expense",
                 "Add Income",
                 "List Transactions",
+                "Search Transactions",
                 "Show Balance",
                 "Set Budget",
                 "View Budgets",
@@ -34,6 +36,8 @@ def main():
             days_str = questionary.text("Enter number of days to filter (e.g., 7), or leave empty for all transactions:").ask()
             days = int(days_str) if days_str else None
             transactions.list_transactions(days)
+        elif choice == "Search Transactions":
+            transactions.search_transactions()
         elif choice == "Show Balance":
             transactions.get_balance()
         elif choice == "Set Budget":
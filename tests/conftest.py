@@ -0,0 +1,23 @@
+import pytest
+from features.storage import storage
+from features.transactions.store import TransactionStore
+
+
+@pytest.fixture(autouse=True)
+def workspace(tmp_path, monkeypatch):
+    """
+    Runs each test in an empty directory holding its own database/, with the
+    text backend selected and fresh copies of the process-wide caches.
+    """
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "database").mkdir()
+    monkeypatch.setenv(storage.STORAGE_ENV_VAR, "text")
+    monkeypatch.setattr(storage, "transaction_store", TransactionStore(storage.TRANSACTIONS_FILE, snapshot=storage._columnar_snapshot))
+    monkeypatch.setattr(storage, "_text_storage", storage.TextStorage())
+    return tmp_path
+
+
+def write_ledger(lines, path=storage.TRANSACTIONS_FILE):
+    with open(path, "w") as f:
+        for line in lines:
+            f.write(line + "\n")
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from datetime import datetime
+import pytest
+from conftest import write_ledger
+from features.storage.daemon import LedgerDaemon
+from features.storage.journal import Journal
+from features.storage.storage import DAEMON_SOCKET, TRANSACTIONS_FILE, DaemonStorage, TextStorage
+
+
+@pytest.fixture
+def daemon():
+    """
+    Runs a ledger daemon over the text backend on a thread of its own and stops it afterwards.
+    """
+    server = LedgerDaemon(DAEMON_SOCKET, TextStorage())
+    loop = asyncio.new_event_loop()
+    ready = threading.Event()
+    stop = None
+
+    async def run():
+        nonlocal stop
+        stop = asyncio.Event()
+        serving = asyncio.ensure_future(server.serve(stop))
+        while not DaemonStorage(DAEMON_SOCKET).available():
+            await asyncio.sleep(0.01)
+        ready.set()
+        await serving
+
+    thread = threading.Thread(target=loop.run_until_complete, args=(run(),))
+    thread.start()
+    assert ready.wait(5)
+    yield server
+    loop.call_soon_threadsafe(stop.set)
+    thread.join(5)
+    loop.close()
+
+
+def _lines(count, prefix="row"):
+    return [f"2025-01-{i % 28 + 1:02d},Expense,Food,{prefix} {i},{i + 1}" for i in range(count)]
+
+
+def test_concurrent_clients_all_land(daemon):
+    def client(n):
+        storage = DaemonStorage(DAEMON_SOCKET)
+        for i in range(20):
+            storage.append_transactions([f"2025-02-01,Expense,Food,client {n} row {i},{i + 1}"])
+        storage.close()
+
+    threads = [threading.Thread(target=client, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    storage = DaemonStorage(DAEMON_SOCKET)
+    lines = list(storage.iter_lines())
+    assert len(lines) == len(set(lines)) == 160
+    assert storage.totals() == {"Expense": {"Food": 8 * sum(range(1, 21))}}
+    storage.close()
+
+
+def test_paged_reads_return_every_row(daemon, monkeypatch):
+    write_ledger(_lines(250))
+    storage = DaemonStorage(DAEMON_SOCKET)
+    monkeypatch.setattr("features.storage.storage.LINES_PAGE_SIZE", 40)
+    assert list(storage.iter_lines()) == _lines(250)
+    newest = list(storage.iter_newest(page_size=30))
+    assert len(newest) == 250
+    assert [t["date"] for t in newest] == sorted((t["date"] for t in newest), reverse=True)
+    january_3 = [line for line in _lines(250) if line.startswith("2025-01-03")]
+    assert sorted(storage.iter_lines(datetime(2025, 1, 3), datetime(2025, 1, 3))) == sorted(january_3)
+    storage.close()
+
+
+def test_stream_interrupted_by_a_write_fails_instead_of_mixing_rows(daemon):
+    write_ledger(_lines(30))
+    reader = DaemonStorage(DAEMON_SOCKET)
+    writer = DaemonStorage(DAEMON_SOCKET)
+    rows = reader.iter_newest(page_size=10)
+    first_page = [next(rows) for _ in range(10)]
+    assert len(first_page) == 10
+    writer.append_transactions(["2025-01-31,Expense,Food,late,5"])
+    with pytest.raises(RuntimeError, match="read it again"):
+        list(rows)
+    assert len(list(reader.iter_newest(page_size=10))) == 31
+    reader.close()
+    writer.close()
+
+
+def test_rewrite_travels_as_a_file(daemon):
+    write_ledger(_lines(5))
+    storage = DaemonStorage(DAEMON_SOCKET)
+    storage.rewrite_transactions(_lines(3, "new"))
+    assert list(storage.iter_lines()) == _lines(3, "new")
+    assert storage.totals() == {"Expense": {"Food": 6}}
+    storage.close()
+
+
+def test_failed_group_commit_errors_are_not_kept():
+    def failing_apply(lines):
+        raise ValueError("refused")
+
+    journal = Journal("database/transactions.journal", TRANSACTIONS_FILE, failing_apply)
+    errors = []
+
+    def append(i):
+        try:
+            journal.append([f"2025-01-01,Expense,Food,row {i},1"])
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=append, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 20
+    assert journal._failures == {}
@@ -0,0 +1,92 @@
+import csv
+import random
+from datetime import datetime, timedelta
+import questionary
+from conftest import write_ledger
+from features.data_management.importer import import_file
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage
+from features.transactions import transactions
+from features.transactions.daily_totals import DAILY_TOTALS_FILE, DailyTotals, day_number, rebuild_daily_totals
+
+CATEGORIES = [("Expense", "Food"), ("Expense", "Rent"), ("Income", "Salary")]
+
+
+def _random_lines(count, seed):
+    rng = random.Random(seed)
+    first = datetime(2023, 6, 1)
+    lines = []
+    for i in range(count):
+        type, category = rng.choice(CATEGORIES)
+        day = first + timedelta(days=rng.randrange(900))
+        lines.append(f"{day:%Y-%m-%d},{type},{category},row {i},{rng.randrange(1, 100_000)}")
+    return lines
+
+
+def _scan_totals(lines, start, end):
+    totals = {}
+    for line in lines:
+        date, type, category, _description, amount = line.split(",")
+        if start <= date <= end:
+            categories = totals.setdefault(type, {})
+            categories[category] = categories.get(category, 0) + int(amount)
+    return totals
+
+
+def test_range_totals_match_a_full_scan():
+    lines = _random_lines(2000, seed=1)
+    write_ledger(lines)
+    storage = TextStorage()
+    rng = random.Random(2)
+    for _ in range(50):
+        start = datetime(2023, 5, 1) + timedelta(days=rng.randrange(1000))
+        end = start + timedelta(days=rng.randrange(400))
+        assert storage.totals(start, end) == _scan_totals(lines, f"{start:%Y-%m-%d}", f"{end:%Y-%m-%d}")
+
+
+def test_appends_in_place_match_a_rebuild_after_reloading():
+    lines = _random_lines(500, seed=3)
+    storage = TextStorage()
+    storage.append_transactions(lines[:300])
+    for i in range(300, 500, 20):
+        storage.append_transactions(lines[i:i + 20])
+    stored = DailyTotals.load(DAILY_TOTALS_FILE)
+    rebuilt = rebuild_daily_totals(TRANSACTIONS_FILE, "database/rebuilt.bin")
+    assert stored.month_totals() == rebuilt.month_totals()
+    for start, end in [(None, None), ("2024-01-01", "2024-03-31"), ("2025-11-01", None)]:
+        start = day_number(datetime.fromisoformat(start)) if start else None
+        end = day_number(datetime.fromisoformat(end)) if end else None
+        assert stored.range_totals(start, end) == rebuilt.range_totals(start, end)
+
+
+def test_outside_edit_is_picked_up():
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"])
+    storage = TextStorage()
+    assert storage.totals() == {"Expense": {"Food": 100}}
+    write_ledger(["2025-01-01,Expense,Food,lunch,100", "2025-01-02,Expense,Food,dinner,250"])
+    assert storage.totals() == {"Expense": {"Food": 350}}
+
+
+def test_outlier_years_are_refused_on_input(monkeypatch):
+    with open("import.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "type", "category", "description", "amount"])
+        writer.writerow(["0001-01-01", "Expense", "Food", "typo", "100"])
+        writer.writerow(["2205-01-01", "Expense", "Food", "typo", "100"])
+        writer.writerow(["2025-01-01", "Expense", "Food", "fine", "100"])
+    report = import_file("import.csv", storage=TextStorage())
+    assert (report.imported, report.rejected) == (1, 2)
+
+    class Answer:
+        def __init__(self, value):
+            self.value = value
+
+        def ask(self):
+            return self.value
+
+    answers = iter(["100", "typo", "2205-01-01"])
+    monkeypatch.setattr(questionary, "text", lambda *args, **kwargs: Answer(next(answers)))
+    monkeypatch.setattr(questionary, "select", lambda *args, **kwargs: Answer("Food"))
+    transactions.add_transaction("expense")
+    with open(TRANSACTIONS_FILE) as f:
+        assert f.read() == "2025-01-01,Expense,Food,fine,100\n"
+    assert DailyTotals.load(DAILY_TOTALS_FILE).days == 1
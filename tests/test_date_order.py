@@ -0,0 +1,93 @@
+import random
+from datetime import datetime, timedelta
+from conftest import write_ledger
+from features.storage.storage import TRANSACTIONS_FILE, Storage, TextStorage
+from features.transactions import date_order
+from features.transactions.aggregates import verify_aggregates
+
+
+def _random_lines(count, seed):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        day = datetime(2024, 1, 1) + timedelta(days=rng.randrange(400))
+        lines.append(f"{day:%Y-%m-%d},Expense,Food,row {i},{rng.randrange(1, 5000)}")
+    return lines
+
+
+def _ledger():
+    with open(TRANSACTIONS_FILE) as f:
+        return f.read()
+
+
+def _scan(lines, start, end):
+    return sorted((line for line in lines if start <= line[:10] <= end), key=lambda line: line[:10])
+
+
+def _newest_scan(lines):
+    # Newest first; among rows of a date, the one added last comes first.
+    return list(reversed(sorted(lines, key=lambda line: line[:10])))
+
+
+def _assert_reads_match(storage, lines, seed):
+    rng = random.Random(seed)
+    for _ in range(30):
+        first = datetime(2024, 1, 1) + timedelta(days=rng.randrange(400))
+        last = first + timedelta(days=rng.randrange(60))
+        assert list(storage.iter_lines(first, last)) == _scan(lines, f"{first:%Y-%m-%d}", f"{last:%Y-%m-%d}")
+    newest = [t["description"] for t in storage.iter_newest()]
+    assert newest == [line.split(",")[3] for line in _newest_scan(lines)]
+
+
+def test_unsorted_and_newest_first_ledgers_are_read_in_place():
+    for seed, lines in [(1, _random_lines(800, seed=1)), (2, sorted(_random_lines(800, seed=2), reverse=True))]:
+        write_ledger(lines)
+        before = _ledger()
+        storage = TextStorage()
+        storage.recover()
+        _assert_reads_match(storage, lines, seed)
+        assert _ledger() == before
+
+
+def test_appends_keep_the_delta_index_in_order():
+    lines = _random_lines(300, seed=3)
+    write_ledger(lines)
+    storage = TextStorage()
+    list(storage.iter_lines(datetime(2024, 1, 1), datetime(2024, 2, 1)))
+    more = _random_lines(200, seed=4)
+    for i in range(0, len(more), 25):
+        storage.append_transactions(more[i:i + 25])
+    _assert_reads_match(storage, lines + more, seed=5)
+    _assert_reads_match(TextStorage(), lines + more, seed=6)
+
+
+def test_reads_after_an_append_triggers_a_merge(monkeypatch):
+    monkeypatch.setattr(date_order, "MERGE_MIN_ROWS", 10)
+    monkeypatch.setattr(date_order, "MERGE_RATIO", 0.05)
+    lines = sorted(_random_lines(400, seed=7))
+    write_ledger(lines)
+    storage = TextStorage()
+    more = _random_lines(30, seed=8)
+    storage.append_transactions(more)
+    assert storage.date_order().delta_rows == 0
+    assert _ledger().splitlines() == sorted(lines + more, key=lambda line: line[:10])
+    _assert_reads_match(storage, lines + more, seed=9)
+    assert verify_aggregates(storage) == []
+
+
+def test_sort_ledger_is_explicit_and_keeps_every_row():
+    lines = _random_lines(500, seed=10)
+    write_ledger(lines)
+    storage = TextStorage()
+    storage.search("row")
+    out_of_order = storage.date_order().delta_rows
+    assert out_of_order > 0
+    assert storage.sort_ledger() == out_of_order
+    assert sorted(_ledger().splitlines()) == sorted(lines)
+    assert TextStorage().date_order().delta_rows == 0
+    _assert_reads_match(storage, lines, seed=11)
+    _assert_reads_match(TextStorage(), lines, seed=12)
+    assert verify_aggregates(storage) == []
+    ids = [t["description"] for t in storage.search("row 4")]
+    assert ids == [t["description"] for t in Storage.search(storage, "row 4")]
+    assert storage.sort_ledger() == 0
@@ -0,0 +1,90 @@
+import csv
+from conftest import write_ledger
+from features.data_management.importer import import_file
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage
+from features.transactions.fingerprints import (
+    FINGERPRINTS_FILE, MIN_CAPACITY, FingerprintIndex, ensure_fingerprints, fingerprint,
+)
+
+
+def _write_csv(lines, path="import.csv"):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "type", "category", "description", "amount"])
+        writer.writerows(line.split(",") for line in lines)
+    return path
+
+
+def _ledger():
+    with open(TRANSACTIONS_FILE) as f:
+        return f.read().splitlines()
+
+
+BILL = "2025-01-05,Expense,Bills,electricity,1200"
+LUNCH = "2025-01-06,Expense,Food,lunch,100"
+
+
+def test_reimporting_the_same_file_adds_nothing():
+    storage = TextStorage()
+    path = _write_csv([BILL, BILL, LUNCH])
+    first = import_file(path, storage=storage)
+    second = import_file(path, storage=storage)
+    assert (first.imported, first.duplicates) == (3, 0)
+    assert (second.imported, second.duplicates) == (0, 3)
+    assert sorted(_ledger()) == sorted([BILL, BILL, LUNCH])
+
+
+def test_copies_are_counted_against_those_already_stored():
+    write_ledger([BILL])
+    storage = TextStorage()
+    report = import_file(_write_csv([BILL, BILL, BILL, LUNCH]), storage=storage)
+    assert (report.imported, report.duplicates) == (3, 1)
+    assert storage.count_existing([BILL, LUNCH]) == {BILL: 3, LUNCH: 1}
+
+
+def test_copies_split_across_batches_are_counted_once_each():
+    storage = TextStorage()
+    import_file(_write_csv([BILL] * 5), storage=storage, batch_size=2)
+    report = import_file(_write_csv([BILL] * 7), storage=storage, batch_size=3)
+    assert (report.imported, report.duplicates) == (2, 5)
+    assert _ledger().count(BILL) == 7
+
+
+def test_skipping_can_be_turned_off():
+    storage = TextStorage()
+    path = _write_csv([LUNCH])
+    import_file(path, storage=storage)
+    report = import_file(path, storage=storage, skip_duplicates=False)
+    assert report.imported == 1
+    assert _ledger() == [LUNCH, LUNCH]
+
+
+def test_index_grows_past_its_initial_capacity():
+    rows = int(MIN_CAPACITY * 0.8)
+    with FingerprintIndex.create("database/grow.bin") as index:
+        for i in range(rows):
+            index.add(fingerprint(f"row {i}"))
+        index.add(fingerprint("row 0"))
+        assert index.capacity == MIN_CAPACITY * 2
+        assert len(index) == rows
+        assert index.copies(fingerprint("row 0")) == 2
+        assert index.copies(fingerprint(f"row {rows - 1}")) == 1
+        assert index.copies(fingerprint("never added")) == 0
+
+
+def test_index_is_rebuilt_after_an_outside_edit_or_an_interrupted_update():
+    storage = TextStorage()
+    storage.append_transactions([LUNCH])
+    assert storage.count_existing([LUNCH]) == {LUNCH: 1}
+
+    with open(TRANSACTIONS_FILE, "a") as f:
+        f.write(BILL + "\n")
+    assert storage.count_existing([BILL, LUNCH]) == {BILL: 1, LUNCH: 1}
+
+    # A crash between add_lines and commit_fingerprints leaves the index marked dirty.
+    index = ensure_fingerprints(TRANSACTIONS_FILE)
+    index.add_lines([BILL, BILL])
+    index.close()
+    with FingerprintIndex(FINGERPRINTS_FILE) as dirty:
+        assert dirty.copies(fingerprint(BILL)) == 3
+    assert storage.count_existing([BILL]) == {BILL: 1}
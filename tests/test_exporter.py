@@ -0,0 +1,50 @@
+import gzip
+import json
+from datetime import datetime
+from conftest import write_ledger
+from features.data_management.exporter import MAX_OPEN_PARTITIONS, export_transactions
+from features.data_management.importer import import_file
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage
+
+LINES = [
+    "2025-03-02,Expense,Food,lunch,100",
+    "2024-12-31,Income,Salary,pay,5000",
+    "2025-01-15,Expense,Food,\"quoted\" dinner,250",
+    "2025-03-01,Expense,Bills,phone,799",
+]
+
+
+def test_gzip_jsonl_export_round_trips_through_the_importer(tmp_path):
+    write_ledger(LINES)
+    report = export_transactions("exports", "all", "jsonl", compress=True, storage=TextStorage())
+    assert report.rows == 4
+    with gzip.open(report.paths[0], "rt") as f:
+        records = [json.loads(line) for line in f]
+    assert [record["description"] for record in records] == ['lunch', 'pay', '"quoted" dinner', 'phone']
+
+    (tmp_path / "database" / "transactions.txt").unlink()
+    imported = import_file(report.paths[0], storage=TextStorage())
+    assert imported.imported == 4
+    with open(TRANSACTIONS_FILE) as f:
+        assert sorted(f.read().splitlines()) == sorted(LINES)
+
+
+def test_date_range_and_month_partitions():
+    write_ledger(LINES)
+    report = export_transactions(
+        "exports", "range", "csv", start=datetime(2025, 1, 1), end=datetime(2025, 3, 1), partition="month",
+        storage=TextStorage(),
+    )
+    assert report.rows == 2
+    assert report.paths == ["exports/range-2025-01.csv", "exports/range-2025-03.csv"]
+    with open("exports/range-2025-03.csv") as f:
+        assert f.read().splitlines() == ["date,type,category,description,amount", "2025-03-01,Expense,Bills,phone,799"]
+
+
+def test_partitions_beyond_the_open_file_limit_are_reopened_for_append():
+    lines = [f"{2000 + i % (MAX_OPEN_PARTITIONS + 6)}-01-01,Expense,Food,row {i},1" for i in range(3 * (MAX_OPEN_PARTITIONS + 6))]
+    write_ledger(lines)
+    report = export_transactions("exports", "years", "csv", partition="year", storage=TextStorage())
+    assert len(report.paths) == MAX_OPEN_PARTITIONS + 6
+    with open("exports/years-2000.csv") as f:
+        assert len(f.read().splitlines()) == 1 + 3
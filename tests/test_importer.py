@@ -0,0 +1,83 @@
+import csv
+import os
+import pytest
+from conftest import write_ledger
+from features.data_management.importer import MAX_AMOUNT, import_file
+from features.storage.journal import JOURNAL_FILE
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage, month_bounds
+from features.transactions.date_order import DateOrder
+
+HEADER = ["date", "type", "category", "description", "amount"]
+
+
+def _write_csv(rows, path="import.csv"):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return path
+
+
+def _rejected(report):
+    with open(report.rejects_path) as f:
+        return [row[1] for row in csv.reader(f)][1:]
+
+
+def test_dates_are_stored_as_yyyy_mm_dd_and_found_by_range():
+    storage = TextStorage()
+    report = import_file(_write_csv([
+        ["2025-12-1", "Expense", "Food", "unpadded", "100"],
+        ["20251202", "Expense", "Food", "compact", "100"],
+        ["2025-W49-1", "Expense", "Food", "week date", "100"],
+        ["2025-12-03", "Expense", "Food", "plain", "100"],
+    ]), storage=storage)
+
+    assert report.imported == 2 and report.rejected == 2
+    assert all("is not YYYY-MM-DD" in reason for reason in _rejected(report))
+    december = list(storage.iter_lines(*month_bounds(2025, 12)))
+    assert december == ["2025-12-01,Expense,Food,unpadded,100", "2025-12-03,Expense,Food,plain,100"]
+    assert [t["description"] for t in storage.iter_newest()] == ["plain", "unpadded"]
+
+
+def test_invalid_rows_are_set_aside_with_their_reason():
+    storage = TextStorage()
+    report = import_file(_write_csv([
+        ["2025-01-01", "Expense", "Food", "ok", "100"],
+        ["2025-01-01", "Expense", "Food", "too big", str(MAX_AMOUNT + 1)],
+        ["2025-01-01", "Expense", "Salary", "wrong category", "100"],
+        ["2025-01-01", "Loan", "Food", "wrong type", "100"],
+        ["2025-01-01", "Expense", "Food", "fraction", "1.5"],
+    ]), storage=storage)
+    assert report.imported == 1 and report.rejected == 4
+    assert len(_rejected(report)) == 4
+    assert list(storage.iter_lines()) == ["2025-01-01,Expense,Food,ok,100"]
+
+
+def test_rows_arrive_in_batches_with_the_totals_kept_up():
+    storage = TextStorage()
+    rows = [[f"2025-01-{i % 28 + 1:02d}", "Expense", "Food", f"row {i}", str(i + 1)] for i in range(95)]
+    progress = []
+    report = import_file(_write_csv(rows), batch_size=10, storage=storage, on_progress=lambda *args: progress.append(args[0]))
+    assert report.imported == 95
+    assert len(progress) == 10
+    assert storage.totals() == {"Expense": {"Food": sum(range(1, 96))}}
+
+
+def test_refused_batch_leaves_the_ledger_and_tables_as_they_were(monkeypatch):
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"])
+    storage = TextStorage()
+    assert storage.totals() == {"Expense": {"Food": 100}}
+
+    def refuse(self, lines):
+        raise OverflowError("refused")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DateOrder, "add_lines", refuse)
+        with pytest.raises(OverflowError):
+            import_file(_write_csv([["2025-01-02", "Expense", "Food", "dinner", "250"]]), storage=storage)
+
+    with open(TRANSACTIONS_FILE) as f:
+        assert f.read() == "2025-01-01,Expense,Food,lunch,100\n"
+    assert os.path.getsize(JOURNAL_FILE) == 0
+    assert TextStorage().recover() == (0, 0)
+    assert storage.totals() == {"Expense": {"Food": 100}}
@@ -0,0 +1,82 @@
+import threading
+from features.storage.journal import JOURNAL_FILE, Journal
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage
+
+
+def _append_to_ledger(lines):
+    with open(TRANSACTIONS_FILE, "a") as f:
+        for line in lines:
+            f.write(line + "\n")
+
+
+def _ledger():
+    with open(TRANSACTIONS_FILE) as f:
+        return f.read().splitlines()
+
+
+def test_batch_journaled_but_never_applied_is_replayed():
+    # A crash between the journal fsync and the ledger write is modelled by an apply that does nothing.
+    Journal(JOURNAL_FILE, TRANSACTIONS_FILE, lambda lines: None).append(["2025-01-01,Expense,Food,lunch,100"])
+    assert Journal(JOURNAL_FILE, TRANSACTIONS_FILE, _append_to_ledger).recover() == (1, 0)
+    assert _ledger() == ["2025-01-01,Expense,Food,lunch,100"]
+
+
+def test_half_applied_batch_is_completed_once():
+    def torn_apply(lines):
+        with open(TRANSACTIONS_FILE, "a") as f:
+            f.write(lines[0] + "\n" + lines[1][:7])
+
+    lines = ["2025-01-01,Expense,Food,lunch,100", "2025-01-02,Expense,Food,dinner,250"]
+    Journal(JOURNAL_FILE, TRANSACTIONS_FILE, torn_apply).append(lines)
+    journal = Journal(JOURNAL_FILE, TRANSACTIONS_FILE, _append_to_ledger)
+    assert journal.recover() == (1, 0)
+    assert _ledger() == lines
+    assert journal.recover() == (0, 0)
+    assert _ledger() == lines
+
+
+def test_torn_journal_record_is_discarded():
+    Journal(JOURNAL_FILE, TRANSACTIONS_FILE, _append_to_ledger).append(["2025-01-01,Expense,Food,lunch,100"])
+    with open(JOURNAL_FILE, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+    assert Journal(JOURNAL_FILE, TRANSACTIONS_FILE, _append_to_ledger).recover() == (0, 1)
+    assert _ledger() == ["2025-01-01,Expense,Food,lunch,100"]
+
+
+def test_record_older_than_a_rewrite_is_not_replayed():
+    Journal(JOURNAL_FILE, TRANSACTIONS_FILE, lambda lines: None).append(["2025-01-01,Expense,Food,lunch,100"])
+    with open(TRANSACTIONS_FILE, "w") as f:
+        f.write("2025-02-01,Expense,Rent,flat,3000\n")
+    assert Journal(JOURNAL_FILE, TRANSACTIONS_FILE, _append_to_ledger).recover() == (0, 1)
+    assert _ledger() == ["2025-02-01,Expense,Rent,flat,3000"]
+
+
+def test_concurrent_appends_share_commits_and_land_once():
+    batches = []
+
+    def apply(lines):
+        batches.append(len(lines))
+        _append_to_ledger(lines)
+
+    journal = Journal(JOURNAL_FILE, TRANSACTIONS_FILE, apply)
+    threads = [
+        threading.Thread(target=journal.append, args=([f"2025-01-01,Expense,Food,row {i},{i + 1}"],))
+        for i in range(40)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(_ledger()) == sorted(f"2025-01-01,Expense,Food,row {i},{i + 1}" for i in range(40))
+    assert sum(batches) == 40 and len(batches) <= 40
+
+
+def test_storage_recovery_keeps_derived_tables_in_step():
+    storage = TextStorage()
+    storage.append_transactions(["2025-01-01,Expense,Food,lunch,100"])
+    Journal(JOURNAL_FILE, TRANSACTIONS_FILE, lambda lines: None).append(["2025-01-02,Expense,Food,dinner,250"])
+
+    recovered = TextStorage()
+    assert recovered.recover() == (1, 0)
+    assert recovered.totals() == {"Expense": {"Food": 350}}
+    assert [t["description"] for t in recovered.iter_newest()] == ["dinner", "lunch"]
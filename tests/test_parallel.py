@@ -0,0 +1,25 @@
+from conftest import write_ledger
+from features.storage.storage import TRANSACTIONS_FILE
+from features.transactions.parallel import chunk_ranges, parse_ledger
+
+
+def _rows(columns):
+    return [(t["date"], t["type"], t["category"], t["description"], t["amount"]) for t in columns]
+
+
+def test_parallel_parse_matches_serial_parse_in_file_order():
+    write_ledger([f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d},Expense,Food,row {i},{i + 1}" for i in range(500)])
+    serial = parse_ledger(TRANSACTIONS_FILE, workers=1)
+    parallel = parse_ledger(TRANSACTIONS_FILE, workers=3, chunk_size=1000, min_parallel_bytes=0)
+    assert len(serial) == 500
+    assert _rows(parallel) == _rows(serial)
+
+
+def test_chunks_end_on_line_boundaries():
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"] * 50)
+    with open(TRANSACTIONS_FILE, "rb") as f:
+        data = f.read()
+    ranges = chunk_ranges(TRANSACTIONS_FILE, len(data), chunk_size=70)
+    assert ranges[0][0] == 0 and ranges[-1][1] == len(data)
+    for (_start, stop), (next_start, _stop) in zip(ranges, ranges[1:]):
+        assert stop == next_start and data[stop - 1:stop] == b"\n"
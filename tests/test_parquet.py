@@ -0,0 +1,51 @@
+import os
+from datetime import datetime
+import pytest
+from conftest import write_ledger
+from features.data_management.importer import import_file
+from features.data_management.parquet import (
+    PARQUET_SNAPSHOT_FILE, ensure_parquet_snapshot, export_budgets_parquet, export_parquet, read_transactions_frame,
+)
+from features.storage.storage import TRANSACTIONS_FILE, TextStorage
+
+pytest.importorskip("pyarrow")
+
+LINES = [
+    "2025-01-05,Expense,Food,lunch,100",
+    "2025-02-01,Income,Salary,pay,5000",
+    "2025-02-03,Expense,Bills,phone,799",
+]
+
+
+def test_export_and_import_round_trip():
+    write_ledger(LINES)
+    storage = TextStorage()
+    storage.save_budgets({"Food": 2000})
+    assert export_parquet("exports/all.parquet", storage=storage) == 3
+    export_budgets_parquet("exports/budgets.parquet", storage=storage)
+
+    os.remove(TRANSACTIONS_FILE)
+    storage.save_budgets({})
+    storage = TextStorage()
+    assert import_file("exports/all.parquet", storage=storage).imported == 3
+    assert import_file("exports/budgets.parquet", storage=storage).budgets == {"Food": 2000}
+    assert sorted(storage.iter_lines()) == sorted(LINES)
+
+
+def test_date_range_export_goes_through_the_line_iterator():
+    write_ledger(LINES)
+    rows = export_parquet("exports/february.parquet", datetime(2025, 2, 1), datetime(2025, 2, 28), storage=TextStorage())
+    assert rows == 2
+    assert list(read_transactions_frame("exports/february.parquet")["Description"]) == ["pay", "phone"]
+
+
+def test_snapshot_is_rewritten_only_when_the_ledger_changes():
+    write_ledger(LINES)
+    ensure_parquet_snapshot(TRANSACTIONS_FILE)
+    written = os.stat(PARQUET_SNAPSHOT_FILE).st_mtime_ns
+    ensure_parquet_snapshot(TRANSACTIONS_FILE)
+    assert os.stat(PARQUET_SNAPSHOT_FILE).st_mtime_ns == written
+
+    TextStorage().append_transactions(["2025-03-01,Expense,Food,snack,50"])
+    frame = read_transactions_frame(ensure_parquet_snapshot(TRANSACTIONS_FILE))
+    assert list(frame["Amount"]) == [100, 5000, 799, 50]
@@ -0,0 +1,53 @@
+import os
+from conftest import write_ledger
+from features.analytics.reports import generate_reports, report_path
+from features.storage.storage import SQLiteStorage, TextStorage
+
+LINES = [
+    "2025-01-05,Expense,Food,text lunch,100",
+    "2025-01-20,Income,Salary,pay,5000",
+    "2025-02-03,Expense,Rent,text flat,3000",
+    "2025-03-03,Expense,Food,text snack,50",
+]
+
+
+def _report(label):
+    with open(report_path(label, "md", "reports")) as f:
+        return f.read()
+
+
+def test_reports_cover_every_month_and_skip_unchanged_ones():
+    write_ledger(LINES)
+    storage = TextStorage()
+    run = generate_reports(formats=("md",), directory="reports", workers=2, storage=storage)
+    assert (run.months, run.skipped) == (3, 0)
+    assert "text flat" in _report("2025-02")
+
+    assert generate_reports(formats=("md",), directory="reports", workers=2, storage=storage).skipped == 3
+
+    # Same totals, different rows: the month is rendered again.
+    storage.rewrite_transactions([line.replace("text flat", "text house") for line in LINES])
+    run = generate_reports(formats=("md",), directory="reports", workers=2, storage=storage)
+    assert (run.months, run.skipped) == (1, 2)
+    assert "text house" in _report("2025-02")
+
+
+def test_workers_read_the_backend_they_were_given():
+    write_ledger(LINES)
+    sqlite = SQLiteStorage("database/other.db")
+    sqlite.append_transactions([line.replace("text", "sqlite") for line in LINES])
+    run = generate_reports(formats=("md",), directory="reports", workers=3, storage=sqlite)
+    assert run.months == 3
+    for label in ("2025-01", "2025-02", "2025-03"):
+        assert "sqlite" in _report(label) and "text" not in _report(label)
+    sqlite.close()
+
+
+def test_workers_never_write_the_date_order():
+    # An unsorted ledger whose date order is stale: the parent refreshes it before the pool starts.
+    write_ledger(list(reversed(LINES)))
+    storage = TextStorage()
+    run = generate_reports(formats=("md", "html"), directory="reports", workers=3, storage=storage)
+    assert run.months == 3 and len(run.written) == 6
+    assert not [name for name in os.listdir("database") if name.endswith(".tmp")]
+    assert "text lunch" in _report("2025-01")
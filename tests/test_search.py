@@ -0,0 +1,60 @@
+import random
+from datetime import datetime, timedelta
+from conftest import write_ledger
+from features.storage.storage import Storage, TextStorage
+from features.transactions import search_index
+
+WORDS = ["coffee", "Coffee beans", "bus pass", "rent", "grocer", "groceries", "café", "book club", "a", "bookshop"]
+QUERIES = ["coffee", "COF", "bean", "oce", "book", "book*", "shop*", "café", "a", "zzz", " pass", "rent", "b"]
+
+
+def _random_lines(count, seed):
+    rng = random.Random(seed)
+    lines = []
+    for i in range(count):
+        day = datetime(2025, 1, 1) + timedelta(days=rng.randrange(300))
+        category = rng.choice(["Food", "Transport", "Bills"])
+        lines.append(f"{day:%Y-%m-%d},Expense,{category},{rng.choice(WORDS)} {rng.randrange(50)},{rng.randrange(1, 5000)}")
+    return lines
+
+
+def _ids(rows):
+    return [(t["date"], t["description"], t["amount"]) for t in rows]
+
+
+def _assert_matches_a_scan(storage, **filters):
+    for query in QUERIES:
+        assert _ids(storage.search(query, **filters)) == _ids(Storage.search(storage, query, **filters)), query
+
+
+def test_index_answers_like_a_scan():
+    write_ledger(_random_lines(600, seed=1))
+    storage = TextStorage()
+    _assert_matches_a_scan(storage)
+    _assert_matches_a_scan(storage, limit=5)
+    _assert_matches_a_scan(storage, start=datetime(2025, 3, 1), end=datetime(2025, 6, 30), categories=["Food"])
+    _assert_matches_a_scan(storage, min_amount=1000, max_amount=3000)
+
+
+def test_appended_rows_are_found_through_the_log_and_after_compaction(monkeypatch):
+    lines = _random_lines(400, seed=2)
+    storage = TextStorage()
+    storage.append_transactions(lines[:100])
+    storage.search("coffee")
+    for i in range(100, 250, 25):
+        storage.append_transactions(lines[i:i + 25])
+    _assert_matches_a_scan(storage)
+
+    monkeypatch.setattr(search_index, "COMPACT_ROWS", 50)
+    for i in range(250, 400, 30):
+        storage.append_transactions(lines[i:i + 30])
+    _assert_matches_a_scan(storage)
+    _assert_matches_a_scan(TextStorage())
+
+
+def test_outside_edit_rebuilds_the_index():
+    write_ledger(["2025-01-01,Expense,Food,coffee,100"])
+    storage = TextStorage()
+    assert len(storage.search("coffee")) == 1
+    write_ledger(["2025-01-01,Expense,Food,tea,100", "2025-01-02,Expense,Food,coffee beans,300"])
+    assert _ids(storage.search("coffee")) == [(datetime(2025, 1, 2), "coffee beans", 300)]
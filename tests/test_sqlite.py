@@ -0,0 +1,41 @@
+from datetime import datetime
+from conftest import write_ledger
+from features.storage.storage import SQLiteStorage, TextStorage, migrate_text_to_sqlite
+
+LINES = [
+    "2025-01-05,Expense,Food,lunch,100",
+    "2025-01-20,Income,Salary,pay,5000",
+    "2025-02-03,Expense,Rent,flat,3000",
+    "2025-01-05,Expense,Food,lunch,100",
+]
+
+
+def _lines(storage, start=None, end=None):
+    return list(storage.iter_lines(start, end))
+
+
+def test_migration_keeps_every_row_and_budget():
+    write_ledger(LINES)
+    text = TextStorage()
+    text.save_budgets({"Food": 1000})
+    assert migrate_text_to_sqlite("database/finance.db") == (4, 1)
+
+    sqlite = SQLiteStorage("database/finance.db")
+    assert sorted(_lines(sqlite)) == sorted(LINES)
+    assert sqlite.load_budgets() == {"Food": 1000}
+    sqlite.close()
+
+
+def test_sqlite_answers_like_the_text_backend():
+    write_ledger(LINES)
+    text = TextStorage()
+    sqlite = SQLiteStorage("database/finance.db")
+    sqlite.append_transactions(LINES)
+
+    january = (datetime(2025, 1, 1), datetime(2025, 1, 31))
+    assert sorted(_lines(sqlite, *january)) == sorted(_lines(text, *january))
+    assert sqlite.totals(*january) == text.totals(*january)
+    assert sqlite.count_existing(LINES[:2]) == text.count_existing(LINES[:2]) == {LINES[0]: 2, LINES[1]: 1}
+    assert [t["description"] for t in sqlite.search("lun")] == [t["description"] for t in text.search("lun")]
+    assert [t["date"] for t in sqlite.iter_newest()] == [t["date"] for t in text.iter_newest()]
+    sqlite.close()
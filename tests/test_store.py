@@ -0,0 +1,51 @@
+import os
+from conftest import write_ledger
+from features.storage.storage import TRANSACTIONS_FILE as LEDGER
+from features.transactions import store as store_module
+from features.transactions.store import TransactionStore
+
+
+def _lines(store):
+    return [(t["date"].strftime("%Y-%m-%d"), t["description"], t["amount"]) for t in store.rows()]
+
+
+def test_appended_rows_are_parsed_without_a_full_reload(monkeypatch):
+    write_ledger(["2025-01-01,Expense,Food,lunch,100", "2025-01-02,Income,Salary,pay,5000"], LEDGER)
+    store = TransactionStore(LEDGER)
+    assert len(store.rows()) == 2
+
+    reloads = []
+    monkeypatch.setattr(store_module, "parse_ledger", lambda *args, **kwargs: reloads.append(args))
+    with open(LEDGER, "a") as f:
+        f.write("2025-01-03,Expense,Food,dinner,250\n")
+    assert _lines(store)[-1] == ("2025-01-03", "dinner", 250)
+    assert len(store.rows()) == 3
+    assert reloads == []
+
+
+def test_rewritten_ledger_is_reloaded():
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"], LEDGER)
+    store = TransactionStore(LEDGER)
+    store.rows()
+    write_ledger(["2025-02-01,Expense,Rent,flat,9000", "2025-02-02,Expense,Food,snack,50"], LEDGER)
+    assert _lines(store) == [("2025-02-01", "flat", 9000), ("2025-02-02", "snack", 50)]
+
+
+def test_partial_last_line_waits_for_its_newline():
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"], LEDGER)
+    store = TransactionStore(LEDGER)
+    with open(LEDGER, "a") as f:
+        f.write("2025-01-02,Expense,Food,din")
+    assert len(store.rows()) == 1
+    with open(LEDGER, "a") as f:
+        f.write("ner,250\n")
+    assert _lines(store)[-1] == ("2025-01-02", "dinner", 250)
+
+
+def test_missing_ledger_is_empty():
+    store = TransactionStore(LEDGER)
+    assert len(store.rows()) == 0
+    write_ledger(["2025-01-01,Expense,Food,lunch,100"], LEDGER)
+    assert len(store.rows()) == 1
+    os.remove(LEDGER)
+    assert len(store.rows()) == 0